@@ -0,0 +1,221 @@
+"""
+Benchmark suite for FastCircuit kernels, mutation operators and full trials.
+
+Times each benchmark over a grid of network sizes, fits a power-law scaling
+exponent (seconds ~ N^k) per benchmark, and stores everything as JSON so
+later runs can be compared against it.
+
+  python benchmark.py run --out benchmark_baselines/baseline.json
+  python benchmark.py run --quick --out /tmp/current.json
+  python benchmark.py compare benchmark_baselines/baseline.json /tmp/current.json
+
+compare exits with status 1 if any benchmark got slower than the baseline
+by more than --tolerance (default 25%).
+
+Benchmarks:
+  topo_order / computing_order / fitness  — single kernel calls
+  fast_mutate / fast_duplicate            — FastCircuit operators
+  legacy_mutate / legacy_duplicate        — Circuit operators
+  rw_trial / ss_trial                     — seconds per mutation of full
+                                            run_random_walk_fast /
+                                            run_strong_selection_fast trials
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numba
+import numpy as np
+
+from fast_circuit import FastCircuit, run_random_walk_fast, run_strong_selection_fast
+from fast_circuit.circuit import (NUM_INPUTS, warmup, _topo_order_numba, _computing_order_numba,
+                                  _fitness_numba, _target_array)
+from logic_gates import Circuit
+from goals import and_funct
+
+SIZES = [3, 10, 30, 100, 300, 1000, 3000]
+QUICK_SIZES = [3, 30, 300]
+# full trials at N=3000 run ~1e6 mutations each, keep them to the smaller sizes
+TRIAL_SIZES = [3, 10, 30, 100, 300]
+LEGACY_MAX_SIZE = 1000
+
+
+def construct_genome(size: int) -> list:
+    genome = []
+    for i in range(size):
+        genome += [0, 1]
+    genome += [2]
+    return genome
+
+
+def time_call(fn, min_time=0.2, repeats=3):
+    """Best-of-repeats mean seconds per call; each repeat runs enough calls to last min_time."""
+    n = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        n = max(2 * n, int(n * min_time / max(elapsed, 1e-9)))
+    best = elapsed / n
+    for _ in range(repeats - 1):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / n)
+    return best
+
+
+def drifted_circuit(size, steps=200, seed=0):
+    """A FastCircuit after `steps` neutral-walk mutations, so it isn't the trivial start genome."""
+    random.seed(seed)
+    fc = FastCircuit(construct_genome(size))
+    for _ in range(steps):
+        fc.mutate()
+    return fc
+
+
+def bench_kernels(size, results):
+    fc = drifted_circuit(size)
+    genome = fc.genome
+    full_order, full_len = _topo_order_numba(genome, NUM_INPUTS)
+    eval_order, eval_len = _computing_order_numba(genome, NUM_INPUTS, full_order, full_len)
+    target = _target_array(and_funct)
+    results['topo_order'][size] = time_call(lambda: _topo_order_numba(genome, NUM_INPUTS))
+    results['computing_order'][size] = time_call(
+        lambda: _computing_order_numba(genome, NUM_INPUTS, full_order, full_len))
+    results['fitness'][size] = time_call(
+        lambda: _fitness_numba(genome, NUM_INPUTS, eval_order, eval_len, target))
+    results['fast_duplicate'][size] = time_call(fc.duplicate)
+    results['fast_mutate'][size] = time_call(lambda: fc.duplicate().mutate())
+
+
+def bench_legacy(size, results):
+    random.seed(0)
+    circuit = Circuit(2, drifted_circuit(size).genome.tolist())
+    results['legacy_duplicate'][size] = time_call(circuit.duplicate)
+    results['legacy_mutate'][size] = time_call(lambda: circuit.duplicate().mutate())
+
+
+def bench_trials(size, results, n_trials):
+    for name, fn in (('rw_trial', run_random_walk_fast), ('ss_trial', run_strong_selection_fast)):
+        steps, elapsed = 0, 0.0
+        for i in range(n_trials):
+            random.seed(i); np.random.seed(i)
+            init = FastCircuit(construct_genome(size))
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                T, *_ = fn(and_funct, 1000, 0.001, init, 1e15, 2_000_000)
+                elapsed += time.perf_counter() - t0
+            steps += len(T) - 1
+        results[name][size] = elapsed / max(steps, 1)
+
+
+def fit_exponents(results):
+    """Slope of log(seconds) vs log(N) per benchmark, over sizes >= 10 where available."""
+    exponents = {}
+    for name, by_size in results.items():
+        sizes = np.array(sorted(by_size))
+        big = sizes[sizes >= 10] if (sizes >= 10).sum() >= 2 else sizes
+        if len(big) < 2:
+            continue
+        secs = np.array([by_size[s] for s in big])
+        exponents[name] = float(np.polyfit(np.log(big), np.log(secs), 1)[0])
+    return exponents
+
+
+def run(sizes, trial_sizes, n_trials, out):
+    print("Warming up Numba JIT...")
+    warmup()
+    results = {name: {} for name in ('topo_order', 'computing_order', 'fitness', 'fast_duplicate',
+                                     'fast_mutate', 'legacy_duplicate', 'legacy_mutate',
+                                     'rw_trial', 'ss_trial')}
+    for size in sizes:
+        print(f"N={size}")
+        bench_kernels(size, results)
+        if size <= LEGACY_MAX_SIZE:
+            bench_legacy(size, results)
+    for size in trial_sizes:
+        print(f"N={size} trials")
+        bench_trials(size, results, n_trials)
+    results = {name: by_size for name, by_size in results.items() if by_size}
+    report = {
+        'meta': {
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'numba': numba.__version__,
+            'cpu_count': os.cpu_count(),
+        },
+        'units': 'seconds per call (trial benchmarks: seconds per mutation)',
+        'results': {name: {str(s): v for s, v in by_size.items()} for name, by_size in results.items()},
+        'exponents': fit_exponents(results),
+    }
+    for name, by_size in results.items():
+        cells = '  '.join(f"{s}:{v * 1e6:.2f}us" for s, v in by_size.items())
+        print(f"  {name:18s} k={report['exponents'].get(name, float('nan')):.2f}  {cells}")
+    if out:
+        os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {out}")
+    return report
+
+
+def compare(baseline_path, current_path, tolerance):
+    """Print per-benchmark ratios current/baseline and return the list of regressions."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+    regressions = []
+    for name, by_size in current['results'].items():
+        for size, secs in by_size.items():
+            base = baseline['results'].get(name, {}).get(size)
+            if base is None:
+                continue
+            ratio = secs / base
+            flag = ''
+            if ratio > 1 + tolerance:
+                flag = '  REGRESSION'
+                regressions.append((name, int(size), ratio))
+            print(f"  {name:18s} N={size:>5s}  {ratio:6.2f}x{flag}")
+    for name, k in current.get('exponents', {}).items():
+        k0 = baseline.get('exponents', {}).get(name)
+        if k0 is not None:
+            print(f"  {name:18s} exponent {k0:.2f} -> {k:.2f}")
+    print(f"{len(regressions)} regression(s) beyond {tolerance:.0%}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='mode', required=True)
+    p_run = sub.add_parser('run', help='run the benchmarks and save a JSON report')
+    p_run.add_argument('--out', default='benchmark_baselines/baseline.json')
+    p_run.add_argument('--sizes', type=int, nargs='+', default=None)
+    p_run.add_argument('--trial-sizes', type=int, nargs='+', default=None)
+    p_run.add_argument('--trials', type=int, default=5, help='full trials per size')
+    p_run.add_argument('--quick', action='store_true', help=f'sizes {QUICK_SIZES} only')
+    p_cmp = sub.add_parser('compare', help='compare a report against a baseline')
+    p_cmp.add_argument('baseline')
+    p_cmp.add_argument('current')
+    p_cmp.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    if args.mode == 'run':
+        sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+        trial_sizes = args.trial_sizes or ([s for s in QUICK_SIZES if s <= max(TRIAL_SIZES)] if args.quick
+                                           else TRIAL_SIZES)
+        run(sizes, trial_sizes, args.trials, args.out)
+    else:
+        sys.exit(1 if compare(args.baseline, args.current, args.tolerance) else 0)
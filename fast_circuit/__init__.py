@@ -1,4 +1,6 @@
 from fast_circuit.circuit import FastCircuit
-from fast_circuit.models import run_random_walk_fast, run_strong_selection_fast
+from fast_circuit.models import (run_random_walk_fast, run_strong_selection_fast, run_random_walk_hitting_times,
+                                 run_varying_goal_fast)
 
-__all__ = ['FastCircuit', 'run_random_walk_fast', 'run_strong_selection_fast']
+__all__ = ['FastCircuit', 'run_random_walk_fast', 'run_strong_selection_fast', 'run_random_walk_hitting_times',
+           'run_varying_goal_fast']
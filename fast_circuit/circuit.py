@@ -7,39 +7,56 @@ Genome format identical to Circuit.genome:
 Key compiled functions:
   _topo_order_numba     — O(N) Kahn's BFS using CSR adjacency
   _computing_order_numba — backward BFS to find computing subgraph
+  _orders_into_numba    — both orders into reused buffers, for propose()
+  _update_cone_tables   — per-node truth tables re-evaluated only where a
+                          mutation changed them
+  _leap_numba           — a run of proposals outside the computing subgraph,
+                          with cycle checks limited by the topological order
+  _truth_table_numba    — 4-bit output truth table, all 4 input rows at once
   _fitness_numba        — evaluates all 4 input pairs in one JIT call
+  _cone_numba           — depth and gate count of the output's fan-in cone
+
+Goals are 4-bit truth-table masks (bit i = output for input row i, rows
+00, 01, 10, 11). A FastCircuit caches its own truth table once per genome,
+so its fitness against any number of goals costs one evaluation.
 """
+import os
 import random
 import functools
+import numbers
+import time
 
 import numpy as np
 import numba
 
+from fast_circuit.reachability import ReachabilityIndex
+from fast_circuit.zobrist import _delta_numba, _hash_numba, _trail_numba
+from goals import GOALS
+
 NUM_INPUTS = 2
 
 
 # ── Numba-compiled functions ──────────────────────────────────────────────────
 
 @numba.njit(cache=True)
-def _build_csr(genome, num_inputs):
+def _build_csr_into(genome, num_inputs, out_degree, ptr, adj, pos):
     """
-    Build CSR (Compressed Sparse Row) successor adjacency in O(N).
-    adj[ptr[u] : ptr[u+1]] lists every gate that takes node u as an input.
+    Build CSR (Compressed Sparse Row) successor adjacency in O(N) into the
+    given buffers. adj[ptr[u] : ptr[u+1]] lists every gate that takes node u
+    as an input.
     """
     n_gates = (len(genome) - 1) // 2
     n_nodes = num_inputs + n_gates
 
-    out_degree = np.zeros(n_nodes, dtype=np.int32)
+    out_degree[:] = 0
     for g in range(n_gates):
         out_degree[genome[2 * g]] += 1
         out_degree[genome[2 * g + 1]] += 1
 
-    ptr = np.zeros(n_nodes + 1, dtype=np.int32)
+    ptr[0] = 0
     for i in range(n_nodes):
         ptr[i + 1] = ptr[i] + out_degree[i]
 
-    adj = np.zeros(2 * n_gates, dtype=np.int32)
-    pos = np.zeros(n_nodes, dtype=np.int32)
     for i in range(n_nodes):
         pos[i] = ptr[i]
 
@@ -52,32 +69,40 @@ def _build_csr(genome, num_inputs):
         adj[pos[s2]] = gate
         pos[s2] += 1
 
+
+@numba.njit(cache=True)
+def _build_csr(genome, num_inputs):
+    """Freshly allocated CSR successor adjacency (adj, ptr), see _build_csr_into."""
+    n_gates = (len(genome) - 1) // 2
+    n_nodes = num_inputs + n_gates
+    out_degree = np.zeros(n_nodes, dtype=np.int32)
+    ptr = np.zeros(n_nodes + 1, dtype=np.int32)
+    adj = np.zeros(2 * n_gates, dtype=np.int32)
+    pos = np.zeros(n_nodes, dtype=np.int32)
+    _build_csr_into(genome, num_inputs, out_degree, ptr, adj, pos)
     return adj, ptr
 
 
 @numba.njit(cache=True)
-def _topo_order_numba(genome, num_inputs):
+def _topo_order_into(genome, num_inputs, adj, ptr, in_degree, queue, order):
     """
-    O(N) Kahn's BFS topological sort over all nodes.
-    Returns (order, order_len): order_len < n_nodes signals a cycle.
+    O(N) Kahn's BFS topological sort over all nodes into order.
+    Returns order_len: order_len < n_nodes signals a cycle.
     """
     n_gates = (len(genome) - 1) // 2
     n_nodes = num_inputs + n_gates
 
-    adj, ptr = _build_csr(genome, num_inputs)
-
-    in_degree = np.zeros(n_nodes, dtype=np.int32)
+    for i in range(num_inputs):
+        in_degree[i] = 0
     for g in range(n_gates):
-        in_degree[g + num_inputs] += 2   # each gate has exactly 2 input edges
+        in_degree[g + num_inputs] = 2   # each gate has exactly 2 input edges
 
-    queue = np.zeros(n_nodes, dtype=np.int32)
     head, tail = 0, 0
     for i in range(n_nodes):
         if in_degree[i] == 0:
             queue[tail] = i
             tail += 1
 
-    order = np.zeros(n_nodes, dtype=np.int32)
     order_len = 0
     while head < tail:
         u = queue[head]
@@ -91,21 +116,32 @@ def _topo_order_numba(genome, num_inputs):
                 queue[tail] = v
                 tail += 1
 
-    return order, order_len
+    return order_len
 
 
 @numba.njit(cache=True)
-def _computing_order_numba(genome, num_inputs, full_order, full_order_len):
+def _topo_order_numba(genome, num_inputs):
     """
-    Backward BFS from the output gate to find computing nodes,
-    then filter the full topo order to just those nodes.
-    Typically 3-10 nodes regardless of N.
+    O(N) Kahn's BFS topological sort over all nodes.
+    Returns (order, order_len): order_len < n_nodes signals a cycle.
     """
-    n_gates = (len(genome) - 1) // 2
-    n_nodes = num_inputs + n_gates
-
-    reachable = np.zeros(n_nodes, dtype=np.bool_)
+    n_nodes = num_inputs + (len(genome) - 1) // 2
+    adj, ptr = _build_csr(genome, num_inputs)
+    in_degree = np.zeros(n_nodes, dtype=np.int32)
     queue = np.zeros(n_nodes, dtype=np.int32)
+    order = np.zeros(n_nodes, dtype=np.int32)
+    order_len = _topo_order_into(genome, num_inputs, adj, ptr, in_degree, queue, order)
+    return order, order_len
+
+
+@numba.njit(cache=True)
+def _computing_order_into(genome, num_inputs, full_order, full_order_len, reachable, queue, eval_order):
+    """
+    Backward BFS from the output gate to find computing nodes, then filter
+    the full topo order to just those nodes, into eval_order. Returns
+    eval_len, typically 3-10 nodes regardless of N.
+    """
+    reachable[:] = False
     head, tail = 0, 0
 
     output = genome[-1]
@@ -124,7 +160,6 @@ def _computing_order_numba(genome, num_inputs, full_order, full_order_len):
                     queue[tail] = inp
                     tail += 1
 
-    eval_order = np.zeros(n_nodes, dtype=np.int32)
     eval_len = 0
     for i in range(full_order_len):
         node = full_order[i]
@@ -132,9 +167,38 @@ def _computing_order_numba(genome, num_inputs, full_order, full_order_len):
             eval_order[eval_len] = node
             eval_len += 1
 
+    return eval_len
+
+
+@numba.njit(cache=True)
+def _computing_order_numba(genome, num_inputs, full_order, full_order_len):
+    """
+    Backward BFS from the output gate to find computing nodes,
+    then filter the full topo order to just those nodes.
+    Typically 3-10 nodes regardless of N.
+    """
+    n_nodes = num_inputs + (len(genome) - 1) // 2
+    reachable = np.zeros(n_nodes, dtype=np.bool_)
+    queue = np.zeros(n_nodes, dtype=np.int32)
+    eval_order = np.zeros(n_nodes, dtype=np.int32)
+    eval_len = _computing_order_into(genome, num_inputs, full_order, full_order_len, reachable, queue, eval_order)
     return eval_order, eval_len
 
 
+@numba.njit(cache=True)
+def _orders_into_numba(genome, num_inputs, out_degree, ptr, adj, pos, in_degree, queue, reachable,
+                       order, eval_order):
+    """
+    Topo order and computing order of genome using only the given buffers.
+    Returns (order_len, eval_len); eval_len is 0 when the genome has a cycle.
+    """
+    _build_csr_into(genome, num_inputs, out_degree, ptr, adj, pos)
+    order_len = _topo_order_into(genome, num_inputs, adj, ptr, in_degree, queue, order)
+    if order_len < len(order):
+        return order_len, 0
+    return order_len, _computing_order_into(genome, num_inputs, order, order_len, reachable, queue, eval_order)
+
+
 @numba.njit(cache=True)
 def _evaluate_numba(genome, num_inputs, eval_order, eval_len, i1, i2):
     """Evaluate circuit output for one input pair. O(computing depth)."""
@@ -167,19 +231,228 @@ def _fitness_numba(genome, num_inputs, eval_order, eval_len, target):
     return correct / 4.0
 
 
+@numba.njit(cache=True)
+def _truth_table_into(genome, num_inputs, eval_order, eval_len, values):
+    """
+    4-bit output truth table. Each node holds its outputs for all 4 input
+    rows as a bitmask in values, so one pass over the computing nodes does
+    all rows.
+    """
+    values[0] = 0b1100   # input 1 is True in rows 10, 11
+    values[1] = 0b1010   # input 2 is True in rows 01, 11
+    for i in range(eval_len):
+        node = eval_order[i]
+        if node < num_inputs:
+            continue
+        g = node - num_inputs
+        values[node] = ~(values[genome[2 * g]] & values[genome[2 * g + 1]]) & 0xF
+    return values[genome[-1]]
+
+
+@numba.njit(cache=True)
+def _truth_table_numba(genome, num_inputs, eval_order, eval_len):
+    """4-bit output truth table, see _truth_table_into."""
+    values = np.empty(num_inputs + (len(genome) - 1) // 2, dtype=np.int64)
+    return _truth_table_into(genome, num_inputs, eval_order, eval_len, values)
+
+
+@numba.njit(cache=True)
+def _update_cone_tables(genome, num_inputs, eval_order, eval_len, old_cone, tables, gate, changed,
+                        undo_nodes, undo_vals):
+    """
+    Bring the per-node truth tables up to date on the computing subgraph
+    after a mutation of gate's inputs (gate = -1 for the output slot).
+    tables is valid on old_cone, the subgraph before the mutation; only the
+    mutated gate, nodes that joined the subgraph and nodes with an input
+    whose table changed are recomputed. Old values are logged to undo_nodes
+    / undo_vals; returns how many.
+    """
+    n_undo = 0
+    for i in range(eval_len):
+        u = eval_order[i]
+        if u < num_inputs:
+            continue
+        g = u - num_inputs
+        a = genome[2 * g]
+        b = genome[2 * g + 1]
+        if u == gate or not old_cone[u] or changed[a] or changed[b]:
+            value = ~(tables[a] & tables[b]) & 0xF
+            if value != tables[u] or not old_cone[u]:
+                undo_nodes[n_undo] = u
+                undo_vals[n_undo] = tables[u]
+                n_undo += 1
+                tables[u] = value
+                changed[u] = True
+    for k in range(n_undo):
+        changed[undo_nodes[k]] = False
+    return n_undo
+
+
+@numba.njit(cache=True)
+def _undo_tables(tables, undo_nodes, undo_vals, n_undo):
+    for k in range(n_undo):
+        tables[undo_nodes[k]] = undo_vals[k]
+
+
+@numba.njit(cache=True)
+def _leap_numba(genome, num_inputs, order, sites, values, uniforms, accept, max_steps, events):
+    """
+    Make the proposals (sites[i], values[i]), all to inputs of gates outside
+    the computing subgraph, in turn on genome, with order a topological order
+    of it. A proposal that closes a cycle is skipped, as propose() redraws
+    it; every other one is a step, applied when uniforms[i] < accept and
+    logged to events as (step, site, old, new). Stops after max_steps steps.
+    Returns (steps, proposals made, applied, order), order recomputed if an
+    applied proposal broke it.
+    """
+    n_nodes = len(order)
+    pos = np.empty(n_nodes, dtype=np.int32)
+    for i in range(n_nodes):
+        pos[order[i]] = i
+    seen = np.zeros(n_nodes, dtype=np.bool_)
+    stack = np.empty(n_nodes, dtype=np.int32)
+    visited = np.empty(n_nodes, dtype=np.int32)
+    steps, n_events, i = 0, 0, 0
+    while i < len(sites) and steps < max_steps:
+        site = sites[i]
+        v = values[i]
+        g = site // 2 + num_inputs
+        i += 1
+        # the new input closes a cycle iff g is v or an ancestor of v; all
+        # of those come after g in the topological order, so only they are
+        # searched
+        cyclic = v == g
+        if not cyclic and pos[v] > pos[g]:
+            stack[0] = v
+            visited[0] = v
+            seen[v] = True
+            top, n_seen = 1, 1
+            while top > 0 and not cyclic:
+                top -= 1
+                u = stack[top]
+                if u < num_inputs:
+                    continue
+                for k in range(2):
+                    w = genome[2 * (u - num_inputs) + k]
+                    if w == g:
+                        cyclic = True
+                    elif not seen[w] and pos[w] > pos[g]:
+                        seen[w] = True
+                        stack[top] = w
+                        top += 1
+                        visited[n_seen] = w
+                        n_seen += 1
+            for j in range(n_seen):
+                seen[visited[j]] = False
+        if cyclic:
+            continue
+        if uniforms[i - 1] < accept:
+            events[n_events, 0] = steps
+            events[n_events, 1] = site
+            events[n_events, 2] = genome[site]
+            events[n_events, 3] = v
+            n_events += 1
+            genome[site] = v
+            if pos[v] > pos[g]:
+                order, _ = _topo_order_numba(genome, num_inputs)
+                for j in range(n_nodes):
+                    pos[order[j]] = j
+        steps += 1
+    return steps, i, n_events, order
+
+
+@numba.njit(cache=True)
+def _cone_numba(genome, num_inputs, eval_order, eval_len):
+    """(depth, gates) of the output's fan-in cone: longest input-to-output path in gates, and gates in it."""
+    n_nodes = num_inputs + (len(genome) - 1) // 2
+    depth = np.zeros(n_nodes, dtype=np.int32)
+    gates = 0
+    for i in range(eval_len):
+        node = eval_order[i]
+        if node < num_inputs:
+            continue
+        g = node - num_inputs
+        depth[node] = 1 + max(depth[genome[2 * g]], depth[genome[2 * g + 1]])
+        gates += 1
+    return depth[genome[-1]], gates
+
+
+@numba.njit(cache=True)
+def _encode_genome_numba(genome, num_inputs):
+    """
+    Mixed-radix index of genome: input slots in base N+2, output slot in base
+    N. -1 for a genome whose output is wired to an input, which tables leave out.
+    """
+    n_gates = (len(genome) - 1) // 2
+    if genome[-1] < num_inputs:
+        return np.int64(-1)
+    radix = num_inputs + n_gates
+    code = np.int64(0)
+    for i in range(2 * n_gates):
+        code = code * radix + genome[i]
+    return code * n_gates + (genome[-1] - num_inputs)
+
+
 # ── one-time JIT warmup ───────────────────────────────────────────────────────
 
-def warmup():
+def warmup(verbose: bool = True):
     """
     Force Numba to compile all JIT functions before timing-sensitive code.
     Takes ~1-2s on first run; subsequent runs use disk cache (cache=True).
+
+    The cache lives in __pycache__ next to this file unless NUMBA_CACHE_DIR
+    is set (before importing fast_circuit). Point it at a shared directory
+    and call warmup() once, e.g. in the job script, to compile the kernels
+    ahead of time for every node and worker that reads that directory.
     """
     g = np.array([0, 1, 2], dtype=np.int32)
     full_order, full_len = _topo_order_numba(g, NUM_INPUTS)
     eval_order, eval_len = _computing_order_numba(g, NUM_INPUTS, full_order, full_len)
     target = np.array([False, False, False, True], dtype=np.bool_)
     _fitness_numba(g, NUM_INPUTS, eval_order, eval_len, target)
-    print("  Numba warmup complete.")
+    _evaluate_numba(g, NUM_INPUTS, eval_order, eval_len, True, True)
+    _truth_table_numba(g, NUM_INPUTS, eval_order, eval_len)
+    _cone_numba(g, NUM_INPUTS, eval_order, eval_len)
+    _encode_genome_numba(g, NUM_INPUTS)
+    if verbose:
+        print("  Numba warmup complete.")
+
+
+_THREADING_CHOSEN = False
+
+
+def _prefer_fork_safe_threading():
+    """
+    Called before the first parallel kernel launch (truth-table builds, DFE
+    batches) rather than at import, so importing fast_circuit leaves
+    numba.config alone. A process that has run a TBB parallel region hangs
+    at exit once it has forked (e.g. a ProcessPoolExecutor started after
+    build_truth_table), so prefer OpenMP unless NUMBA_THREADING_LAYER_PRIORITY
+    says otherwise. No effect once numba has picked a layer.
+    """
+    global _THREADING_CHOSEN
+    if not _THREADING_CHOSEN:
+        _THREADING_CHOSEN = True
+        if 'NUMBA_THREADING_LAYER_PRIORITY' not in os.environ:
+            numba.config.THREADING_LAYER_PRIORITY = ['omp', 'workqueue', 'tbb']
+
+
+def init_worker(goals=(), truth_tables=()):
+    """
+    Process-pool initializer: load the compiled kernels from the disk cache,
+    resolve the masks of goals and register precomputed truth tables
+    (paths, see fast_circuit.fitness_table) once per worker, so the first
+    trial in each worker doesn't pay for them.
+
+    Pass it with functools.partial, e.g. as worker_init to the parallel runners.
+    """
+    warmup(verbose=False)
+    for f in goals:
+        goal_mask(f)
+    if truth_tables:
+        from fast_circuit.fitness_table import load_truth_table
+        for path in truth_tables:
+            load_truth_table(path)
 
 
 # ── target conversion (cached per function) ───────────────────────────────────
@@ -192,6 +465,80 @@ def _target_array(f):
     return arr
 
 
+@functools.lru_cache(maxsize=16)
+def _target_mask(f):
+    arr = _target_array(f)
+    return sum(1 << i for i in range(4) if arr[i])
+
+
+# ── goals as truth-table masks ────────────────────────────────────────────────
+
+# A goal's id is its truth-table mask: a small int that pickles, hashes the
+# same in every process and can be passed into kernels. The names are those
+# of goals.GOALS, so a goal id means the same goal here and in SweepPool.
+GOAL_MASKS = {name: _target_mask(f) for name, f in GOALS.items()}
+
+# _MASK_FITNESS[tt][mask] = popcount(XNOR(tt, mask)) / 4, the fraction of rows where they agree
+_MASK_FITNESS = tuple(tuple(bin(~(tt ^ mask) & 0xF).count('1') / 4.0 for mask in range(16)) for tt in range(16))
+
+
+def register_goal(name: str, goal) -> int:
+    """Register a goal under name, given as a mask or a callable like those in goals.py. Returns its mask."""
+    mask = int(goal) if isinstance(goal, numbers.Integral) else _target_mask(goal)
+    if not 0 <= mask < 16:
+        raise ValueError(f"goal mask must be a 4-bit truth table, got {mask}")
+    GOAL_MASKS[name] = mask
+    goal_mask.cache_clear()
+    return mask
+
+
+@functools.lru_cache(maxsize=64)
+def goal_mask(goal) -> int:
+    """Truth-table mask of a goal given as a mask, a registered name or a callable."""
+    if isinstance(goal, numbers.Integral):
+        return int(goal)
+    if isinstance(goal, str):
+        try:
+            return GOAL_MASKS[goal]
+        except KeyError:
+            raise KeyError(f"unknown goal {goal!r}, register it with register_goal") from None
+    return _target_mask(goal)
+
+
+def goal_name(mask: int) -> str:
+    """Registered name of a goal mask, or its truth table as e.g. 'tt0110'."""
+    for name, m in GOAL_MASKS.items():
+        if m == mask:
+            return name
+    return f"tt{mask:04b}"
+
+
+# Precomputed truth tables keyed by genome length, see fast_circuit.fitness_table
+_TRUTH_TABLES = {}
+_TABLE_CYCLIC = 255
+
+# Active HotPathStats while a trial is instrumented, see fast_circuit.instrument
+_STATS = None
+
+# Kernel scratch buffers keyed by node count, shared by every FastCircuit of that size
+_WORKSPACES = {}
+
+
+def _workspace(n_nodes: int):
+    """
+    (order-kernel scratch tuple, truth-table values, changed flags) for circuits with n_nodes nodes. The
+    changed flags are all False between calls.
+    """
+    ws = _WORKSPACES.get(n_nodes)
+    if ws is None:
+        n_gates = n_nodes - NUM_INPUTS
+        scratch = (np.zeros(n_nodes, dtype=np.int32), np.zeros(n_nodes + 1, dtype=np.int32),
+                   np.zeros(2 * n_gates, dtype=np.int32), np.zeros(n_nodes, dtype=np.int32),
+                   np.zeros(n_nodes, dtype=np.int32), np.zeros(n_nodes, dtype=np.int32))
+        ws = _WORKSPACES[n_nodes] = (scratch, np.zeros(n_nodes, dtype=np.int64), np.zeros(n_nodes, dtype=np.bool_))
+    return ws
+
+
 # ── FastCircuit ───────────────────────────────────────────────────────────────
 
 class FastCircuit:
@@ -202,15 +549,47 @@ class FastCircuit:
     Cached per-instance:
       _full_order / _full_len  — full topo order (cycle detection)
       _eval_order / _eval_len  — computing subgraph order (evaluation)
+      _truth_table             — output truth table, -1 until evaluated
+      _cone                    — (depth, gates) of the output cone, None until asked for
+      _origin / _distance      — genome distances are measured from, and the
+                                 distance, updated by every mutation
+      last_mutation            — (site, old value, new value) of the last mutate()
+      _owned / _spare          — whether the order arrays belong to this
+                                 circuit alone (not shared by duplicate()),
+                                 and spare order arrays propose() fills
+      _node_tables / _cone_mask — truth table of every computing node and
+                                 computing-subgraph membership, kept by
+                                 propose() once it has run (None before)
+      output_neutral           — whether the last propose() left the output
+                                 truth table unchanged
+
+    propose() / commit() / rollback() mutate in place without copying: the
+    orders are rebuilt into the spare arrays with shared scratch buffers, and
+    rollback() swaps the previous ones back, so a strong-selection step
+    allocates no arrays. The output truth table is updated from the per-node
+    tables: a mutation outside the computing subgraph is output-neutral with
+    no evaluation, and inside it only the nodes whose tables change (and
+    nodes that join the subgraph) are re-evaluated.
     """
 
     __slots__ = ('genome', '_valid', '_full_order', '_full_len',
-                 '_eval_order', '_eval_len', '_fitness_cache')
+                 '_eval_order', '_eval_len', '_truth_table', '_cone', '_origin', '_distance',
+                 'last_mutation', '_owned', '_spare', '_node_tables', '_cone_mask', '_undo',
+                 'output_neutral', '_reach', '_hash')
 
     def __init__(self, genome):
         self.genome = np.asarray(genome, dtype=np.int32)
-        self._fitness_cache = {}
+        self._truth_table = -1
+        self._cone = None
+        self.last_mutation = None
+        self._spare = None
+        self._node_tables = None
+        self._cone_mask = None
+        self.output_neutral = False
+        self._reach = None
+        self._hash = _hash_numba(self.genome)
         self._recompute_topo()
+        self.set_origin()
 
     def _recompute_topo(self):
         n_nodes = NUM_INPUTS + (len(self.genome) - 1) // 2
@@ -223,27 +602,88 @@ class FastCircuit:
                 self.genome, NUM_INPUTS, full_order, full_len)
             self._eval_order = eval_order
             self._eval_len = eval_len
+            self._owned = True
         else:
             self._valid = False
             self._eval_order = np.zeros(0, dtype=np.int32)
             self._eval_len = 0
+            self._owned = False
 
     def has_cycle(self) -> bool:
         return not self._valid
 
+    def num_gates_computing(self) -> int:
+        """Nodes (inputs included) the output depends on, as Circuit.num_gates_computing."""
+        return self._eval_len
+
+    def computing_depth(self) -> int:
+        """Gates on the longest path from an input to the output."""
+        if self._cone is None:
+            self._cone = _cone_numba(self.genome, NUM_INPUTS, self._eval_order, self._eval_len)
+        return int(self._cone[0])
+
+    def cone_size(self) -> int:
+        """Gates (inputs excluded) in the output's fan-in cone."""
+        if self._cone is None:
+            self._cone = _cone_numba(self.genome, NUM_INPUTS, self._eval_order, self._eval_len)
+        return int(self._cone[1])
+
+    def set_origin(self):
+        """Measure distance_from_origin() from the current genome from now on."""
+        self._origin = self.genome.copy()
+        self._distance = 0
+
+    def distance_from_origin(self) -> int:
+        """Hamming distance from the origin genome (by default the genome this circuit was built from)."""
+        return self._distance
+
+    def genome_hash(self) -> int:
+        """64-bit Zobrist hash of the genome (fast_circuit.zobrist), kept up to date in O(1) per mutation."""
+        return int(self._hash)
+
+    def truth_table(self) -> int:
+        """4-bit output truth table (bit i = output for input row i), or _TABLE_CYCLIC for a cyclic genome."""
+        if self._truth_table < 0:
+            self._truth_table = self._evaluate_truth_table()
+        return self._truth_table
+
     def fitness(self, f) -> float:
-        if f not in self._fitness_cache:
-            if not self._valid:
-                self._fitness_cache[f] = 0.0
-            else:
-                self._fitness_cache[f] = float(_fitness_numba(
-                    self.genome, NUM_INPUTS,
-                    self._eval_order, self._eval_len,
-                    _target_array(f),
-                ))
-        return self._fitness_cache[f]
+        """Fraction of input rows where the output matches goal f (a mask, a registered name or a callable)."""
+        if _STATS is not None:
+            return self._fitness_instrumented(f)
+        tt = self._truth_table
+        if tt < 0:
+            tt = self._truth_table = self._evaluate_truth_table()
+        if tt == _TABLE_CYCLIC:
+            return 0.0
+        return _MASK_FITNESS[tt][goal_mask(f)]
+
+    def _evaluate_truth_table(self) -> int:
+        table = _TRUTH_TABLES.get(len(self.genome))
+        code = _encode_genome_numba(self.genome, NUM_INPUTS) if table is not None else -1
+        if code >= 0:
+            return int(table[code])
+        if not self._valid:
+            return _TABLE_CYCLIC
+        values = _workspace(len(self._full_order))[1]
+        return int(_truth_table_into(self.genome, NUM_INPUTS, self._eval_order, self._eval_len, values))
+
+    def _fitness_instrumented(self, f) -> float:
+        stats = _STATS
+        if self._truth_table >= 0:
+            stats.counts['cache_hits'] += 1
+        else:
+            stats.counts['cache_misses'] += 1
+            t0 = time.perf_counter()
+            self._truth_table = self._evaluate_truth_table()
+            stats.seconds['fitness'] += time.perf_counter() - t0
+        if self._truth_table == _TABLE_CYCLIC:
+            return 0.0
+        return _MASK_FITNESS[self._truth_table][goal_mask(f)]
 
     def duplicate(self):
+        if _STATS is not None:
+            t0 = time.perf_counter()
         c = object.__new__(FastCircuit)
         c.genome = self.genome.copy()
         c._valid = self._valid
@@ -251,21 +691,57 @@ class FastCircuit:
         c._full_len = self._full_len
         c._eval_order = self._eval_order
         c._eval_len = self._eval_len
-        c._fitness_cache = {}
+        c._truth_table = self._truth_table
+        c._cone = self._cone
+        c._origin = self._origin           # shared, never written
+        c._distance = self._distance
+        c._hash = self._hash
+        c.last_mutation = self.last_mutation
+        c._spare = None
+        c._owned = self._owned = False     # both now share the order arrays
+        c._node_tables = None
+        c._cone_mask = None
+        c.output_neutral = self.output_neutral
+        c._reach = self._reach.copy() if self._reach is not None else None
+        if _STATS is not None:
+            _STATS.counts['duplicates'] += 1
+            _STATS.seconds['duplicate'] += time.perf_counter() - t0
         return c
 
+    def _draw(self):
+        """(slot, value) of a proposal: uniform, or exactly acyclic with track_reachability()."""
+        if self._reach is not None:
+            return self._reach.draw(random.randrange, random.random)
+        idx = random.randrange(len(self.genome))
+        if idx == len(self.genome) - 1:
+            return idx, random.randrange((len(self.genome) - 1) // 2) + NUM_INPUTS
+        return idx, random.randrange(NUM_INPUTS + (len(self.genome) - 1) // 2)
+
+    def track_reachability(self):
+        """
+        Keep a descendant-bitset index (fast_circuit.reachability) so that mutate() and propose() draw from the
+        acyclic mutations directly, with the distribution of their retry loop, instead of rejecting cyclic ones.
+        The index follows mutate() and commit(); a proposal that is rolled back never touches it.
+        """
+        if not self._valid:
+            raise ValueError("a cyclic genome has no reachability index")
+        self._reach = ReachabilityIndex(self.genome, self._full_order, NUM_INPUTS)
+
+    @property
+    def reachability(self):
+        """The ReachabilityIndex kept since track_reachability(), or None."""
+        return self._reach
+
     def mutate(self):
         """In-place point mutation with cycle rejection. Retries until acyclic."""
+        if _STATS is not None:
+            return self._mutate_instrumented()
         n_gates = (len(self.genome) - 1) // 2
         n_all = NUM_INPUTS + n_gates
         n_nodes = n_all
 
         while True:
-            idx = random.randrange(len(self.genome))
-            if idx == len(self.genome) - 1:
-                new_val = random.randrange(n_gates) + NUM_INPUTS
-            else:
-                new_val = random.randrange(n_all)
+            idx, new_val = self._draw()
 
             old_val = int(self.genome[idx])
             self.genome[idx] = new_val
@@ -279,10 +755,284 @@ class FastCircuit:
                     self.genome, NUM_INPUTS, full_order, full_len)
                 self._eval_order = eval_order
                 self._eval_len = eval_len
-                self._fitness_cache = {}
+                self._owned = True
+                self._truth_table = -1
+                self._node_tables = None
+                self._cone_mask = None
+                self._cone = None
+                origin = int(self._origin[idx])
+                self._distance += (new_val != origin) - (old_val != origin)
+                self._hash ^= _delta_numba(idx, old_val, new_val)
+                if self._reach is not None and idx < len(self.genome) - 1:
+                    self._reach.update(self.genome, full_order, old_val, new_val)
+                self.last_mutation = (idx, old_val, new_val)
                 return
 
             self.genome[idx] = old_val   # undo cyclic mutation
 
+    def _mutate_instrumented(self):
+        """mutate() with proposal counts and per-kernel timing; same RNG draws."""
+        stats = _STATS
+        t_start = time.perf_counter()
+        n_gates = (len(self.genome) - 1) // 2
+        n_all = NUM_INPUTS + n_gates
+        n_nodes = n_all
+
+        while True:
+            idx, new_val = self._draw()
+            stats.counts['proposals'] += 1
+
+            old_val = int(self.genome[idx])
+            self.genome[idx] = new_val
+
+            t0 = time.perf_counter()
+            full_order, full_len = _topo_order_numba(self.genome, NUM_INPUTS)
+            stats.seconds['topo'] += time.perf_counter() - t0
+            if full_len == n_nodes:
+                self._valid = True
+                self._full_order = full_order
+                self._full_len = full_len
+                t0 = time.perf_counter()
+                eval_order, eval_len = _computing_order_numba(
+                    self.genome, NUM_INPUTS, full_order, full_len)
+                stats.seconds['computing'] += time.perf_counter() - t0
+                self._eval_order = eval_order
+                self._eval_len = eval_len
+                self._owned = True
+                self._truth_table = -1
+                self._node_tables = None
+                self._cone_mask = None
+                self._cone = None
+                origin = int(self._origin[idx])
+                self._distance += (new_val != origin) - (old_val != origin)
+                self._hash ^= _delta_numba(idx, old_val, new_val)
+                if self._reach is not None and idx < len(self.genome) - 1:
+                    self._reach.update(self.genome, full_order, old_val, new_val)
+                self.last_mutation = (idx, old_val, new_val)
+                stats.seconds['mutate'] += time.perf_counter() - t_start
+                return
+
+            self.genome[idx] = old_val   # undo cyclic mutation
+            stats.counts['cyclic_rejections'] += 1
+
+    def _init_cone_tables(self):
+        n_nodes = len(self._full_order)
+        mask = np.zeros(n_nodes, dtype=np.bool_)
+        mask[self._eval_order[:self._eval_len]] = True
+        tables = np.zeros(n_nodes, dtype=np.int64)
+        self._truth_table = int(_truth_table_into(self.genome, NUM_INPUTS, self._eval_order, self._eval_len,
+                                                  tables))
+        self._node_tables = tables
+        self._cone_mask = mask
+        self._undo = (np.empty(n_nodes, dtype=np.int32), np.empty(n_nodes, dtype=np.int64))
+
+    def propose(self):
+        """
+        Apply a random point mutation in place, drawing exactly as mutate() does, and return an undo token.
+        Evaluate it with fitness(), then pass the token to commit() to keep it or rollback() to undo it.
+        """
+        if _STATS is not None:
+            t_start = time.perf_counter()
+        while True:
+            idx, new_val = self._draw()
+            token = self._propose_at(idx, new_val)
+            if token is not None:
+                break
+        if _STATS is not None:
+            _STATS.seconds['mutate'] += time.perf_counter() - t_start
+        return token
+
+    def computing_sites(self) -> int:
+        """Genome slots whose mutation can change the output: the output slot and both inputs of each computing gate."""
+        return 2 * int(np.count_nonzero(self._eval_order[:self._eval_len] >= NUM_INPUTS)) + 1
+
+    def propose_computing(self):
+        """
+        One proposal as propose() draws it, given that it lands on one of the computing_sites(). Returns its undo
+        token, or None, changing nothing, if it closes a cycle (propose() would draw again).
+        """
+        if _STATS is not None:
+            t_start = time.perf_counter()
+        n_gates = (len(self.genome) - 1) // 2
+        site = random.randrange(self.computing_sites())
+        if site == 0:
+            idx = len(self.genome) - 1
+            new_val = random.randrange(n_gates) + NUM_INPUTS
+        else:
+            gates = self._eval_order[:self._eval_len]
+            gate = int(gates[gates >= NUM_INPUTS][(site - 1) // 2])
+            idx = 2 * (gate - NUM_INPUTS) + (site - 1) % 2
+            new_val = random.randrange(NUM_INPUTS + n_gates)
+        token = self._propose_at(idx, new_val)
+        if _STATS is not None:
+            _STATS.seconds['mutate'] += time.perf_counter() - t_start
+        return token
+
+    def leap(self, n_proposals: int, max_steps: int, accept: float = 1.0):
+        """
+        Make n_proposals proposals in bulk, drawn as propose() draws them given that they land outside the
+        computing_sites(), so none can change the output. Those that close a cycle are dropped; each other one
+        is a step (at most max_steps) whose mutation is applied with probability accept. The genome must be
+        acyclic.
+
+        :return: (steps, proposals made, events), events holding a (step offset, site, old, new, distance from
+            origin) row per applied mutation
+        """
+        if _STATS is not None:
+            t_start = time.perf_counter()
+        n_all = NUM_INPUTS + (len(self.genome) - 1) // 2
+        if self._cone_mask is None:
+            self._cone_mask = np.zeros(n_all, dtype=np.bool_)
+            self._cone_mask[self._eval_order[:self._eval_len]] = True
+        outside = np.flatnonzero(~self._cone_mask[NUM_INPUTS:])
+        if not len(outside):
+            n_proposals = 0
+        sites = 2 * outside[np.random.randint(max(len(outside), 1), size=n_proposals)] + np.random.randint(
+            2, size=n_proposals)
+        values = np.random.randint(n_all, size=n_proposals)
+        uniforms = np.random.random(n_proposals) if accept < 1 else np.zeros(n_proposals)
+        events = np.empty((min(n_proposals, max_steps), 5), dtype=np.int64)
+        steps, made, n_events, order = _leap_numba(self.genome, NUM_INPUTS, self._full_order, sites, values,
+                                                    uniforms, accept, max_steps, events[:, :4])
+        events = events[:n_events]
+        if n_events:
+            self._full_order = order
+            origin = self._origin[events[:, 1]]
+            events[:, 4] = self._distance + np.cumsum((events[:, 3] != origin).astype(np.int64)
+                                                      - (events[:, 2] != origin))
+            self._distance = int(events[-1, 4])
+            self._hash = int(_trail_numba(np.uint64(self._hash), events[:, 1], events[:, 2], events[:, 3])[-1])
+            self.last_mutation = tuple(int(v) for v in events[-1, 1:4])
+            if self._reach is not None:
+                self._reach.rebuild(self.genome, order)
+        if _STATS is not None:
+            _STATS.counts['proposals'] += made
+            _STATS.counts['cyclic_rejections'] += made - steps
+            _STATS.counts['leaped_steps'] += steps
+            _STATS.seconds['mutate'] += time.perf_counter() - t_start
+        return steps, made, events
+
+    def _orders_instrumented(self, scratch, mask, order, eval_order, t0):
+        """_orders_into_numba as its two kernels, timed as the topo and computing phases."""
+        out_degree, ptr, adj, pos, in_degree, queue = scratch
+        _build_csr_into(self.genome, NUM_INPUTS, out_degree, ptr, adj, pos)
+        full_len = _topo_order_into(self.genome, NUM_INPUTS, adj, ptr, in_degree, queue, order)
+        t1 = time.perf_counter()
+        _STATS.seconds['topo'] += t1 - t0
+        if full_len < len(order):
+            return full_len, 0
+        eval_len = _computing_order_into(self.genome, NUM_INPUTS, order, full_len, mask, queue, eval_order)
+        _STATS.seconds['computing'] += time.perf_counter() - t1
+        return full_len, eval_len
+
+    def _propose_at(self, idx, new_val):
+        """Set genome[idx] = new_val in place and return the undo token, or undo it and return None if cyclic."""
+        n_all = NUM_INPUTS + (len(self.genome) - 1) // 2
+        scratch, values, changed = _workspace(n_all)
+        spare = self._spare
+        if spare is None:
+            spare = self._spare = (np.empty(n_all, dtype=np.int32), np.empty(n_all, dtype=np.int32),
+                                   np.empty(n_all, dtype=np.bool_))
+        order, eval_order, mask = spare
+        lookup = _TRUTH_TABLES.get(len(self.genome))
+        if lookup is not None:
+            if self._truth_table < 0:
+                self._truth_table = self._evaluate_truth_table()   # to tell output-neutral proposals
+        elif self._node_tables is None and self._valid:
+            if _STATS is not None:
+                t0 = time.perf_counter()
+            self._init_cone_tables()
+            if _STATS is not None:
+                _STATS.seconds['cone'] += time.perf_counter() - t0
+        tables = self._node_tables
+        if _STATS is not None:
+            _STATS.counts['proposals'] += 1
+            t0 = time.perf_counter()
+
+        old_val = int(self.genome[idx])
+        self.genome[idx] = new_val
+        looked_up = -1
+        code = _encode_genome_numba(self.genome, NUM_INPUTS) if lookup is not None else -1
+        if code >= 0:
+            # a precomputed table (fast_circuit.fitness_table) gives the new truth table, and cycles, in one read
+            looked_up = int(lookup[code])
+            if looked_up == _TABLE_CYCLIC:
+                self.genome[idx] = old_val
+                if _STATS is not None:
+                    _STATS.counts['cyclic_rejections'] += 1
+                return None
+        if _STATS is None:
+            full_len, eval_len = _orders_into_numba(self.genome, NUM_INPUTS, *scratch, mask, order, eval_order)
+        else:
+            full_len, eval_len = self._orders_instrumented(scratch, mask, order, eval_order, t0)
+        if full_len < n_all:
+            self.genome[idx] = old_val   # undo cyclic mutation
+            if _STATS is not None:
+                _STATS.counts['cyclic_rejections'] += 1
+            return None
+
+        n_undo = 0
+        if tables is not None:
+            old_mask = self._cone_mask
+            gate = idx // 2 + NUM_INPUTS if idx < len(self.genome) - 1 else -1
+            if gate < 0 or old_mask[gate]:
+                if _STATS is not None:
+                    t0 = time.perf_counter()
+                n_undo = _update_cone_tables(self.genome, NUM_INPUTS, eval_order, eval_len, old_mask, tables, gate,
+                                             changed, *self._undo)
+                if _STATS is not None:
+                    _STATS.counts['cone_evaluations'] += 1
+                    _STATS.seconds['cone'] += time.perf_counter() - t0
+            elif _STATS is not None:
+                _STATS.counts['cone_skips'] += 1   # the gate doesn't feed the output, which is unchanged
+        elif lookup is not None and _STATS is not None:
+            _STATS.counts['table_lookups' if looked_up >= 0 else 'cone_evaluations'] += 1
+        token = (idx, old_val, self._valid, self._full_order, self._full_len, self._eval_order, self._eval_len,
+                 self._owned, self._truth_table, self._cone, self._distance, self.last_mutation,
+                 self._cone_mask, n_undo, self._hash)
+        self._valid = True
+        self._full_order = order
+        self._full_len = full_len
+        self._eval_order = eval_order
+        self._eval_len = eval_len
+        self._cone_mask = mask
+        self._owned = True
+        self._spare = None
+        self._cone = None
+        if tables is not None or lookup is not None:
+            if tables is not None:
+                tt = int(tables[self.genome[-1]])
+            elif looked_up >= 0:
+                tt = looked_up
+            else:   # output wired to an input, not in the table
+                tt = int(_truth_table_into(self.genome, NUM_INPUTS, eval_order, eval_len, values))
+            self.output_neutral = tt == self._truth_table
+            self._truth_table = tt
+        else:
+            self.output_neutral = False
+            self._truth_table = -1
+        origin = int(self._origin[idx])
+        self._distance += (new_val != origin) - (old_val != origin)
+        self._hash ^= _delta_numba(idx, old_val, new_val)
+        self.last_mutation = (idx, old_val, new_val)
+        return token
+
+    def commit(self, token):
+        """Keep the mutation proposed with token; the previous orders become the spare arrays if they were ours."""
+        if token[7] and token[12] is not None:
+            self._spare = (token[3], token[5], token[12])
+        if self._reach is not None and token[0] < len(self.genome) - 1:
+            self._reach.update(self.genome, self._full_order, token[1], int(self.genome[token[0]]))
+
+    def rollback(self, token):
+        """Undo the mutation proposed with token, restoring the genome and everything cached for it."""
+        self._spare = (self._full_order, self._eval_order, self._cone_mask) if self._owned else None
+        (idx, old_val, self._valid, self._full_order, self._full_len, self._eval_order, self._eval_len,
+         self._owned, self._truth_table, self._cone, self._distance, self.last_mutation,
+         self._cone_mask, n_undo, self._hash) = token
+        self.genome[idx] = old_val
+        if n_undo:
+            _undo_tables(self._node_tables, *self._undo, n_undo)
+
     def __repr__(self):
         return f'FastCircuit({self.genome.tolist()})'
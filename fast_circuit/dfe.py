@@ -0,0 +1,208 @@
+"""
+Distribution of fitness effects (DFE) of single mutations along a trajectory.
+
+The strong-selection model only tallies the mutations it accepts. To see
+the effects a lineage is offered, take genomes snapshotted along a run (or a
+recorded genome log) and score every single mutation of each one: every
+acyclic genome one point mutation away, each counted once.
+
+FastCircuit.mutate does not draw these uniformly. It picks a slot uniformly,
+then a value uniformly from the slot's range: N gates for the output slot,
+N + 2 nodes for a gate input. It redraws cyclic proposals, and it accepts
+the no-op that redraws a slot's current value. The kernel therefore counts
+output-slot and input-slot mutants apart. dfe_probabilities() and
+dfe_histograms(samples=...) weight them as mutate() does, no-ops included;
+dfe_histograms() without samples is the uniform-over-neighbours DFE.
+
+For each snapshot the kernel evaluates every node's truth table once. A
+mutation of gate g's input only changes g and its descendants, and g can
+only take one of 16 truth tables, so each slot needs at most 16
+propagations through the descendants of g; mutations outside the output's
+cone are neutral without evaluation. The kernel counts mutants by output
+truth table, which answers every goal at once, and runs in parallel over
+snapshots.
+"""
+import numpy as np
+import numba
+
+from fast_circuit.circuit import (NUM_INPUTS, _TABLE_CYCLIC, _MASK_FITNESS, _build_csr, _topo_order_numba,
+                                  _prefer_fork_safe_threading, goal_mask)
+
+# fitness effect of histogram bin i (a mutation changes 0-4 correct rows)
+DFE_EFFECTS = np.arange(-4, 5) / 4
+
+
+# ── Numba-compiled functions ──────────────────────────────────────────────────
+
+@numba.njit(cache=True)
+def _mutant_table_counts_numba(genome, num_inputs, counts):
+    """
+    Add to counts[0, t] (output slot) and counts[1, t] (gate inputs) the
+    number of single mutations of genome whose mutant has output truth table
+    t, no-ops excluded. Returns the genome's own table, or CYCLIC (and counts
+    nothing) for a cyclic genome.
+    """
+    n_gates = (len(genome) - 1) // 2
+    n_nodes = num_inputs + n_gates
+    order, order_len = _topo_order_numba(genome, num_inputs)
+    if order_len < n_nodes:
+        return _TABLE_CYCLIC
+    pos = np.empty(n_nodes, dtype=np.int32)
+    values = np.empty(n_nodes, dtype=np.int64)
+    values[0] = 0b1100   # input 1 is True in rows 10, 11
+    values[1] = 0b1010   # input 2 is True in rows 01, 11
+    for i in range(n_nodes):
+        node = order[i]
+        pos[node] = i
+        if node >= num_inputs:
+            g = node - num_inputs
+            values[node] = ~(values[genome[2 * g]] & values[genome[2 * g + 1]]) & 0xF
+    output = genome[-1]
+    base = values[output]
+
+    # output slot: any other gate
+    for v in range(num_inputs, n_nodes):
+        if v != output:
+            counts[0, values[v]] += 1
+
+    adj, ptr = _build_csr(genome, num_inputs)
+    desc = np.zeros(n_nodes, dtype=np.bool_)
+    queue = np.empty(n_nodes, dtype=np.int32)
+    tmp = np.empty(n_nodes, dtype=np.int64)
+    cache = np.empty(16, dtype=np.int64)
+    for g in range(n_gates):
+        node = g + num_inputs
+        # node and its descendants: feeding any of them into g closes a cycle
+        desc[:] = False
+        desc[node] = True
+        queue[0] = node
+        head, tail = 0, 1
+        while head < tail:
+            u = queue[head]
+            head += 1
+            for j in range(ptr[u], ptr[u + 1]):
+                w = adj[j]
+                if not desc[w]:
+                    desc[w] = True
+                    queue[tail] = w
+                    tail += 1
+        n_acyclic = n_nodes - tail
+        for k in range(2):
+            old = genome[2 * g + k]
+            other = genome[2 * g + 1 - k]
+            if not desc[output]:
+                counts[1, base] += n_acyclic - 1
+                continue
+            cache[:] = -1
+            for v in range(n_nodes):
+                if desc[v] or v == old:
+                    continue
+                new = ~(values[v] & values[other]) & 0xF
+                if cache[new] < 0:
+                    tmp[:] = values
+                    tmp[node] = new
+                    for i in range(pos[node] + 1, n_nodes):
+                        u = order[i]
+                        if desc[u]:
+                            gu = u - num_inputs
+                            tmp[u] = ~(tmp[genome[2 * gu]] & tmp[genome[2 * gu + 1]]) & 0xF
+                    cache[new] = tmp[output]
+                counts[1, cache[new]] += 1
+    return base
+
+
+@numba.njit(cache=True, parallel=True)
+def _mutant_table_counts_batch_numba(genomes, num_inputs, counts, bases):
+    for s in numba.prange(genomes.shape[0]):
+        bases[s] = _mutant_table_counts_numba(genomes[s], num_inputs, counts[s])
+
+
+# ── Python API ────────────────────────────────────────────────────────────────
+
+def _genome_array(snapshots) -> np.ndarray:
+    if isinstance(snapshots, np.ndarray) and snapshots.ndim == 2:
+        return np.ascontiguousarray(snapshots, dtype=np.int32)
+    return np.array([np.asarray(getattr(s, 'genome', s)) for s in snapshots], dtype=np.int32)
+
+
+def _slot_counts(snapshots):
+    """(genomes, counts, tables): counts[s, 0] output-slot and counts[s, 1] gate-input mutants of snapshot s."""
+    genomes = _genome_array(snapshots)
+    counts = np.zeros((len(genomes), 2, 16), dtype=np.int64)
+    tables = np.empty(len(genomes), dtype=np.int64)
+    if len(genomes):
+        _prefer_fork_safe_threading()
+        _mutant_table_counts_batch_numba(genomes, NUM_INPUTS, counts, tables)
+    return genomes, counts, tables
+
+
+def mutant_table_counts(snapshots):
+    """
+    Count the distinct single mutants of each snapshot by output truth table.
+
+    :param snapshots: FastCircuits, Circuits or genomes of one length, or a (snapshots, L) array such as a genome log
+    :return: (counts, tables): counts[s, t] mutations of snapshot s give truth table t; tables[s] is the
+        snapshot's own truth table (CYCLIC, with no counts, for a cyclic genome)
+    """
+    _, counts, tables = _slot_counts(snapshots)
+    return counts.sum(axis=1), tables
+
+
+def mutant_table_probabilities(snapshots):
+    """
+    Probability that mutate() turns each snapshot into a circuit with output truth table t, no-ops (which keep
+    the snapshot's own table) included.
+
+    :param snapshots: as for mutant_table_counts
+    :return: (probabilities, tables): probabilities[s, t] for snapshot s and truth table t, an (S, 16) array
+        whose rows for cyclic snapshots are zero; tables[s] is the snapshot's own truth table
+    """
+    genomes, counts, tables = _slot_counts(snapshots)
+    if not len(genomes):
+        return np.zeros((0, 16)), tables
+    n_gates = (genomes.shape[1] - 1) // 2
+    n_nodes = NUM_INPUTS + n_gates
+    # mutate picks one of 2N + 1 slots, then a value: 1 of N for the output, 1 of N + 2 for a gate input
+    weights = counts[:, 0] / n_gates + counts[:, 1] / n_nodes
+    for s, base in enumerate(tables):
+        if base != _TABLE_CYCLIC:
+            weights[s, base] += 1 / n_gates + 2 * n_gates / n_nodes   # each slot's no-op
+    totals = weights.sum(axis=1, keepdims=True)
+    return np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0), tables
+
+
+def _effect_rows(rows, tables, goal):
+    correct = (np.array(_MASK_FITNESS)[:, goal_mask(goal)] * 4).astype(np.int64)
+    hist = np.zeros((len(rows), len(DFE_EFFECTS)), dtype=rows.dtype)
+    for s, base in enumerate(tables):
+        if base != _TABLE_CYCLIC:
+            np.add.at(hist[s], correct - correct[base] + 4, rows[s])
+    return hist
+
+
+def dfe_probabilities(snapshots, goal) -> np.ndarray:
+    """
+    DFE of each snapshot under goal for one mutation drawn as mutate() draws it: row s holds the probability of
+    each fitness effect, bin i holding effect DFE_EFFECTS[i]. The no-op mass sits in the neutral bin.
+    """
+    probabilities, tables = mutant_table_probabilities(snapshots)
+    return _effect_rows(probabilities, tables, goal)
+
+
+def dfe_histograms(snapshots, goal, samples: int = None, rng=None) -> np.ndarray:
+    """
+    DFE of each snapshot under goal. Without samples, row s counts the distinct single mutants of snapshot s
+    (uniform over neighbours, no-ops excluded) by fitness effect, bin i holding effect DFE_EFFECTS[i] (-1 to 1 in
+    steps of 1/4).
+
+    :param goal: mask, registered name or callable
+    :param samples: instead, count this many mutations drawn independently as mutate() draws them (a
+        multinomial over dfe_probabilities, so no-ops land in the neutral bin)
+    :param rng: np.random.Generator or seed for samples
+    """
+    if samples is not None:
+        rng = np.random.default_rng(rng)
+        return np.array([rng.multinomial(samples, row) if row.sum() else np.zeros(len(row), dtype=np.int64)
+                         for row in dfe_probabilities(snapshots, goal)])
+    counts, tables = mutant_table_counts(snapshots)
+    return _effect_rows(counts, tables, goal)
@@ -0,0 +1,208 @@
+"""
+Symmetry-reduced enumeration of acyclic genomes for small circuits.
+
+A genome with N gates has (N+2)^(2N) * N labelings, but fitness only depends
+on the computing subgraph (the gates the output can reach) up to:
+  - relabeling of gate indices (any permutation keeps a DAG acyclic),
+  - swapping the two inputs of a NAND,
+  - rewiring of non-computing gates, which never reach the output.
+
+Each orbit is represented by one canonical genome: its k computing gates are
+numbered 2..k+1 in topological order with the output last, and every
+non-computing gate is wired to (0, 1). The orbit size counts every acyclic
+genome with an isomorphic computing subgraph, so summing orbit sizes over all
+representatives gives the number of acyclic genomes.
+
+Structure counts grow much slower than genome counts, against
+(N+2)^(2N+1) for naive enumeration. Measured on one core of a Xeon server
+under Python 3.11, enumerate_canonical yields 202,050 representatives for
+N=7 in 24-35s and 2,441,673 for N=8 in about 6 min.
+
+Orbits are fitness classes, not dynamical states — two members of the same
+orbit can have different mutation neighbourhoods.
+
+Key functions:
+  computing_structures  — unlabeled computing subgraphs with k gates
+  enumerate_canonical   — (genome, orbit_size) pairs for N gates
+  fitness_distribution  — exact count of acyclic genomes per fitness value
+"""
+import functools
+import itertools
+import math
+from collections import Counter
+
+import numpy as np
+
+from fast_circuit.circuit import NUM_INPUTS, FastCircuit
+
+
+# ── counting ──────────────────────────────────────────────────────────────────
+
+@functools.lru_cache(maxsize=None)
+def count_acyclic_completions(m: int, e: int) -> int:
+    """
+    Number of ways to wire m gates whose two ordered inputs are drawn from
+    e fixed nodes plus the m gates themselves, such that no cycle forms.
+
+    Inclusion-exclusion over the set of gates with only fixed inputs
+    (Robinson's recurrence for labeled DAGs).
+    """
+    if m == 0:
+        return 1
+    total = 0
+    for j in range(1, m + 1):
+        term = math.comb(m, j) * e ** (2 * j) * count_acyclic_completions(m - j, e + j)
+        total += term if j % 2 == 1 else -term
+    return total
+
+
+def count_acyclic_genomes(n_gates: int) -> int:
+    """Number of acyclic genomes with n_gates gates (output must be a gate)."""
+    return n_gates * count_acyclic_completions(n_gates, NUM_INPUTS)
+
+
+# ── canonical forms ───────────────────────────────────────────────────────────
+
+# Interned bottom-up node types, shared across structures so that type ids give
+# a consistent total order. Inputs 0 and 1 are fixed points, never permuted.
+_TYPE_IDS = {}
+
+
+def _node_types(pairs):
+    types = list(range(NUM_INPUTS))
+    for a, b in pairs:
+        key = (min(types[a], types[b]), max(types[a], types[b]))
+        if key not in _TYPE_IDS:
+            _TYPE_IDS[key] = len(_TYPE_IDS) + NUM_INPUTS
+        types.append(_TYPE_IDS[key])
+    return types
+
+
+def _canonical_form(pairs):
+    """
+    Return (key, n_automorphisms) for a topologically ordered tuple of
+    (a, b) input pairs, a <= b. Isomorphic structures share the same key.
+
+    Nodes are split into classes by bottom-up type, refined by parent colours,
+    and the smallest encoding over all within-class orderings is the key.
+    Automorphisms preserve colours, so the number of orderings that reach
+    the minimum is the size of the automorphism group.
+    """
+    n_gates = len(pairs)
+    colors = _node_types(pairs)
+    parents = [[] for _ in range(NUM_INPUTS + n_gates)]
+    for g, (a, b) in enumerate(pairs):
+        parents[a].append(g + NUM_INPUTS)
+        parents[b].append(g + NUM_INPUTS)
+
+    n_classes = len(set(colors))
+    while True:
+        signatures = [(colors[v], tuple(sorted(colors[p] for p in parents[v])))
+                      for v in range(len(colors))]
+        ranks = {s: i for i, s in enumerate(sorted(set(signatures)))}
+        colors = [ranks[s] for s in signatures]
+        if len(ranks) == n_classes:
+            break
+        n_classes = len(ranks)
+
+    classes = {}
+    for g in range(NUM_INPUTS, NUM_INPUTS + n_gates):
+        classes.setdefault(colors[g], []).append(g)
+    ordered = [classes[c] for c in sorted(classes)]
+
+    best, n_best = None, 0
+    for perm in itertools.product(*(itertools.permutations(c) for c in ordered)):
+        label = list(range(NUM_INPUTS + n_gates))
+        pos = NUM_INPUTS
+        for group in perm:
+            for g in group:
+                label[g] = pos
+                pos += 1
+        enc = [None] * n_gates
+        for g, (a, b) in enumerate(pairs):
+            la, lb = label[a], label[b]
+            enc[label[g + NUM_INPUTS] - NUM_INPUTS] = (la, lb) if la <= lb else (lb, la)
+        enc = tuple(enc)
+        if best is None or enc < best:
+            best, n_best = enc, 1
+        elif enc == best:
+            n_best += 1
+    return best, n_best
+
+
+def _n_sinks(pairs):
+    used = set()
+    for a, b in pairs:
+        used.add(a)
+        used.add(b)
+    return sum(1 for g in range(len(pairs)) if g + NUM_INPUTS not in used)
+
+
+@functools.lru_cache(maxsize=None)
+def computing_structures(k: int):
+    """
+    All computing subgraphs with k gates, up to isomorphism.
+
+    Returns a tuple of (pairs, n_automorphisms) where pairs[i] are the sorted
+    inputs of gate i + 2, gates are in topological order and the last gate
+    is the output (the unique gate nothing else reads from).
+
+    Built one gate at a time, deduplicating isomorphic prefixes. A prefix
+    with s sinks needs at least s - 1 more gates to merge into one output,
+    which prunes most prefixes near the end.
+    """
+    level = {(): ()}
+    for j in range(k):
+        nxt = {}
+        n_nodes = NUM_INPUTS + j
+        for pairs in level.values():
+            for a in range(n_nodes):
+                for b in range(a, n_nodes):
+                    new = pairs + ((a, b),)
+                    if _n_sinks(new) > k - j:
+                        continue
+                    key, _ = _canonical_form(new)
+                    if key not in nxt:
+                        nxt[key] = new
+        level = nxt
+    return tuple((pairs, _canonical_form(pairs)[1])
+                 for pairs in level.values() if _n_sinks(pairs) == 1)
+
+
+# ── enumeration ───────────────────────────────────────────────────────────────
+
+def enumerate_canonical(n_gates: int, genomes: bool = True):
+    """
+    Yield (genome, orbit_size) for every fitness-equivalence class of acyclic
+    genomes with n_gates gates. Orbit sizes sum to count_acyclic_genomes.
+
+    :param n_gates: number of NAND gates N
+    :param genomes: if False, yield (pairs, orbit_size) without building arrays
+    """
+    for k in range(1, n_gates + 1):
+        labelings = math.perm(n_gates, k)
+        completions = count_acyclic_completions(n_gates - k, k + NUM_INPUTS)
+        for pairs, n_aut in computing_structures(k):
+            n_ordered = 2 ** sum(1 for a, b in pairs if a != b)
+            orbit = labelings * n_ordered // n_aut * completions
+            if not genomes:
+                yield pairs, orbit
+                continue
+            genome = np.zeros(2 * n_gates + 1, dtype=np.int32)
+            for g in range(n_gates):
+                a, b = pairs[g] if g < k else (0, 1)
+                genome[2 * g] = a
+                genome[2 * g + 1] = b
+            genome[-1] = k - 1 + NUM_INPUTS
+            yield genome, orbit
+
+
+def fitness_distribution(f, n_gates: int) -> Counter:
+    """
+    Exact number of acyclic genomes with n_gates gates at each fitness value
+    against target function f.
+    """
+    counts = Counter()
+    for genome, orbit in enumerate_canonical(n_gates):
+        counts[FastCircuit(genome).fitness(f)] += orbit
+    return counts
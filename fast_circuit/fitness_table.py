@@ -0,0 +1,162 @@
+"""
+Precomputed output truth tables for every genome of a small size.
+
+A genome with N gates is a mixed-radix integer: the 2N input slots are digits
+in base N+2 (most significant first) and the output slot is a digit in base N
+(offset by the two inputs; genomes whose output is wired straight to an
+input are left out and evaluated). For each code the table stores the circuit's
+4-bit output truth table (bit i = output for input row i, rows ordered
+00, 01, 10, 11, as FastCircuit.truth_table), or CYCLIC for genomes with a loop.
+
+The table is one uint8 per genome stored as a .npy file and opened with
+mmap_mode='r', so worker processes share it through the page cache:
+
+  N   genomes           size on disk
+  3   46,875            46 KB
+  4   6,718,464         6.7 MB
+  5   1,412,376,245     1.4 GB
+
+Once registered, FastCircuit.fitness answers any goal for that genome
+length with a single lookup instead of evaluating the circuit, and
+FastCircuit.propose reads the mutant's truth table from it, rejecting
+cyclic mutants before sorting, instead of updating per-node truth tables.
+"""
+import numpy as np
+import numba
+
+from fast_circuit import circuit
+from fast_circuit.circuit import NUM_INPUTS, _TABLE_CYCLIC, _encode_genome_numba, _prefer_fork_safe_threading
+
+CYCLIC = _TABLE_CYCLIC
+
+_BLOCK = 4096
+
+
+# ── Numba-compiled functions ──────────────────────────────────────────────────
+
+@numba.njit(cache=True)
+def _decode_genome_numba(code, n_gates, num_inputs, genome):
+    radix = num_inputs + n_gates
+    genome[-1] = code % n_gates + num_inputs
+    code //= n_gates
+    for i in range(2 * n_gates - 1, -1, -1):
+        genome[i] = code % radix
+        code //= radix
+
+
+@numba.njit(cache=True)
+def _genome_truth_table_numba(genome, num_inputs, values, done):
+    """
+    4-bit output truth table of genome, or CYCLIC. Evaluates all 4 input rows
+    at once as bitmasks and repeats passes over the gates until no gate can be
+    resolved — fine for the handful of gates tables are built for.
+    """
+    n_gates = (len(genome) - 1) // 2
+    values[0] = 0b1100   # input 1 is True in rows 10, 11
+    values[1] = 0b1010   # input 2 is True in rows 01, 11
+    done[0] = True
+    done[1] = True
+    for g in range(n_gates):
+        done[g + num_inputs] = False
+    remaining = n_gates
+    progress = True
+    while remaining > 0 and progress:
+        progress = False
+        for g in range(n_gates):
+            node = g + num_inputs
+            if done[node]:
+                continue
+            a = genome[2 * g]
+            b = genome[2 * g + 1]
+            if done[a] and done[b]:
+                values[node] = ~(values[a] & values[b]) & 0xF
+                done[node] = True
+                remaining -= 1
+                progress = True
+    if remaining > 0:
+        return CYCLIC
+    return values[genome[-1]]
+
+
+@numba.njit(cache=True, parallel=True)
+def _truth_table_block_numba(n_gates, num_inputs, start, out):
+    """Fill out[i] with the truth table of genome code start + i."""
+    n_blocks = (len(out) + _BLOCK - 1) // _BLOCK
+    for blk in numba.prange(n_blocks):
+        genome = np.empty(2 * n_gates + 1, dtype=np.int32)
+        values = np.empty(num_inputs + n_gates, dtype=np.int64)
+        done = np.empty(num_inputs + n_gates, dtype=np.bool_)
+        lo = blk * _BLOCK
+        hi = min(lo + _BLOCK, len(out))
+        _decode_genome_numba(start + lo, n_gates, num_inputs, genome)
+        for i in range(lo, hi):
+            out[i] = _genome_truth_table_numba(genome, num_inputs, values, done)
+            # odometer increment: output digit is least significant
+            genome[-1] += 1
+            if genome[-1] == n_gates + num_inputs:
+                genome[-1] = num_inputs
+                j = 2 * n_gates - 1
+                while j >= 0:
+                    genome[j] += 1
+                    if genome[j] < num_inputs + n_gates:
+                        break
+                    genome[j] = 0
+                    j -= 1
+
+
+# ── building and loading ──────────────────────────────────────────────────────
+
+def table_size(n_gates: int) -> int:
+    """Number of genomes (acyclic or not) with n_gates gates."""
+    return (NUM_INPUTS + n_gates) ** (2 * n_gates) * n_gates
+
+
+def encode_genome(genome) -> int:
+    """Mixed-radix index of genome in a truth table, or -1 if its output is wired to an input (not tabulated)."""
+    return int(_encode_genome_numba(np.asarray(genome, dtype=np.int32), NUM_INPUTS))
+
+
+def build_truth_table(n_gates: int, path: str, chunk_size: int = 1 << 24) -> np.ndarray:
+    """
+    Compute the truth table of every genome with n_gates gates and write it
+    to path (.npy). Returns the table opened read-only as a memory map.
+    """
+    size = table_size(n_gates)
+    _prefer_fork_safe_threading()
+    table = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(size,))
+    for start in range(0, size, chunk_size):
+        stop = min(start + chunk_size, size)
+        _truth_table_block_numba(n_gates, NUM_INPUTS, start, table[start:stop])
+    table.flush()
+    del table
+    return np.load(path, mmap_mode='r')
+
+
+def load_truth_table(path: str, register: bool = True) -> np.ndarray:
+    """
+    Open a table written by build_truth_table as a read-only memory map and,
+    if register is True, make FastCircuit.fitness use it for that size.
+    """
+    table = np.load(path, mmap_mode='r')
+    if register:
+        register_truth_table(table)
+    return table
+
+
+def _n_gates_for(table) -> int:
+    n_gates = 1
+    while table_size(n_gates) < len(table):
+        n_gates += 1
+    if table_size(n_gates) != len(table):
+        raise ValueError(f'table of length {len(table)} does not match any genome size')
+    return n_gates
+
+
+def register_truth_table(table):
+    """Route FastCircuit.fitness lookups for this table's genome length to it."""
+    n_gates = _n_gates_for(table)
+    circuit._TRUTH_TABLES[2 * n_gates + 1] = table
+
+
+def unregister_truth_table(n_gates: int):
+    circuit._TRUTH_TABLES.pop(2 * n_gates + 1, None)
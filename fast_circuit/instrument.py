@@ -0,0 +1,70 @@
+"""
+Opt-in hot-path counters and phase timers for FastCircuit and the fast models.
+
+FastCircuit checks a single module-level slot (circuit._STATS) on mutate,
+propose, duplicate and fitness; while it is None nothing else runs, so the cost when
+disabled is one global lookup per call. Run a model with instrument=True to
+collect a HotPathStats for that trial; it is returned as a flat dict after
+the usual 6-tuple.
+
+Counts:
+  proposals            mutations proposed (including rejected ones)
+  cyclic_rejections    proposals undone because they created a cycle
+  duplicates           FastCircuit.duplicate calls
+  cache_hits/misses    FastCircuit.fitness truth-table cache outcomes; after
+                       propose() the table is already known from the cone
+                       update, so misses are mostly duplicates and mutate()
+  cone_evaluations     proposals whose per-node truth tables were updated
+  cone_skips           proposals outside the computing subgraph, known to be
+                       output-neutral without evaluation
+  table_lookups        proposals answered from a registered precomputed truth
+                       table (fast_circuit.fitness_table) instead; one whose
+                       output is wired to an input is evaluated and counted
+                       as a cone evaluation
+  steps                model loop iterations
+  accepted             mutations that replaced the current genotype
+  leaped_steps         steps made in bulk by FastCircuit.leap (leap=True)
+  steps_at_fitness_F   loop iterations spent at current fitness F
+
+Seconds:
+  seconds_topo, seconds_computing  — topological sort and computing-set
+                                     kernels inside mutate and propose
+  seconds_cone                     — per-node truth-table updates inside propose
+  seconds_mutate                   — whole mutate / propose, including the three above
+  seconds_duplicate, seconds_fitness (truth-table lookup, evaluation on a miss)
+  seconds_total                    — the whole trial
+  seconds_python_loop              — total minus mutate, duplicate and fitness
+"""
+from collections import Counter
+from contextlib import contextmanager
+
+from fast_circuit import circuit
+
+
+class HotPathStats:
+    """Counters and cumulative per-phase seconds for one or more trials."""
+
+    __slots__ = ('counts', 'seconds')
+
+    def __init__(self):
+        self.counts = Counter()
+        self.seconds = Counter()
+
+    def as_dict(self) -> dict:
+        out = dict(self.counts)
+        out.update({'seconds_' + phase: s for phase, s in self.seconds.items()})
+        if 'total' in self.seconds:
+            out['seconds_python_loop'] = self.seconds['total'] - (
+                self.seconds['mutate'] + self.seconds['duplicate'] + self.seconds['fitness'])
+        return out
+
+
+@contextmanager
+def collecting(stats: HotPathStats):
+    """Route FastCircuit instrumentation into stats for the duration of the block."""
+    previous = circuit._STATS
+    circuit._STATS = stats
+    try:
+        yield stats
+    finally:
+        circuit._STATS = previous
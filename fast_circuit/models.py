@@ -1,13 +1,54 @@
 """
 Fast simulation models using FastCircuit.
 Drop-in replacements for run_random_walk and run_evolution_strong_selection.
-Accepts Circuit or FastCircuit as x_init; always returns the same 6-tuple.
+Accepts Circuit or FastCircuit as x_init; always returns the same 6-tuple,
+followed by a hot-path stats dict when called with instrument=True.
+
+With record_times=False no waiting times are drawn and the first element of
+the tuple is the mutation count (len(T) of a timed run) instead of T; times
+for any (N, mu) are then sampled afterwards with fast_circuit.timing. t_max
+is not enforced in that mode.
+
+C holds the computing size (Circuit.num_gates_computing) after every step
+under strong selection and at the end of a random walk, as in the original
+models; a counts-only strong-selection run keeps only the final value.
+With observe_every=k the computing size, depth, cone size and distance from
+the starting genome, all maintained by FastCircuit as it mutates, are also
+sampled every k steps into an OBSERVABLES array appended to the tuple.
+
+Pass history, a logic_gates.history.GenomeHistory, to log the starting
+genome and every accepted mutation for replay. Pass visited, a
+fast_circuit.zobrist.GenotypeSet, to the random walk or strong selection to
+add the Zobrist hash of every genotype the trajectory occupies;
+len(visited) is then its number of distinct genotypes.
+
+With rle=True fitness and computing size are recorded every step as change
+events: F is then a logic_gates.runlength.RunLengthTrajectory of both and
+C is None.
+
+With leap=True the random walk and strong selection don't step through
+proposals to gates outside the computing subgraph one at a time: such a
+proposal can't change fitness, so the number of them before the next
+proposal to a computing site is drawn from a geometric distribution and
+they are made in bulk (FastCircuit.leap), cycle rejections, neutral
+acceptance and waiting times included. Only the proposal that touches the
+computing subgraph gets the full update and fitness evaluation. Trajectories
+have the same distribution as without leaping, but not the same draws.
 """
+import time
+
 import numpy as np
 from collections import Counter
-from scipy.spatial.distance import hamming
 
-from fast_circuit.circuit import FastCircuit
+from fast_circuit.circuit import FastCircuit, goal_mask, goal_name
+from fast_circuit.instrument import HotPathStats, collecting
+from fast_circuit.zobrist import hash_trail
+from logic_gates.progress import PUBLISH_EVERY, publish
+from logic_gates.runlength import RunLengthTrajectory
+
+# rows of the observe_every array: step indexes T
+OBSERVABLES = np.dtype([('step', np.int64), ('computing', np.int32), ('depth', np.int32), ('cone', np.int32),
+                        ('distance', np.int32)])
 
 
 def _to_fast(x_init) -> FastCircuit:
@@ -17,22 +58,142 @@ def _to_fast(x_init) -> FastCircuit:
     return FastCircuit(x_init.genome)
 
 
-def run_random_walk_fast(f, N: int, mu: float, x_init, t_max: int, m_max: int):
+def _observe(x, step):
+    return step, x.num_gates_computing(), x.computing_depth(), x.cone_size(), x.distance_from_origin()
+
+
+def _instrumented(run, *args):
+    """Run a model loop with a fresh HotPathStats and append its dict to the result."""
+    stats = HotPathStats()
+    t0 = time.perf_counter()
+    with collecting(stats):
+        result = run(*args, stats)
+    stats.seconds['total'] += time.perf_counter() - t0
+    return result + (stats.as_dict(),)
+
+
+def run_random_walk_fast(f, N: int, mu: float, x_init, t_max: int, m_max: int,
+                         instrument: bool = False, record_times: bool = True, rle: bool = False,
+                         observe_every: int = None, history=None, leap: bool = False,
+                         visited=None):
+    """
+    No-selection random walk. With instrument=True a dict of hot-path counters
+    and phase timings (see fast_circuit.instrument) is appended to the 6-tuple.
+    With record_times=False only the mutation count is returned in place of T.
+    """
+    if instrument:
+        return _instrumented(_random_walk, f, N, mu, x_init, t_max, m_max, record_times, rle, observe_every,
+                            history, leap, visited)
+    return _random_walk(f, N, mu, x_init, t_max, m_max, record_times, rle, observe_every, history, leap, visited,
+                        None)
+
+
+def run_strong_selection_fast(f, N: int, mu: float, x_init, t_max: int, m_max: int,
+                              instrument: bool = False, record_times: bool = True, rle: bool = False,
+                              observe_every: int = None, history=None, leap: bool = False,
+                              visited=None):
+    """
+    Strong selection, weak mutation. With instrument=True a dict of hot-path
+    counters and phase timings (see fast_circuit.instrument) is appended to
+    the 6-tuple. With record_times=False only the mutation count is returned
+    in place of T.
+    """
+    if instrument:
+        return _instrumented(_strong_selection, f, N, mu, x_init, t_max, m_max, record_times, rle, observe_every,
+                            history, leap, visited)
+    return _strong_selection(f, N, mu, x_init, t_max, m_max, record_times, rle, observe_every, history, leap, visited,
+                             None)
+
+
+def _result(T, steps, x, F, mutation_counter, C, observed):
+    """The 6-tuple, with the observables (closed with the final step) appended when they were sampled."""
+    result = (np.array(T) if T is not None else steps, x, F, mutation_counter, C, float(x.distance_from_origin()))
+    if observed is None:
+        return result
+    if observed[-1][0] != steps - 1:
+        observed.append(_observe(x, steps - 1))
+    return result + (np.array(observed, dtype=OBSERVABLES),)
+
+
+def _leap(x, scale, accept, t_max, m_max, T, steps, record_times, history, observed, observe_every, visited):
+    """
+    Make the proposals before the next one on a computing site in one go (see FastCircuit.leap), extending T
+    and logging them like single steps. Returns the steps taken and the mutations applied.
+    """
+    distance = x.distance_from_origin()
+    start_hash = x.genome_hash()
+    k = np.random.geometric(x.computing_sites() / len(x.genome)) - 1
+    budget = m_max - steps
+    if record_times:
+        times = T[-1] + np.cumsum(np.random.exponential(scale, k))
+        budget = min(budget, int(np.searchsorted(times, t_max)) + 1)   # up to the step that reaches t_max
+    n, _, events = x.leap(k, budget, accept)
+    if record_times:
+        T.extend(times[:n].tolist())
+    if history is not None:
+        for step, site, old, new, _ in events.tolist():
+            history.record(steps + step, site, old, new)
+    if visited is not None and len(events):
+        visited.update(hash_trail(start_hash, events[:, 1], events[:, 2], events[:, 3]))
+    if observe_every:
+        _, computing, depth, cone, _ = _observe(x, steps)
+        for step in range(-(-steps // observe_every) * observe_every, steps + n, observe_every):
+            i = int(np.searchsorted(events[:, 0], step - steps, side='right'))
+            observed.append((step, computing, depth, cone, int(events[i - 1, 4]) if i else distance))
+    return n, events
+
+
+def _random_walk(f, N, mu, x_init, t_max, m_max, record_times, rle, observe_every, history, leap, visited,
+                 stats):
     x = _to_fast(x_init)
-    init_genome = x.genome.copy()
+    x.set_origin()
     L = len(x.genome)
     current_fitness = x.fitness(f)
     T = [0.0]
+    steps = 1   # len(T) of the timed run
     mutation_counter = Counter()
+    if rle:
+        trajectory = RunLengthTrajectory()
+        trajectory.record(0, round(current_fitness * 4), x.num_gates_computing())
+    observed = [_observe(x, 0)] if observe_every else None
+    if history is not None:
+        history.start(x.genome)
+    if visited is not None:
+        visited.add(x.genome_hash())
+
+    while T[-1] < t_max and steps < m_max:
+        token = None
+        if leap and not x.has_cycle():
+            n, _ = _leap(x, 1 / (N * mu * L), 1.0, t_max, m_max, T, steps, record_times, history, observed,
+                         observe_every, visited)
+            if (steps + n) // PUBLISH_EVERY > steps // PUBLISH_EVERY:
+                publish(steps + n, current_fitness)
+            mutation_counter["Neutral"] += n
+            if stats is not None:
+                stats.counts['steps'] += n
+                stats.counts['accepted'] += n
+                stats.counts[f'steps_at_fitness_{current_fitness}'] += n
+            steps += n
+            if T[-1] >= t_max or steps >= m_max:
+                break
+            token = x.propose_computing()
+            if token is None:
+                continue
+
+        if steps % PUBLISH_EVERY == 0:
+            publish(steps, current_fitness)
 
-    while T[-1] < t_max and len(T) < m_max:
-        if len(T) % 2000 == 0 and len(T) > 0:
-            print(str(len(T)), str(T[-1]), str(current_fitness))
+        if stats is not None:
+            stats.counts['steps'] += 1
+            stats.counts['accepted'] += 1
+            stats.counts[f'steps_at_fitness_{current_fitness}'] += 1
 
-        tau_next = np.random.exponential(1 / (N * mu * L))
-        xm = x.duplicate()
-        xm.mutate()
-        new_fitness = xm.fitness(f)
+        if record_times:
+            tau_next = np.random.exponential(1 / (N * mu * L))
+        if token is None:
+            token = x.propose()
+        x.commit(token)   # every mutation is accepted, so it is applied in place
+        new_fitness = x.fitness(f)
 
         s = new_fitness - current_fitness
         if s == 0:
@@ -42,37 +203,84 @@ def run_random_walk_fast(f, N: int, mu: float, x_init, t_max: int, m_max: int):
         else:
             mutation_counter["Negative"] += 1
 
-        x = xm
         current_fitness = new_fitness
-        T.append(T[-1] + tau_next)
+        if history is not None:
+            history.record(steps, *x.last_mutation)
+        if visited is not None:
+            visited.add(x.genome_hash())
+        if rle:
+            trajectory.record(steps, round(current_fitness * 4), x.num_gates_computing())
+        if observe_every and steps % observe_every == 0:
+            observed.append(_observe(x, steps))
+        if record_times:
+            T.append(T[-1] + tau_next)
+        steps += 1
 
         if current_fitness == 1.0:
             break
 
-    F = np.array([x_init.fitness(f) if isinstance(x_init, FastCircuit)
-                  else 0.0,           # original Circuit doesn't have .fitness()
-                  current_fitness])
-    C = np.array([0])  # computing-edge count not tracked in fast model
-    return (np.array(T), x, F, mutation_counter, C,
-            hamming(x.genome, init_genome) * len(x.genome))
+    publish(steps, current_fitness, done=True)
+    if rle:
+        F, C = trajectory.finish(steps), None
+    else:
+        F = np.array([x_init.fitness(f) if isinstance(x_init, FastCircuit)
+                      else 0.0,           # original Circuit doesn't have .fitness()
+                      current_fitness])
+        C = np.array([x.num_gates_computing()])
+    return _result(T if record_times else None, steps, x, F, mutation_counter, C, observed)
 
 
-def run_strong_selection_fast(f, N: int, mu: float, x_init, t_max: int, m_max: int):
+def _strong_selection(f, N, mu, x_init, t_max, m_max, record_times, rle, observe_every, history, leap, visited,
+                      stats):
     x = _to_fast(x_init)
-    init_genome = x.genome.copy()
+    x.set_origin()
     L = len(x.genome)
     current_fitness = x.fitness(f)
     T = [0.0]
+    steps = 1   # len(T) of the timed run
     mutation_counter = Counter()
+    C = []   # computing size after every step, as the original model
+    if rle:
+        trajectory = RunLengthTrajectory()
+        trajectory.record(0, round(current_fitness * 4), x.num_gates_computing())
+    observed = [_observe(x, 0)] if observe_every else None
+    if history is not None:
+        history.start(x.genome)
+    if visited is not None:
+        visited.add(x.genome_hash())
 
-    while T[-1] < t_max and len(T) < m_max:
-        if len(T) % 10000 == 0 and len(T) > 0:
-            print('\t', str(len(T)), str(T[-1]), str(current_fitness))
+    while T[-1] < t_max and steps < m_max:
+        token = None
+        if leap and not x.has_cycle():
+            n, events = _leap(x, 1 / (N * mu * L), 1 / N, t_max, m_max, T, steps, record_times, history, observed,
+                              observe_every, visited)
+            if (steps + n) // PUBLISH_EVERY > steps // PUBLISH_EVERY:
+                publish(steps + n, current_fitness)
+            mutation_counter["Neutral"] += len(events)
+            if stats is not None:
+                stats.counts['steps'] += n
+                stats.counts['accepted'] += len(events)
+                stats.counts[f'steps_at_fitness_{current_fitness}'] += n
+            if record_times and not rle:
+                C.extend([x.num_gates_computing()] * n)
+            steps += n
+            if T[-1] >= t_max or steps >= m_max:
+                break
+            token = x.propose_computing()
+            if token is None:
+                continue
 
-        tau_next = np.random.exponential(1 / (N * mu * L))
-        xm = x.duplicate()
-        xm.mutate()
-        new_fitness = xm.fitness(f)
+        if steps % PUBLISH_EVERY == 0:
+            publish(steps, current_fitness)
+        if stats is not None:
+            stats.counts['steps'] += 1
+            stats.counts[f'steps_at_fitness_{current_fitness}'] += 1
+
+        if record_times:
+            tau_next = np.random.exponential(1 / (N * mu * L))
+        if token is None:
+            token = x.propose()
+        new_fitness = x.fitness(f)
 
         s = new_fitness - current_fitness
         if s != 0:
@@ -86,21 +294,219 @@ def run_strong_selection_fast(f, N: int, mu: float, x_init, t_max: int, m_max: i
             pfix = 1 / N
 
         if np.random.rand() < pfix:
-            x = xm
+            x.commit(token)
             current_fitness = new_fitness
+            if stats is not None:
+                stats.counts['accepted'] += 1
             if s == 0:
                 mutation_counter["Neutral"] += 1
             elif s > 0:
                 mutation_counter["Positive"] += 1
             else:
                 mutation_counter["Negative"] += 1
+            if history is not None:
+                history.record(steps, *x.last_mutation)
+            if visited is not None:
+                visited.add(x.genome_hash())
+            if rle:
+                trajectory.record(steps, round(current_fitness * 4), x.num_gates_computing())
+        else:
+            x.rollback(token)
+        if observe_every and steps % observe_every == 0:
+            observed.append(_observe(x, steps))
 
-        T.append(T[-1] + tau_next)
+        if record_times:
+            T.append(T[-1] + tau_next)
+            if not rle:
+                C.append(x.num_gates_computing())
+        steps += 1
 
         if current_fitness == 1.0:
             break
 
-    F = np.array([0.0, current_fitness])
-    C = np.array([0])
-    return (np.array(T), x, F, mutation_counter, C,
-            hamming(x.genome, init_genome) * len(x.genome))
+    publish(steps, current_fitness, done=True)
+    if rle:
+        F, C = trajectory.finish(steps), None
+    else:
+        F = np.array([0.0, current_fitness])
+        C = np.array(C if record_times else [x.num_gates_computing()])
+    return _result(T if record_times else None, steps, x, F, mutation_counter, C, observed)
+
+
+def run_random_walk_hitting_times(goals, N: int, mu: float, x_init, t_max: int, m_max: int,
+                                  record_times: bool = True):
+    """
+    No-selection random walk that tracks the output truth table every step
+    and records when it first matches each goal. The walk never looks at
+    fitness, so one trajectory gives the hitting times of every goal.
+
+    :param goals: goals to track (masks, registered names or callables);
+        None for all 16 two-input functions
+    :return: (hits, x): hits maps each goal (as given, or its mask when goals
+        is None) to (mutations, time) of its first hit — the len(T) and T[-1]
+        a run_random_walk_fast trial with that goal and the same seeds would
+        return — or None if it wasn't hit within t_max / m_max; x is the final
+        circuit. time is nan with record_times=False.
+    """
+    goals = list(range(16)) if goals is None else list(goals)
+    masks = [goal_mask(g) for g in goals]
+    x = _to_fast(x_init)
+    L = len(x.genome)
+    t = 0.0
+    steps = 1   # len(T) of the timed run
+    first_hit = {}
+    wanted = 0
+    for m in masks:
+        wanted |= 1 << m
+
+    while t < t_max and steps < m_max and wanted:
+        if steps % PUBLISH_EVERY == 0:
+            publish(steps, len(first_hit) / len(masks))
+        if record_times:
+            tau_next = np.random.exponential(1 / (N * mu * L))
+        x.commit(x.propose())   # every mutation is accepted, so no copy is needed
+        if record_times:
+            t += tau_next
+        steps += 1
+        tt = x.truth_table()
+        if wanted >> tt & 1:
+            first_hit[tt] = (steps, t if record_times else float('nan'))
+            wanted &= ~(1 << tt)
+
+    publish(steps, len(first_hit) / len(masks), done=True)
+    return {g: first_hit.get(m) for g, m in zip(goals, masks)}, x
+
+
+def hitting_times_by_goal(trials, goals=None):
+    """
+    Regroup the hits dicts of several run_random_walk_hitting_times trials
+    into {goal name: (mutations array, times array)}; trials that never hit
+    a goal are left out of its arrays.
+    """
+    out = {}
+    for hits in trials:
+        for g, hit in hits.items():
+            if goals is not None and g not in goals:
+                continue
+            name = g if isinstance(g, str) else goal_name(goal_mask(g))
+            mutations, times = out.setdefault(name, ([], []))
+            if hit is not None:
+                mutations.append(hit[0])
+                times.append(hit[1])
+    return {name: (np.array(m), np.array(t)) for name, (m, t) in out.items()}
+
+
+def run_varying_goal_fast(goals, N: int, mu: float, x_init, t_max: int, m_max: int,
+                          switch: str = 'fixation', k: int = None, p: float = None,
+                          max_epochs: int = None, selection: bool = True, record_times: bool = True):
+    """
+    Strong selection (or, with selection=False, a random walk) under a goal
+    that changes over time, e.g. goals=['xnor', 'xor'] to start at the
+    opposite of the final goal. Fitness comes from the cached truth table,
+    so switching goals costs nothing: the current genotype is rescored
+    against the new mask without evaluating the circuit.
+
+    Epoch i evolves towards goals[i % len(goals)] and ends
+      switch='fixation'  — when the goal is reached (at most max_epochs,
+                           default len(goals), epochs)
+      switch='every'     — after k mutations
+      switch='random'    — after each mutation with probability p
+    or when t_max / m_max run out.
+
+    :param goals: masks, registered names or callables
+    :return: (epochs, x, mutation_counter). epochs is a list of dicts with the
+        epoch's 'goal' name, 'start' / 'end' mutation counts (len(T) of a timed
+        run), 'start_time' / 'end_time', and 'adapted' / 'adapted_time' — when
+        the goal was first reached in that epoch, None if it wasn't — plus
+        'adaptation_mutations' and 'adaptation_time' relative to the start.
+        Times are nan with record_times=False.
+    """
+    if switch not in ('fixation', 'every', 'random'):
+        raise ValueError("switch must be 'fixation', 'every' or 'random'")
+    if switch == 'every' and not k:
+        raise ValueError("switch='every' needs k")
+    if switch == 'random' and not p:
+        raise ValueError("switch='random' needs p")
+    if switch == 'fixation' and max_epochs is None:
+        max_epochs = len(goals)
+    masks = [goal_mask(g) for g in goals]
+    names = [goal_name(m) for m in masks]
+
+    x = _to_fast(x_init)
+    L = len(x.genome)
+    t = 0.0 if record_times else float('nan')
+    steps = 1   # len(T) of the timed run
+    mutation_counter = Counter()
+    epochs = []
+
+    def start_epoch():
+        i = len(epochs)
+        epochs.append({'goal': names[i % len(names)], 'start': steps, 'start_time': t,
+                       'adapted': None, 'adapted_time': None})
+        return masks[i % len(masks)]
+
+    def end_epoch():
+        epoch = epochs[-1]
+        epoch['end'], epoch['end_time'] = steps, t
+        adapted = epoch['adapted'] is not None
+        epoch['adaptation_mutations'] = epoch['adapted'] - epoch['start'] if adapted else None
+        epoch['adaptation_time'] = epoch['adapted_time'] - epoch['start_time'] if adapted else None
+
+    mask = start_epoch()
+    current_fitness = x.fitness(mask)
+    while True:
+        epoch = epochs[-1]
+        if current_fitness == 1.0 and epoch['adapted'] is None:
+            epoch['adapted'], epoch['adapted_time'] = steps, t
+        if not ((t < t_max or not record_times) and steps < m_max):
+            end_epoch()
+            break
+        if (switch == 'fixation' and epoch['adapted'] is not None) or \
+                (switch == 'every' and steps - epoch['start'] >= k) or \
+                (switch == 'random' and steps > epoch['start'] and np.random.rand() < p):
+            end_epoch()
+            if max_epochs is not None and len(epochs) == max_epochs:
+                break
+            # rescoring the current genotype reads its cached truth table; the
+            # new goal may already be met, which ends a 'fixation' epoch at once
+            mask = start_epoch()
+            current_fitness = x.fitness(mask)
+            continue
+
+        if steps % PUBLISH_EVERY == 0:
+            publish(steps, current_fitness)
+        if record_times:
+            tau_next = np.random.exponential(1 / (N * mu * L))
+        token = x.propose()
+        new_fitness = x.fitness(mask)
+
+        s = new_fitness - current_fitness
+        if not selection:
+            pfix = 1.0
+        elif s != 0:
+            if abs(-s * N) < 250:
+                pfix = (1 - np.exp(-s)) / (1 - np.exp(-s * N))
+            elif -s * N > 0:
+                pfix = 0.0
+            else:
+                pfix = 1 - np.exp(-s)
+        else:
+            pfix = 1 / N
+
+        if not selection or np.random.rand() < pfix:
+            x.commit(token)
+            current_fitness = new_fitness
+            if s == 0:
+                mutation_counter["Neutral"] += 1
+            elif s > 0:
+                mutation_counter["Positive"] += 1
+            else:
+                mutation_counter["Negative"] += 1
+        else:
+            x.rollback(token)
+        if record_times:
+            t += tau_next
+        steps += 1
+
+    publish(steps, current_fitness, done=True)
+    return epochs, x, mutation_counter
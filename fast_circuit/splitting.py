@@ -0,0 +1,117 @@
+"""
+Fixed-effort multilevel splitting for first-passage times of the random walk.
+
+The first passage to the goal is split at stopping times: a trajectory must
+first reach score >= levels[0], then >= levels[1], ..., and finally the goal
+(fitness 1), all within m_max mutations. Stage k restarts n_per_level
+trajectories from states drawn uniformly (with replacement) from the
+entrance states of stage k-1 and runs them until they reach the next level
+or exhaust the mutation budget.
+
+With p_k the fraction of stage-k trajectories that succeed,
+
+    P(tau <= t) = p_1 * ... * p_{K-1} * (fraction of the last stage hitting the goal by t)
+
+is unbiased for every t <= m_max. Replicates are independent, so their
+sample variance gives an unbiased variance estimate of the averaged CDF.
+
+Splitting pays off when reaching the goal within the horizon is rare — the
+lower tail of tau, or horizons far below the typical passage time at large
+N — because trajectories that fail an early level are never continued.
+"""
+import random
+
+import numpy as np
+
+from fast_circuit.models import _to_fast
+
+
+def _run_stage(f, starts, level, m_max, n, score):
+    """
+    Run n trajectories from states sampled out of starts until score >= level
+    or m_max mutations have elapsed. Returns the (circuit, mutations) entrance
+    states of the trajectories that reached the level.
+    """
+    entrances = []
+    for _ in range(n):
+        x, m = random.choice(starts)
+        x = x.duplicate()
+        while score(x, f) < level:
+            if m >= m_max:
+                break
+            x.mutate()
+            m += 1
+        else:
+            entrances.append((x, m))
+    return entrances
+
+
+def _fitness_score(x, f):
+    return x.fitness(f)
+
+
+def first_passage_splitting(f, x_init, m_max: int, levels=(0.25, 0.5, 0.75),
+                            n_per_level: int = 1000, n_replicates: int = 10,
+                            t_grid=None, score=None):
+    """
+    Estimate the CDF of the number of mutations a no-selection random walk
+    needs to first reach fitness 1, up to a horizon of m_max mutations.
+
+    :param f: goal function
+    :param x_init: Circuit or FastCircuit starting genotype
+    :param m_max: horizon in mutations; the estimate covers tau <= m_max
+    :param levels: increasing intermediate score thresholds, all below 1
+    :param n_per_level: trajectories per stage (the fixed effort)
+    :param n_replicates: independent repetitions, used for the variance estimate
+    :param t_grid: mutation counts at which to evaluate the CDF
+        (default: 200 geometrically spaced points up to m_max)
+    :param score: score(x, f) -> float milestone function, default x.fitness(f).
+        Must reach 1 exactly when the goal is reached.
+    :return: dict with 't', 'cdf' (mean over replicates), 'cdf_var' (variance of
+        that mean), 'replicates' (n_replicates x len(t) array) and
+        'level_probs' (n_replicates x stages array of conditional probabilities)
+    """
+    score = score or _fitness_score
+    if t_grid is None:
+        t_grid = np.unique(np.geomspace(1, m_max, 200).astype(np.int64))
+    t_grid = np.asarray(t_grid)
+    thresholds = list(levels) + [1.0]
+    start = _to_fast(x_init)
+
+    replicates = np.zeros((n_replicates, len(t_grid)))
+    level_probs = np.zeros((n_replicates, len(thresholds)))
+    for r in range(n_replicates):
+        states = [(start, 0)]
+        weight = 1.0
+        for k, level in enumerate(thresholds):
+            entrances = _run_stage(f, states, level, m_max, n_per_level, score)
+            level_probs[r, k] = len(entrances) / n_per_level
+            if not entrances:
+                break
+            if k == len(thresholds) - 1:
+                hits = np.sort([m for _, m in entrances])
+                replicates[r] = weight * np.searchsorted(hits, t_grid, side='right') / n_per_level
+            weight *= level_probs[r, k]
+            states = entrances
+
+    return {
+        't': t_grid,
+        'cdf': replicates.mean(axis=0),
+        'cdf_var': replicates.var(axis=0, ddof=1) / n_replicates if n_replicates > 1 else
+        np.full(len(t_grid), np.nan),
+        'replicates': replicates,
+        'level_probs': level_probs,
+    }
+
+
+def splitting_quantiles(result, qs):
+    """
+    Mutation counts at which the estimated CDF first reaches each quantile in
+    qs. Quantiles above the estimated P(tau <= m_max) come back as nan.
+    """
+    cdf = np.maximum.accumulate(result['cdf'])
+    out = []
+    for q in np.atleast_1d(qs):
+        i = np.searchsorted(cdf, q, side='left')
+        out.append(result['t'][i] if i < len(cdf) else np.nan)
+    return np.array(out, dtype=float)
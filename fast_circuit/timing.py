@@ -0,0 +1,60 @@
+"""
+Post-hoc waiting times for runs made with record_times=False.
+
+Every step of both fast models waits tau ~ Exp(rate N * mu * L), independent of
+everything else in the step, so the elapsed time after a trial of m mutations
+(len(T) = m, i.e. m - 1 waits) is
+
+    T[-1] = G / (N * mu * L),   G ~ Gamma(m - 1, 1).
+
+One Gamma draw per trial gives its elapsed time, and the same draw rescaled
+gives it for every (N, mu) at once. This is exact for the random walk, where
+acceptance never depends on N or mu, so the mutation counts are valid for any
+(N, mu). Under strong selection pfix depends on N, so counts from a run are
+only valid for that N; mu still only scales time.
+
+t_max is not enforced while recording counts only: a trial whose sampled
+time exceeds t_max would have been cut off there in a timed run.
+"""
+import numpy as np
+
+
+def sample_elapsed_times(mutations, genome_length: int, Ns, mus, rng=None, selection_N=None):
+    """
+    Elapsed time of each trial for every (N, mu) in the grid.
+
+    :param mutations: mutation counts per trial (the first value returned with record_times=False, or len(T))
+    :param genome_length: L, the genome length of the trials (2 * size + 1)
+    :param Ns: population sizes
+    :param mus: mutation rates
+    :param rng: np.random.Generator or seed for the Gamma draws
+    :param selection_N: for strong-selection counts, the N they were run at; every N in Ns must equal it
+    :return: array of shape (len(Ns), len(mus), len(mutations)); one Gamma draw per trial is shared by all
+        (N, mu), so each trial's times are the same draw rescaled
+    """
+    Ns = np.atleast_1d(np.asarray(Ns, dtype=float))
+    mus = np.atleast_1d(np.asarray(mus, dtype=float))
+    if selection_N is not None and np.any(Ns != selection_N):
+        raise ValueError(f"strong-selection counts were run at N={selection_N} and are only valid for that N")
+    rng = np.random.default_rng(rng)
+    waits = np.asarray(mutations, dtype=float) - 1
+    g = rng.gamma(np.maximum(waits, 1), 1.0) * (waits > 0)
+    return g / (Ns[:, None, None] * mus[None, :, None] * genome_length)
+
+
+def trajectory_times(mutations: int, genome_length: int, N: float, mu: float, seed):
+    """
+    Exact per-step times T (length mutations, T[0] = 0) of one trial, regenerated from a stored seed. The same
+    seed gives the same standard exponential waits for every (N, mu), so trajectories for different parameters
+    are rescalings of each other.
+    """
+    waits = np.random.default_rng(seed).standard_exponential(mutations - 1)
+    return np.concatenate(([0.0], np.cumsum(waits))) / (N * mu * genome_length)
+
+
+def rescale_times(times, mu_run: float, mu: float):
+    """
+    Times recorded at mutation rate mu_run, as they would have been at mu with the same N and the same
+    mutations. Exact for both models, since mu only sets the clock.
+    """
+    return np.asarray(times, dtype=float) * (mu_run / mu)
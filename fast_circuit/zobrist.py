@@ -0,0 +1,148 @@
+"""
+Zobrist genome hashes and a compact set of visited genotypes.
+
+The hash of a genome is the XOR over its sites of a pseudo-random 64-bit
+key for each (site, value) pair, so a point mutation changes it by
+key(site, old) ^ key(site, new) in O(1), and FastCircuit keeps its own hash
+up to date as it mutates. Keys come from the splitmix64 finalizer rather than a
+stored table, so they cost no memory, agree across processes and runs, and
+are the same for every genome length. Two distinct genomes collide with
+probability 2^-64.
+
+GenotypeSet records hashes in an open-addressing table of uint64 (linear
+probing, load kept at or below one half): 8-16 bytes per genotype, against
+hundreds for a tuple in a Python set. The _insert_numba / _contains_numba
+kernels work on the bare table and can be called from other numba code.
+"""
+import numpy as np
+import numba
+
+_EMPTY = np.uint64(0)   # free slot marker; a hash of 0 is kept out of the table
+
+
+# ── Numba-compiled functions ──────────────────────────────────────────────────
+
+@numba.njit(cache=True)
+def _key(site, value):
+    """splitmix64 of (site, value): the Zobrist key of value at site."""
+    z = (np.uint64(site) << np.uint64(32)) + np.uint64(value) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+@numba.njit(cache=True)
+def _hash_numba(genome):
+    h = np.uint64(0)
+    for site in range(len(genome)):
+        h ^= _key(site, genome[site])
+    return h
+
+
+@numba.njit(cache=True)
+def _delta_numba(site, old, new):
+    """What to XOR into a genome's hash when site changes from old to new."""
+    return _key(site, old) ^ _key(site, new)
+
+
+@numba.njit(cache=True)
+def _trail_numba(h, sites, old, new):
+    """Hashes after each of a sequence of changes to a genome whose hash is h."""
+    out = np.empty(len(sites), dtype=np.uint64)
+    for i in range(len(sites)):
+        h ^= _key(sites[i], old[i]) ^ _key(sites[i], new[i])
+        out[i] = h
+    return out
+
+
+@numba.njit(cache=True)
+def _insert_numba(table, h):
+    """Add nonzero hash h to table (a power-of-two length, not full); returns whether it was new."""
+    mask = np.uint64(len(table) - 1)
+    i = h & mask
+    while table[i] != 0:
+        if table[i] == h:
+            return False
+        i = (i + np.uint64(1)) & mask
+    table[i] = h
+    return True
+
+
+@numba.njit(cache=True)
+def _contains_numba(table, h):
+    mask = np.uint64(len(table) - 1)
+    i = h & mask
+    while table[i] != 0:
+        if table[i] == h:
+            return True
+        i = (i + np.uint64(1)) & mask
+    return False
+
+
+@numba.njit(cache=True)
+def _insert_many_numba(table, hashes):
+    added = 0
+    for h in hashes:
+        if h != 0 and _insert_numba(table, h):
+            added += 1
+    return added
+
+
+# ── Python API ────────────────────────────────────────────────────────────────
+
+def genome_hash(genome) -> int:
+    """64-bit Zobrist hash of a genome (any sequence of node indices), as FastCircuit.genome_hash keeps it."""
+    return int(_hash_numba(np.asarray(genome, dtype=np.int64)))
+
+
+def hash_trail(h: int, sites, old, new) -> np.ndarray:
+    """Hashes (uint64) after each of the changes sites[i]: old[i] -> new[i], applied in turn from hash h."""
+    return _trail_numba(np.uint64(h), np.asarray(sites, dtype=np.int64), np.asarray(old, dtype=np.int64),
+                        np.asarray(new, dtype=np.int64))
+
+
+class GenotypeSet:
+    """Set of 64-bit genome hashes in a growable open-addressing table."""
+
+    __slots__ = ('table', 'size', '_zero')
+
+    def __init__(self, capacity: int = 1024):
+        """:param capacity: genotypes to hold before the first resize"""
+        self.table = np.zeros(1 << max(4, (2 * capacity - 1).bit_length()), dtype=np.uint64)
+        self.size = 0
+        self._zero = False
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, h) -> bool:
+        h = np.uint64(h)
+        return self._zero if h == _EMPTY else bool(_contains_numba(self.table, h))
+
+    def _reserve(self, n: int):
+        if 2 * (self.size + n) > len(self.table):
+            old = self.table[self.table != _EMPTY]
+            self.table = np.zeros(1 << (2 * (self.size + n) - 1).bit_length(), dtype=np.uint64)
+            _insert_many_numba(self.table, old)
+
+    def add(self, h) -> bool:
+        """Add hash h; returns whether it was new."""
+        h = np.uint64(h)
+        if h == _EMPTY:
+            new, self._zero = not self._zero, True
+        else:
+            self._reserve(1)
+            new = bool(_insert_numba(self.table, h))
+        self.size += new
+        return new
+
+    def update(self, hashes) -> int:
+        """Add every hash in hashes; returns how many were new."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        self._reserve(len(hashes))
+        added = int(_insert_many_numba(self.table, hashes))
+        if not self._zero and (hashes == _EMPTY).any():
+            self._zero = True
+            added += 1
+        self.size += added
+        return added
@@ -15,4 +15,21 @@ def xor_funct(x: [bool]) -> bool:
 
 
 def xnor_funct(x: [bool]) -> bool:
-    return x[0] == x[1]
\ No newline at end of file
+    return x[0] == x[1]
+
+# goals by name, so tasks for worker processes can refer to a goal by a short id
+GOALS = {
+    'and': and_funct,
+    'or': or_funct,
+    'nor': nor_funct,
+    'xor': xor_funct,
+    'xnor': xnor_funct,
+}
+
+
+def goal_id(f) -> str:
+    """Name under which goal function f is registered in GOALS."""
+    for name, goal in GOALS.items():
+        if goal is f:
+            return name
+    raise ValueError(f"{getattr(f, '__name__', f)!r} is not registered in goals.GOALS")
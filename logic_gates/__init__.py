@@ -3,8 +3,10 @@ from logic_gates.fullmodel import FullModel
 from logic_gates.isomorphismcounter import IsomorphismCounter
 from logic_gates.strongselectionmodel import run_evolution_strong_selection
 from logic_gates.noselectionmodel import run_random_walk
-from logic_gates.run_evoltution_in_parallel import run_in_parallel_same_start
+from logic_gates.run_evoltution_in_parallel import run_in_parallel_same_start, run_in_parallel_until_precise, \
+    SweepPool, GridJob
 from logic_gates.find_clusters_random_walk import find_clusters_rw
 
 __all__ = ['FullModel', 'Circuit', 'nand', 'run_evolution_strong_selection', 'run_random_walk', 'IsomorphismCounter',
-           'run_in_parallel_same_start', 'find_clusters_rw']
+           'run_in_parallel_same_start', 'run_in_parallel_until_precise', 'SweepPool', 'GridJob',
+           'find_clusters_rw']
@@ -1,8 +1,8 @@
 from collections import Counter
-from scipy.spatial.distance import hamming
 import numpy as np
 
 from logic_gates import Circuit
+from logic_gates.gates import genome_distance
 
 def find_clusters_rw(f, x_init: Circuit, m_max: int, genome_size: int):
     """
@@ -39,7 +39,7 @@ def find_clusters_rw(f, x_init: Circuit, m_max: int, genome_size: int):
             if not gap == 0:
                 first_genome = x.genome
                 if not last_genome == []:
-                    gap_hamming = hamming(first_genome, last_genome) * len(first_genome)
+                    gap_hamming = genome_distance(first_genome, last_genome)
                     sum_cluster_gaps_hamming += gap_hamming
                     sum_cluster_gaps_hamming_squared += gap_hamming * gap_hamming
                 sum_cluster_gaps += gap
@@ -51,7 +51,7 @@ def find_clusters_rw(f, x_init: Circuit, m_max: int, genome_size: int):
             gap += 1
             if not size == 0:
                 if not first_genome == []:
-                    gap_hamming = hamming(first_genome, last_genome) * len(first_genome)
+                    gap_hamming = genome_distance(first_genome, last_genome)
                     sum_cluster_sizes_hamming += gap_hamming
                     sum_cluster_sizes_hamming_squared += gap_hamming * gap_hamming
                 sum_cluster_sizes += size
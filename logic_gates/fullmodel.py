@@ -1,11 +1,6 @@
-from abc import abstractmethod, ABC
-import networkx as nx
 import numpy as np
 import random
-import matplotlib.pyplot as plt
 from logic_gates.gates import Circuit
-from multiprocessing import Pool
-from tqdm import tqdm
 import typing
 
 
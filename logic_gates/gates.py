@@ -1,9 +1,23 @@
 from abc import abstractmethod, ABC
-import networkx as nx
 import random
-import matplotlib.pyplot as plt
 from collections import defaultdict
 
+import numpy as np
+
+# networkx and matplotlib are only needed for graph analysis and plotting, so they are imported inside those methods
+# to keep worker processes that only simulate from paying for them at start-up.
+
+
+def genome_distance(genome1, genome2) -> float:
+    """
+    Number of sites at which two genomes of the same length differ (the Hamming distance, not normalized).
+
+    :param genome1: a genome as a list or array
+    :param genome2: a genome of the same length
+    :return: the number of differing sites
+    """
+    return float(np.count_nonzero(np.asarray(genome1) != np.asarray(genome2)))
+
 
 def nand(arg1: bool, arg2: bool):
     """
@@ -29,6 +43,8 @@ class Gate(ABC):
     Gates form the backbone of our circuit. This is an abstract class.
     """
 
+    __slots__ = ('passed', 'evaluated', 'value', 'contains_loop')
+
     def __init__(self):
         self.passed = False
         self.evaluated = False
@@ -60,6 +76,8 @@ class InputGate(Gate):
     Default value is False
     """
 
+    __slots__ = ()
+
     def __init__(self):
         """
         Constructs a new InputGate with default value False
@@ -93,6 +111,8 @@ class NandGate(Gate):
     exception whenever it's getValue method is called by a recursive call to getValue originating inside this nandGate.
     """
 
+    __slots__ = ('allow_loops', 'gate1', 'gate2')
+
     def __init__(self, allow_loops: bool):
         """
         Constructs a new NandGate
@@ -171,6 +191,29 @@ class Circuit:
         self.evaluated = False
         self.evaluated_dict = {}
 
+    def __getstate__(self):
+        """
+        Pickle only what defines the circuit: the gate objects, the cached graph and the per-goal fitness cache
+        (keyed by functions) are rebuilt on demand after loading.
+        """
+        return self.num_inputs, self.genome, self.allow_loops, self.use_dp, self.fitness
+
+    def __setstate__(self, state):
+        self.num_inputs, self.genome, self.allow_loops, self.use_dp, self.fitness = state
+        self.graph = None
+        if self.use_dp:
+            self.dynamic_programming_dict = {}
+        self.evaluated = False
+        self.evaluated_dict = {}
+        # inputs, gates and nand_gates are built by __getattr__ on first use
+
+    def __getattr__(self, name):
+        # only called for attributes that are missing, i.e. the gates of an unpickled circuit not yet used
+        if name in ('inputs', 'gates', 'nand_gates') and 'genome' in self.__dict__:
+            self.construct_circuit()
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
     def construct_circuit(self):
         """
         Constructs the circuit based on the genome
@@ -259,13 +302,14 @@ class Circuit:
                 cnt += 1
         return cnt
 
-    def to_networkx_graph(self, prune: bool = False) -> nx.DiGraph:
+    def to_networkx_graph(self, prune: bool = False) -> 'nx.DiGraph':
         """
         Builds a simple networkx graph for this circuit
 
         :param prune: if true only return the part of the network used in computation of the expression
         :return: a networkx graph representation of this circuit
         """
+        import networkx as nx
         adj_list = []
         for i in range(self.num_inputs):
             adj_list.append(str(i))
@@ -301,6 +345,7 @@ class Circuit:
         return g
 
     def is_isomorphic(self, network, pruned: bool = True) -> bool:
+        import networkx as nx
         graph = self.to_networkx_graph(pruned)
         other_graph = network.to_networkx_graph(pruned)
         return nx.is_isomorphic(graph, other_graph)
@@ -311,6 +356,8 @@ class Circuit:
 
         :param prune: if true then only plot the part of the network used in computation of the expression
         """
+        import networkx as nx
+        import matplotlib.pyplot as plt
         plt.subplot()
         color_dict = {'unused_input': 0, 'unused_nand': 1, 'used_input': 2, 'used_nand': 3, 'output': 4}
         g = self.to_networkx_graph(prune)
@@ -339,9 +386,7 @@ class Circuit:
 
         :return:  copy of this circuit
         """
-        copy = Circuit(self.num_inputs, self.genome[:], self.allow_loops)
-        copy.construct_circuit()
-        return copy
+        return Circuit(self.num_inputs, self.genome[:], self.allow_loops)
 
     def mutate(self, probability: float = 1, model_type: str = 'Basic', mutation_rate_prop_to_size: bool = False):
         """
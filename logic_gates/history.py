@@ -0,0 +1,161 @@
+"""
+Delta-encoded genome history of a trajectory.
+
+Consecutive genomes of a trajectory differ in at most one site, so instead
+of every genome the writer logs one (step, site, old value, new value)
+record per accepted mutation to an append-only file, plus a full keyframe
+genome every keyframe_every records to a second file (path + '.keys').
+Step indexes T: a record at step s means the genome changed between T[s-1]
+and T[s]. Values are stored as uint16 while the genome has fewer than 65536
+nodes, so a record takes 14 bytes, and steps whose mutation was rejected
+take none.
+
+GenomeHistoryReader memory-maps both files and rebuilds the genome at any
+step from the nearest keyframe, replaying records forwards (new values) or
+backwards (old values), so no lookup touches more than keyframe_every / 2
+records.
+"""
+import numpy as np
+
+_MAGIC = b'GHST'
+_HEADER = np.dtype([('magic', 'S4'), ('length', '<u4'), ('itemsize', '<u4'), ('keyframe_every', '<u4')])
+
+
+def _record_dtype(itemsize: int) -> np.dtype:
+    value = '<u2' if itemsize == 2 else '<u4'
+    return np.dtype([('step', '<u8'), ('site', value), ('old', value), ('new', value)])
+
+
+class GenomeHistory:
+    """Writer: buffers records and appends them to path, with keyframes in path + '.keys'."""
+
+    def __init__(self, path, genome_length: int, keyframe_every: int = 1024, buffer: int = 4096):
+        """
+        :param path: file for the records; path + '.keys' holds the keyframes
+        :param genome_length: L, the length of the genomes logged
+        :param keyframe_every: records between keyframes
+        :param buffer: records held in memory between writes
+        """
+        self.path = str(path)
+        self.length = genome_length
+        self.keyframe_every = keyframe_every
+        itemsize = 2 if genome_length < 2 ** 16 else 4
+        self._records = np.empty(buffer, dtype=_record_dtype(itemsize))
+        self._buffered = 0
+        self._count = 0
+        self._genome = None
+        self._file = open(self.path, 'wb')
+        self._keys = open(self.path + '.keys', 'wb')
+        header = np.zeros(1, dtype=_HEADER)
+        header[0] = (_MAGIC, genome_length, itemsize, keyframe_every)
+        self._file.write(header.tobytes())
+
+    def start(self, genome, step: int = 0):
+        """Log the starting genome as the first keyframe."""
+        self._genome = np.array(genome, dtype=np.int64)
+        if len(self._genome) != self.length:
+            raise ValueError(f"genome has length {len(self._genome)}, history was opened for {self.length}")
+        self._keyframe(step)
+
+    def record(self, step: int, site: int, old: int, new: int):
+        """Log that site changed from old to new at step; a mutation to the same value is not logged."""
+        if old == new:
+            return
+        r = self._records[self._buffered]
+        r['step'], r['site'], r['old'], r['new'] = step, site, old, new
+        self._genome[site] = new
+        self._buffered += 1
+        self._count += 1
+        if self._buffered == len(self._records):
+            self.flush()
+        if self._count % self.keyframe_every == 0:
+            self._keyframe(step)
+
+    def record_change(self, step: int, old_genome, new_genome):
+        """Log the difference between two genomes one mutation apart, for circuits that don't report their site."""
+        for site in np.flatnonzero(np.asarray(old_genome) != np.asarray(new_genome)):
+            self.record(step, int(site), int(old_genome[site]), int(new_genome[site]))
+
+    def _keyframe(self, step: int):
+        # step, records before this genome, genome
+        self._keys.write(np.concatenate(([step, self._count], self._genome)).astype('<i8').tobytes())
+
+    def flush(self):
+        self._file.write(self._records[:self._buffered].tobytes())
+        self._buffered = 0
+        self._file.flush()
+        self._keys.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            self._keys.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _apply(genome, records, field):
+    """Set each site in records to its field value from the first record that names it."""
+    if len(records):
+        sites, first = np.unique(records['site'], return_index=True)
+        genome[sites] = records[field][first]
+
+
+class GenomeHistoryReader:
+    """Random access to the genomes of a history written by GenomeHistory (once flushed or closed)."""
+
+    def __init__(self, path):
+        path = str(path)
+        header = np.fromfile(path, dtype=_HEADER, count=1)[0]
+        if header['magic'] != _MAGIC:
+            raise ValueError(f"{path} is not a genome history")
+        self.length = int(header['length'])
+        self.keyframe_every = int(header['keyframe_every'])
+        dtype = _record_dtype(int(header['itemsize']))
+        n = (np.memmap(path, dtype=np.uint8, mode='r').size - _HEADER.itemsize) // dtype.itemsize
+        self.records = (np.memmap(path, dtype=dtype, mode='r', offset=_HEADER.itemsize, shape=(n,)) if n
+                        else np.zeros(0, dtype=dtype))
+        self.keyframes = np.fromfile(path + '.keys', dtype='<i8').reshape(-1, self.length + 2)
+        if not len(self.keyframes):
+            raise ValueError(f"{path} has no starting genome")
+
+    def __len__(self):
+        """Number of records, i.e. accepted mutations."""
+        return len(self.records)
+
+    def genome_at(self, step: int) -> np.ndarray:
+        """The genome at step: after every change logged at or before it."""
+        end = int(np.searchsorted(self.records['step'], step, side='right'))
+        k = int(np.searchsorted(self.keyframes[:, 1], end, side='right')) - 1
+        genome = self.keyframes[k, 2:].copy()
+        start = int(self.keyframes[k, 1])
+        if k + 1 < len(self.keyframes) and self.keyframes[k + 1, 1] - end < end - start:
+            # closer to the next keyframe: undo records backwards from it
+            genome = self.keyframes[k + 1, 2:].copy()
+            _apply(genome, self.records[end:int(self.keyframes[k + 1, 1])], 'old')
+            return genome
+        _apply(genome, self.records[start:end][::-1], 'new')
+        return genome
+
+    def genomes_at(self, steps) -> np.ndarray:
+        """Genomes at each of steps (sorted), as a (len(steps), L) array, replaying each record at most once."""
+        steps = np.asarray(steps)
+        out = np.empty((len(steps), self.length), dtype=np.int64)
+        if not len(steps):
+            return out
+        ends = np.searchsorted(self.records['step'], steps, side='right')
+        genome = self.genome_at(int(steps[0]))
+        done = int(ends[0])
+        for i, end in enumerate(ends):
+            if end - done > self.keyframe_every:
+                genome = self.genome_at(int(steps[i]))
+            else:
+                _apply(genome, self.records[done:end][::-1], 'new')
+            done = int(end)
+            out[i] = genome
+        return out
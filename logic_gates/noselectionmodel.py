@@ -3,11 +3,13 @@ from collections import Counter
 import numpy as np
 
 from logic_gates import Circuit
+from logic_gates.gates import genome_distance
+from logic_gates.progress import PUBLISH_EVERY, publish
+from logic_gates.runlength import RunLengthTrajectory
 
-from scipy.spatial.distance import hamming
 
-
-def run_random_walk(f, N: int, mu: float, x_init: Circuit, t_max: int, m_max: int):
+def run_random_walk(f, N: int, mu: float, x_init: Circuit, t_max: int, m_max: int, rle: bool = False,
+                    history=None):
     """
     Run evolutionary dynamics with no selection (random walk).
 
@@ -18,6 +20,9 @@ def run_random_walk(f, N: int, mu: float, x_init: Circuit, t_max: int, m_max: in
       x_init - Circuit specifying the initial genotype
       t_max - max simulation time
       m_max - max number of mutations
+      rle - record fitness and computing size every step as change events: the third value returned is then a
+            RunLengthTrajectory of both and the fifth is None
+      history - a logic_gates.history.GenomeHistory to log the starting genome and every mutation to
     """
     x = x_init
     L = len(x_init.genome)
@@ -25,10 +30,16 @@ def run_random_walk(f, N: int, mu: float, x_init: Circuit, t_max: int, m_max: in
     # T is kept as a list so len(T) encodes mutation count for the parallel runner
     T = [0.0]
     mutation_counter = Counter()
+    if rle:
+        rows = 2 ** x_init.num_inputs
+        trajectory = RunLengthTrajectory(rows)
+        trajectory.record(0, round(current_fitness * rows), x_init.num_gates_computing())
+    if history is not None:
+        history.start(x_init.genome)
 
     while T[-1] < t_max and len(T) < m_max:
-        if len(T) % 2000 == 0:
-            print(str(len(T)), str(T[-1]), str(current_fitness))
+        if len(T) % PUBLISH_EVERY == 0:
+            publish(len(T), current_fitness)
         tau_next = np.random.exponential(1 / (N * mu * L))
         xm = x.duplicate()
         xm.mutate()
@@ -41,12 +52,20 @@ def run_random_walk(f, N: int, mu: float, x_init: Circuit, t_max: int, m_max: in
         else:
             mutation_counter["Negative"] += 1
         # accept every mutation (no selection)
+        if history is not None:
+            history.record_change(len(T), x.genome, xm.genome)
         x = xm
         current_fitness = new_fitness
+        if rle:
+            trajectory.record(len(T), round(current_fitness * rows), x.num_gates_computing())
         T.append(T[-1] + tau_next)
         if current_fitness == 1.0:
             break
 
+    publish(len(T), current_fitness, done=True)
+    if rle:
+        return (np.array(T), x, trajectory.finish(len(T)), mutation_counter, None,
+                genome_distance(x.genome, x_init.genome))
     F = np.array([x_init.evaluate_expression(f), current_fitness])
     C = np.array([x.num_gates_computing()])
-    return np.array(T), x, F, mutation_counter, C, hamming(x.genome, x_init.genome) * len(x.genome)
+    return np.array(T), x, F, mutation_counter, C, genome_distance(x.genome, x_init.genome)
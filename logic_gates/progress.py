@@ -0,0 +1,93 @@
+"""
+Cross-process progress telemetry for the parallel runners.
+
+Each pool worker owns one slot of a shared-memory array holding its
+cumulative mutation count and the fitness of its current trial. Models call
+publish() every PUBLISH_EVERY mutations (a couple of stores into shared
+memory, nothing is printed) and the parent polls the array to print one
+aggregate line per size with throughput, trials done and an ETA.
+
+publish() is a no-op in processes that were not started with init_worker,
+so models run standalone exactly as before.
+"""
+import multiprocessing
+import sys
+import time
+
+PUBLISH_EVERY = 1000
+
+_FIELDS = 2   # cumulative mutations, current fitness
+
+_slots = None
+_slot = 0
+_last_steps = 0
+
+
+def make_shared(n_workers: int):
+    """Shared slot array and slot allocator to pass as initargs to init_worker."""
+    return multiprocessing.RawArray('d', n_workers * _FIELDS), multiprocessing.Value('i', 0)
+
+
+def init_worker(slots, next_slot, worker_init=None):
+    """
+    Pool initializer: claim a slot in the shared array for this process, then run worker_init (if any) to
+    pre-warm the worker.
+    """
+    global _slots, _slot, _last_steps
+    with next_slot.get_lock():
+        _slot = next_slot.value % (len(slots) // _FIELDS)
+        next_slot.value += 1
+    _slots = slots
+    _last_steps = 0
+    if worker_init is not None:
+        worker_init()
+
+
+def publish(steps: int, fitness: float, done: bool = False):
+    """
+    Report that the current trial has run `steps` mutations and is at `fitness`.
+    Call with done=True once at the end of each trial.
+    """
+    global _last_steps
+    if _slots is None:
+        return
+    base = _slot * _FIELDS
+    _slots[base] += steps - _last_steps
+    _slots[base + 1] = fitness
+    _last_steps = 0 if done else steps
+
+
+class ProgressMonitor:
+    """Parent-side view of the shared slots, printing at most one line per interval."""
+
+    def __init__(self, slots, label: str, total: int, interval: float = 30.0):
+        self.slots = slots
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last = self.start
+        # a pool reused across sizes keeps counting in the same slots
+        self.steps0 = self._steps()
+
+    def _steps(self):
+        return sum(self.slots[i] for i in range(0, len(self.slots), _FIELDS))
+
+    def poll(self, trials_done: int, final: bool = False):
+        now = time.perf_counter()
+        if not final and now - self.last < self.interval:
+            return
+        self.last = now
+        elapsed = now - self.start
+        steps = self._steps() - self.steps0
+        fitness = [self.slots[i + 1] for i in range(0, len(self.slots), _FIELDS)]
+        if trials_done and not final:
+            eta = f"{elapsed / trials_done * (self.total - trials_done):.0f}s"
+        else:
+            eta = '-' if final else '?'
+        line = (f"  {self.label}  trials {trials_done}/{self.total}  {steps / max(elapsed, 1e-9):,.0f} mut/s  "
+                f"max fitness {max(fitness):.2f}  elapsed {elapsed:.0f}s  ETA {eta}")
+        if sys.stdout.isatty():
+            print('\r' + line, end='\n' if final else '', flush=True)
+        else:
+            print(line, flush=True)
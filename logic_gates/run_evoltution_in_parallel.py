@@ -1,27 +1,496 @@
 from collections import Counter
 import concurrent.futures
+import os
+import random
+from statistics import NormalDist
+
+import numpy as np
+
+from logic_gates import progress
+from logic_gates import trajectories as _trajectories
+from logic_gates.gates import Circuit
+
+def run_in_parallel_same_start(function, num_itter, size, isomorphism_counter=None, *args, stats_by_size=None,
+                               progress_interval=30.0, worker_init=None):
+    """
+    Run num_itter trials of function(*args) in a process pool.
+
+    Workers publish their progress to shared memory (see logic_gates.progress) and one aggregate line with
+    throughput and ETA is printed every progress_interval seconds; None disables it.
+
+    worker_init is called once in each worker process before its first trial, e.g.
+    functools.partial(fast_circuit.circuit.init_worker, goals=(and_funct,)) to load compiled kernels up front.
+
+    If trials return a stats dict after the usual 6 values (e.g. function=functools.partial(run_random_walk_fast,
+    instrument=True)) and stats_by_size is a dict, the stats are summed into stats_by_size[size].
+    """
+    slots, next_slot = progress.make_shared(os.cpu_count())
+    with concurrent.futures.ProcessPoolExecutor(initializer=progress.init_worker,
+                                                initargs=(slots, next_slot, worker_init)) as executor:
+        trials = _TrialResults(size, isomorphism_counter, stats_by_size)
+        monitor = progress.ProgressMonitor(slots, f"N={size}", num_itter, progress_interval or float('inf'))
+        _run_fixed(lambda: executor.submit(function, *args), num_itter, trials, monitor, progress_interval)
+        return trials.summary()
+
+
+class _TrialResults:
+    """Collects trial results into the lists the parallel runners return."""
+
+    def __init__(self, size, isomorphism_counter, stats_by_size, slabs=None):
+        self.size = size
+        self.isomorphism_counter = isomorphism_counter
+        self.stats_by_size = stats_by_size
+        self.slabs = slabs
+        self.mutations = []
+        self.times = []
+        self.final_distance = []
+        self.mutations_counter = Counter()
+        self.fitness = []
+        self.num_computing = []
+
+    def add(self, result):
+        if self.slabs is not None:
+            result = self.slabs.unpack(result)
+        mutation_times, circuit, fitness, mutation_counter, num_computing, final_distance = result[:6]
+        _add_stats(self.stats_by_size, self.size, result)
+        self.fitness.append(fitness)
+        self.num_computing.append(num_computing)
+        self.final_distance.append(final_distance)
+        if isinstance(mutation_times, (int, np.integer)):
+            # run with record_times=False: a mutation count only, times come from fast_circuit.timing
+            self.mutations.append(int(mutation_times))
+            self.times.append(float('nan'))
+        else:
+            self.mutations.append(len(mutation_times))
+            self.times.append(mutation_times[-1])
+        if fitness[-1] == 1:
+            self.mutations_counter += mutation_counter
+            if self.isomorphism_counter is not None:
+                if isinstance(circuit, np.ndarray):  # SweepPool trials send back the final genome
+                    circuit = Circuit(2, circuit.tolist())
+                self.isomorphism_counter.add(circuit, self.size)
+        else:
+            print("uh oh didnt get to full fitness")
+
+    def summary(self):
+        num_itter = len(self.mutations)
+        return self.mutations, self.times, self.final_distance, {key: value / num_itter for key, value in
+                                       self.mutations_counter.items()}, self.fitness, self.num_computing
+
+
+def _run_fixed(submit, num_itter, trials, monitor, progress_interval):
+    """Submit num_itter trials with submit() and collect them all into trials."""
+    pending = {submit() for _ in range(num_itter)}
+    while pending:
+        done, pending = concurrent.futures.wait(pending, timeout=progress_interval,
+                                                return_when=concurrent.futures.FIRST_COMPLETED)
+        for f in done:
+            trials.add(f.result())
+        monitor.poll(len(trials.mutations))
+    if progress_interval is not None:
+        monitor.poll(len(trials.mutations), final=True)
+
+
+def _add_stats(stats_by_size, size, result):
+    if stats_by_size is not None and len(result) > 6:
+        stats_by_size.setdefault(size, Counter()).update(result[6])
+
+
+def relative_half_width(values, statistic: str = 'median', confidence: float = 0.95) -> float:
+    """
+    Relative half-width of a confidence interval for a summary of values.
+
+    :param values: the samples (e.g. mutation counts per trial)
+    :param statistic: 'median' — distribution-free interval from order statistics, divided by the median;
+        'log_mean' — normal interval for the mean of log(values), reported as the multiplicative error exp(hw) - 1
+    :param confidence: the confidence level of the interval
+    :return: the relative half-width, inf if there are too few samples
+    """
+    values = np.sort(np.asarray(values, dtype=float))
+    n = len(values)
+    if n < 2:
+        return float('inf')
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    if statistic == 'median':
+        lo = int(np.floor(n / 2 - z * np.sqrt(n) / 2))
+        hi = int(np.ceil(n / 2 + z * np.sqrt(n) / 2))
+        if lo < 0 or hi >= n:
+            return float('inf')
+        median = np.median(values)
+        return (values[hi] - values[lo]) / 2 / median if median > 0 else float('inf')
+    if statistic == 'log_mean':
+        logs = np.log(values)
+        return float(np.expm1(z * logs.std(ddof=1) / np.sqrt(n)))
+    raise ValueError("statistic must be 'median' or 'log_mean'")
+
+
+def run_in_parallel_until_precise(function, rel_precision, size, isomorphism_counter=None, *args,
+                                  statistic='median', confidence=0.95, min_itter=20, max_itter=500,
+                                  num_in_flight=None, stats_by_size=None, progress_interval=30.0,
+                                  worker_init=None):
+    """
+    Like run_in_parallel_same_start, but instead of a fixed number of trials keeps scheduling trials until the
+    confidence interval of the number of mutations is tight enough, or max_itter trials have been run.
+
+    :param rel_precision: target relative half-width, see relative_half_width
+    :param statistic: 'median' or 'log_mean'
+    :param confidence: confidence level of the interval
+    :param min_itter: never stop before this many trials
+    :param max_itter: never run more than this many trials
+    :param num_in_flight: trials kept queued at once, defaults to the number of CPUs
+    :param stats_by_size: see run_in_parallel_same_start
+    :param progress_interval: see run_in_parallel_same_start; the ETA assumes max_itter trials
+    :param worker_init: see run_in_parallel_same_start
+    :return: the six lists of run_in_parallel_same_start, followed by a dict describing the achieved precision
+    """
+    slots, next_slot = progress.make_shared(os.cpu_count())
+    with concurrent.futures.ProcessPoolExecutor(initializer=progress.init_worker,
+                                                initargs=(slots, next_slot, worker_init)) as executor:
+        trials = _TrialResults(size, isomorphism_counter, stats_by_size)
+        monitor = progress.ProgressMonitor(slots, f"N={size}", max_itter, progress_interval or float('inf'))
+        precision_info = _run_adaptive(lambda: executor.submit(function, *args), rel_precision, trials, monitor,
+                                       progress_interval, statistic, confidence, min_itter, max_itter,
+                                       num_in_flight or os.cpu_count())
+    return trials.summary() + (precision_info,)
+
+
+def _run_adaptive(submit, rel_precision, trials, monitor, progress_interval, statistic, confidence, min_itter,
+                  max_itter, num_in_flight):
+    """Keep num_in_flight trials queued until the precision target or max_itter is reached."""
+    precision = float('inf')
+    pending = {submit() for _ in range(min(num_in_flight, max_itter))}
+    submitted = len(pending)
+    met = False
+    while pending:
+        done, pending = concurrent.futures.wait(pending, timeout=progress_interval,
+                                                return_when=concurrent.futures.FIRST_COMPLETED)
+        for f in done:
+            trials.add(f.result())
+        precision = relative_half_width(trials.mutations, statistic, confidence)
+        met = met or (len(trials.mutations) >= min_itter and precision <= rel_precision)
+        # trials already running are kept, they cost nothing extra to collect
+        while not met and submitted < max_itter and len(pending) < num_in_flight:
+            pending.add(submit())
+            submitted += 1
+        monitor.poll(len(trials.mutations))
+    if progress_interval is not None:
+        monitor.poll(len(trials.mutations), final=True)
+    return _precision_info(len(trials.mutations), precision, rel_precision, statistic, confidence)
+
+
+def _precision_info(num_itter, precision, rel_precision, statistic, confidence, label=''):
+    print(f"  {label}{num_itter} trials, {statistic} relative half-width {precision:.4f} (target {rel_precision})")
+    return {'statistic': statistic, 'confidence': confidence, 'target': rel_precision,
+            'rel_half_width': precision, 'num_trials': num_itter, 'met': precision <= rel_precision}
+
+
+def fit_trial_cost(sizes, costs):
+    """
+    Power law cost(size, goal) = a * size**k fitted in log space to per-trial costs measured at some sizes, e.g.
+    seconds per trial from a benchmark, or median mutations of an earlier run times size (each mutation is O(size)).
+    Only the ordering matters to SweepPool.run_grid, so any unit will do.
+    """
+    k, log_a = np.polyfit(np.log(sizes), np.log(costs), 1)
+    return lambda size, goal=None: float(np.exp(log_a) * size ** k)
+
+
+def _default_trial_cost(size, goal=None):
+    # mutations to reach the goal grow roughly linearly in size (figS1: ~N^0.86) and each one is O(size)
+    return float(size) ** 2
+
+
+class SweepPool:
+    """
+    One warm process pool for a whole sweep over sizes, goals and models.
+
+    The per-size runners above start a new pool for every call and pickle the whole initial Circuit into every
+    task. Here workers start once (running worker_init once each) and every trial is submitted as a compact
+    (function, genome array, goal id, params, seed) tuple; workers rebuild the circuit themselves and send back the
+    final genome instead of the final circuit object.
+
+    goals maps ids to goal functions (e.g. goals.GOALS) and is sent to each worker once. params are the model's
+    (N, mu, t_max, m_max). Trial seeds are drawn from np.random.SeedSequence(seed) in submission order, so a sweep
+    with a fixed seed is reproducible.
+
+    With trajectories=True (or a file path) workers write the T, F and C arrays of each trial into shared slabs
+    instead of pickling them back, and the results hold read-only views of those slabs (see
+    logic_gates.trajectories). A temporary backing file is removed on close(); views already returned stay valid.
+
+        with SweepPool(GOALS, worker_init=partial(init_worker, goals=(and_funct,))) as pool:
+            for size in sizes:
+                results = pool.run_same_start(run_random_walk_fast, 100, size, construct_genome(size), 'and',
+                                              (1000, 0.001, 1e15, 2_000_000))
+    """
+
+    def __init__(self, goals, max_workers=None, worker_init=None, progress_interval=30.0, trajectories=None):
+        self.max_workers = max_workers or os.cpu_count()
+        self.progress_interval = progress_interval
+        self._slabs = None
+        if trajectories:
+            self._slabs = _trajectories.TrajectorySlabs(None if trajectories is True else trajectories)
+        self._slots, next_slot = progress.make_shared(self.max_workers)
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_init_sweep_worker,
+            initargs=(dict(goals), self._slots, next_slot, worker_init))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+        if self._slabs is not None:
+            self._slabs.close()
+
+    def run_same_start(self, function, num_itter, size, genome, goal, params, isomorphism_counter=None, seed=None,
+                       stats_by_size=None):
+        """
+        Like run_in_parallel_same_start, for num_itter trials of function from genome towards the goal with id goal.
+        genome may also be a Circuit or FastCircuit.
+        """
+        trials = _TrialResults(size, isomorphism_counter, stats_by_size, self._slabs)
+        monitor = progress.ProgressMonitor(self._slots, f"N={size}", num_itter,
+                                           self.progress_interval or float('inf'))
+        _run_fixed(self._submitter(function, genome, goal, params, seed), num_itter, trials,
+                   monitor, self.progress_interval)
+        return trials.summary()
+
+    def run_until_precise(self, function, rel_precision, size, genome, goal, params, isomorphism_counter=None,
+                          seed=None, statistic='median', confidence=0.95, min_itter=20, max_itter=500,
+                          num_in_flight=None, stats_by_size=None):
+        """Like run_in_parallel_until_precise, with trials submitted as in run_same_start."""
+        trials = _TrialResults(size, isomorphism_counter, stats_by_size, self._slabs)
+        monitor = progress.ProgressMonitor(self._slots, f"N={size}", max_itter,
+                                           self.progress_interval or float('inf'))
+        precision_info = _run_adaptive(self._submitter(function, genome, goal, params, seed),
+                                       rel_precision, trials, monitor, self.progress_interval, statistic,
+                                       confidence, min_itter, max_itter, num_in_flight or self.max_workers)
+        return trials.summary() + (precision_info,)
+
+    def run_hitting_times(self, num_itter, size, genome, goals, params, seed=None, record_times=True):
+        """
+        num_itter fast random walks from genome, each recording the first hit of every goal in goals (None for
+        all 16 two-input functions), see fast_circuit.models.run_random_walk_hitting_times.
+
+        :return: {goal name: (mutations array, times array)} over the trials that hit that goal
+        """
+        from fast_circuit.models import hitting_times_by_goal
+
+        genome = np.asarray(getattr(genome, 'genome', genome), dtype=np.int32)
+        seeds = _trial_seeds(seed)
+        goals = None if goals is None else tuple(goals)
+        monitor = progress.ProgressMonitor(self._slots, f"N={size}", num_itter,
+                                           self.progress_interval or float('inf'))
+        pending = {self._executor.submit(_run_hitting_task,
+                                         (genome, goals, tuple(params), next(seeds), record_times))
+                   for _ in range(num_itter)}
+        trials = []
+        while pending:
+            done, pending = concurrent.futures.wait(pending, timeout=self.progress_interval,
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+            trials.extend(f.result() for f in done)
+            monitor.poll(len(trials))
+        if self.progress_interval is not None:
+            monitor.poll(len(trials), final=True)
+        return hitting_times_by_goal(trials)
+
+    def _submitter(self, function, genome, goal, params, seed):
+        genome = np.asarray(getattr(genome, 'genome', genome), dtype=np.int32)
+        seeds = _trial_seeds(seed)
+
+        def submit():
+            trial_seed = next(seeds)
+            slab = self._slabs.reserve(int(params[3]) + 1) if self._slabs is not None else None
+            return self._executor.submit(_run_task, (function, genome, goal, tuple(params), trial_seed, slab))
+        return submit
+
+    def run_grid(self, jobs, cost=None, on_complete=None):
+        """
+        Run a whole grid of GridJobs (e.g. every goal x size of a sweep) at once, scheduling trials
+        longest-expected-first.
+
+        Trials wait in one central queue and are handed to workers only as workers free up, so an idle worker
+        always takes the most expensive remaining trial of any job (list scheduling; the pool never commits trials
+        to a busy worker, so there is nothing to steal back). The big sizes start first and the cheap ones fill
+        the gaps, instead of most of the pool idling on the last long trials of each size.
+
+        :param jobs: iterable of GridJob
+        :param cost: cost(size, goal) -> expected relative cost of one trial, see fit_trial_cost;
+            defaults to size ** 2
+        :param on_complete: called as on_complete(job, result) as soon as each job finishes, e.g. to save that
+            size's results while the rest of the grid is still running
+        :return: dict job.key -> result, as returned by run_same_start (fixed jobs) or run_until_precise
+            (adaptive jobs)
+        """
+        cost = cost or _default_trial_cost
+        jobs = sorted(jobs, key=lambda job: -cost(job.size, job.goal))
+        for job in jobs:
+            job._start(self._submitter(job.function, job.genome, job.goal, job.params, job.seed), self._slabs)
+        monitor = progress.ProgressMonitor(self._slots, "grid", sum(job.max_trials for job in jobs),
+                                           self.progress_interval or float('inf'))
+        results = {}
+        running = {}
+        trials_done = 0
+
+        def fill():
+            for job in jobs:
+                while len(running) < self.max_workers and job._wants_trial():
+                    running[job._submit_trial()] = job
+                if len(running) >= self.max_workers:
+                    return
+
+        fill()
+        while running:
+            done, _ = concurrent.futures.wait(running, timeout=self.progress_interval,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for f in done:
+                job = running.pop(f)
+                job._add(f.result())
+                trials_done += 1
+                if job._finished():
+                    results[job.key] = job._result()
+                    if on_complete is not None:
+                        on_complete(job, results[job.key])
+            fill()
+            monitor.poll(trials_done)
+        if self.progress_interval is not None:
+            monitor.poll(trials_done, final=True)
+        return results
+
+
+class GridJob:
+    """
+    One cell of a sweep grid for SweepPool.run_grid: num_itter trials of function at size, or, with rel_precision
+    set, trials until the precision target or max_itter as in run_until_precise (an adaptive job keeps up to
+    min_itter trials queued at a time).
+
+    key identifies the job in the results (default (goal, size)); the other arguments are as for
+    SweepPool.run_same_start and run_until_precise.
+    """
+
+    def __init__(self, function, size, genome, goal, params, num_itter=None, rel_precision=None,
+                 isomorphism_counter=None, seed=None, statistic='median', confidence=0.95, min_itter=20,
+                 max_itter=500, stats_by_size=None, key=None):
+        if (num_itter is None) == (rel_precision is None):
+            raise ValueError("give exactly one of num_itter and rel_precision")
+        if (num_itter if rel_precision is None else max_itter) < 1:
+            # run_grid reports a job when its last trial comes back, so a job with no trials would never finish
+            raise ValueError("a grid job needs at least one trial")
+        self.function = function
+        self.size = size
+        self.genome = genome
+        self.goal = goal
+        self.params = params
+        self.num_itter = num_itter
+        self.rel_precision = rel_precision
+        self.isomorphism_counter = isomorphism_counter
+        self.seed = seed
+        self.statistic = statistic
+        self.confidence = confidence
+        self.min_itter = min_itter
+        self.max_itter = max_itter
+        self.stats_by_size = stats_by_size
+        self.key = key if key is not None else (goal, size)
+
+    @property
+    def max_trials(self):
+        return self.num_itter if self.rel_precision is None else self.max_itter
+
+    def _start(self, submit, slabs):
+        self._submit = submit
+        self._trials = _TrialResults(self.size, self.isomorphism_counter, self.stats_by_size, slabs)
+        self._submitted = 0
+        self._precision = float('inf')
+        self._met = False
+
+    def _wants_trial(self):
+        if self.rel_precision is None:
+            return self._submitted < self.num_itter
+        outstanding = self._submitted - len(self._trials.mutations)
+        return not self._met and self._submitted < self.max_itter and outstanding < self.min_itter
+
+    def _submit_trial(self):
+        self._submitted += 1
+        return self._submit()
+
+    def _add(self, result):
+        self._trials.add(result)
+        if self.rel_precision is not None:
+            self._precision = relative_half_width(self._trials.mutations, self.statistic, self.confidence)
+            self._met = self._met or (len(self._trials.mutations) >= self.min_itter and
+                                      self._precision <= self.rel_precision)
+
+    def _finished(self):
+        return self._submitted == len(self._trials.mutations) and not self._wants_trial()
+
+    def _result(self):
+        if self.rel_precision is None:
+            return self._trials.summary()
+        return self._trials.summary() + (_precision_info(len(self._trials.mutations), self._precision,
+                                                         self.rel_precision, self.statistic, self.confidence,
+                                                         f"{self.key}: "),)
+
+
+def _trial_seeds(seed):
+    """Independent trial seeds spawned from np.random.SeedSequence(seed), in submission order."""
+    seeds = np.random.SeedSequence(seed)
+    while True:
+        yield int(seeds.spawn(1)[0].generate_state(1)[0])
+
+
+_GOALS = {}
+
+
+def _init_sweep_worker(goals, slots, next_slot, worker_init):
+    _GOALS.update(goals)
+    progress.init_worker(slots, next_slot, worker_init)
+
+
+def _goal(goal_id):
+    """The goal registered under goal_id in the pool's goals mapping."""
+    try:
+        return _GOALS[goal_id]
+    except KeyError:
+        raise KeyError(f"unknown goal id {goal_id!r}, not in the SweepPool's goals") from None
+
+
+def _initial_circuit(function, genome):
+    """FastCircuit for the fast_circuit models, Circuit for the original ones."""
+    model = getattr(function, 'func', function)
+    if model.__module__.startswith('fast_circuit'):
+        from fast_circuit.circuit import FastCircuit
+        return FastCircuit(genome)
+    return Circuit(2, genome.tolist())
+
+
+def _run_task(task):
+    """
+    Run one SweepPool trial in a worker; the final circuit comes back as its genome and, with a slab reserved,
+    the trajectories as SlabRefs.
+    """
+    function, genome, goal, params, seed, slab = task
+    random.seed(seed)
+    np.random.seed(seed)
+    N, mu, t_max, m_max = params
+    result = function(_goal(goal), N, mu, _initial_circuit(function, genome), t_max, m_max)
+    result = (result[0], np.asarray(result[1].genome, dtype=np.int32)) + tuple(result[2:])
+    if slab is not None:
+        result = _trajectories.write(slab, result)
+    return result
+
+
+def _run_hitting_task(task):
+    """Run one SweepPool.run_hitting_times walk in a worker and return its hits."""
+    from fast_circuit.models import run_random_walk_hitting_times
+
+    genome, goals, params, seed, record_times = task
+    random.seed(seed)
+    np.random.seed(seed)
+    N, mu, t_max, m_max = params
+    goals = None if goals is None else [_goal(g) for g in goals]
+    hits, _ = run_random_walk_hitting_times(goals, N, mu, _initial_circuit(run_random_walk_hitting_times, genome),
+                                            t_max, m_max, record_times)
+    return hits
 
-def run_in_parallel_same_start(function, num_itter, size, isomorphism_counter=None, *args):
-    total_times = []
-    total_mutations = []
-    total_final_distance = []
-    total_mutations_counter = Counter()
-    big_fitness_list = []
-    big_num_computing_list = []
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        future_results = [executor.submit(function, *args) for _ in range(num_itter)]
-        for f in concurrent.futures.as_completed(future_results):
-            mutation_times, circuit, fitness, mutation_counter, num_computing, final_distance = f.result()
-            big_fitness_list.append(fitness)
-            big_num_computing_list.append(num_computing)
-            total_mutations.append(len(mutation_times))
-            total_final_distance.append(final_distance)
-            total_times.append(mutation_times[-1])
-            if fitness[-1] == 1:
-                total_mutations_counter += mutation_counter
-                if isomorphism_counter is not None:
-                    isomorphism_counter.add(circuit, size)
-            else:
-                print("uh oh didnt get to full fitness")
-        return total_mutations, total_times, total_final_distance, {key: value / num_itter for key, value in
-                                              total_mutations_counter.items()}, big_fitness_list, big_num_computing_list
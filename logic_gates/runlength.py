@@ -0,0 +1,87 @@
+"""
+Run-length-encoded fitness and computing-size trajectories.
+
+For a two-input goal fitness is one of five values (0, 1/4, ..., 1) and it,
+like the number of computing gates, changes only a handful of times in a
+trajectory of millions of steps. Models run with rle=True record only the
+changes, as (step, correct rows, computing gates) events, where step
+indexes T. Fitness is stored as the integer number of correct input rows,
+so comparisons are exact.
+"""
+import numpy as np
+
+
+class RunLengthTrajectory:
+    """
+    Change events of one trial. Event i says that from step steps[i] until the next event the circuit got
+    correct[i] of the rows right and had computing[i] computing nodes (as Circuit.num_gates_computing).
+    """
+
+    __slots__ = ('steps', 'correct', 'computing', 'length', 'rows')
+
+    def __init__(self, rows: int = 4):
+        self.steps = []
+        self.correct = []
+        self.computing = []
+        self.length = 0
+        self.rows = rows
+
+    def record(self, step: int, correct: int, computing: int):
+        """Note the state at step; stored only if it differs from the last event."""
+        if not self.steps or correct != self.correct[-1] or computing != self.computing[-1]:
+            self.steps.append(step)
+            self.correct.append(correct)
+            self.computing.append(computing)
+
+    def finish(self, length: int):
+        """Close the trajectory at length steps (len(T)) and store the events as compact arrays."""
+        self.length = length
+        self.steps = np.array(self.steps, dtype=np.int64)
+        self.correct = np.array(self.correct, dtype=np.int8)
+        self.computing = np.array(self.computing, dtype=np.int32)
+        return self
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, step):
+        """Fitness at step (an index or slice, negative from the end), as F[step] of the full trajectory."""
+        step = range(self.length)[step]   # bounds and negative indices as for F
+        return self.correct[np.searchsorted(self.steps, step, side='right') - 1] / self.rows
+
+    def __eq__(self, other):
+        if not isinstance(other, RunLengthTrajectory):
+            return NotImplemented
+        return (self.length == other.length and self.rows == other.rows
+                and np.array_equal(self.steps, other.steps) and np.array_equal(self.correct, other.correct)
+                and np.array_equal(self.computing, other.computing))
+
+    def __repr__(self):
+        return f"RunLengthTrajectory({len(self.steps)} events over {self.length} steps)"
+
+    def _run_lengths(self):
+        return np.diff(np.append(self.steps, self.length))
+
+    def fitness(self) -> np.ndarray:
+        """Per-step fitness, the F array of a full trajectory."""
+        return np.repeat(self.correct / self.rows, self._run_lengths())
+
+    def computing_sizes(self) -> np.ndarray:
+        """Per-step computing size, from step 0 (the full-trajectory C array starts at step 1)."""
+        return np.repeat(self.computing, self._run_lengths())
+
+    def iter_runs(self):
+        """Yield (start step, end step, correct rows, computing gates) for each run, without expanding."""
+        ends = np.append(self.steps[1:], self.length)
+        for start, end, correct, computing in zip(self.steps, ends, self.correct, self.computing):
+            yield int(start), int(end), int(correct), int(computing)
+
+    def dwell_steps(self) -> np.ndarray:
+        """Steps spent at each fitness level: entry k counts steps with k correct rows."""
+        return np.bincount(self.correct, weights=self._run_lengths(), minlength=self.rows + 1).astype(np.int64)
+
+    def dwell_times(self, T) -> np.ndarray:
+        """Time spent at each fitness level, given the trial's T; the levels add up to T[-1]."""
+        T = np.asarray(T)
+        ends = np.append(self.steps[1:], self.length - 1)
+        return np.bincount(self.correct, weights=T[ends] - T[self.steps], minlength=self.rows + 1)
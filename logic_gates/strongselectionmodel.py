@@ -1,10 +1,13 @@
 import numpy as np
 from collections import Counter
 from logic_gates import Circuit
-from scipy.spatial.distance import hamming
+from logic_gates.gates import genome_distance
+from logic_gates.progress import PUBLISH_EVERY, publish
+from logic_gates.runlength import RunLengthTrajectory
 
 
-def run_evolution_strong_selection(f, N: int, mu: float, x_init: Circuit, t_max: int, m_max: int):
+def run_evolution_strong_selection(f, N: int, mu: float, x_init: Circuit, t_max: int, m_max: int,
+                                   rle: bool = False, history=None):
     """
     Run evolutionary dynanamics in strong selection weak mutation regime.
 
@@ -15,12 +18,21 @@ def run_evolution_strong_selection(f, N: int, mu: float, x_init: Circuit, t_max:
       x_init - array of length L specifying the initial genome
       t_max - the time to run the simulation
       m_max - max number of mutations
+      rle - record F and C as change events: the third value returned is then a RunLengthTrajectory of both
+            and the fifth is None
+      history - a logic_gates.history.GenomeHistory to log the starting genome and every accepted mutation to
     """
     p = 0
     n = 0
     T = [0.0]
     F = [x_init.evaluate_expression(f)]
     C = [] #C is the number of computing nodes
+    if rle:
+        rows = 2 ** x_init.num_inputs
+        trajectory = RunLengthTrajectory(rows)
+        trajectory.record(0, round(F[0] * rows), x_init.num_gates_computing())
+    if history is not None:
+        history.start(x_init.genome)
     mutation_counter = Counter()
     #X = [x_init]
     x = x_init
@@ -28,8 +40,8 @@ def run_evolution_strong_selection(f, N: int, mu: float, x_init: Circuit, t_max:
     neutral = 0
     neutral_fix = 0
     while T[-1] < t_max and len(T) < m_max:
-        if len(T) % 10000 == 0:
-            print('\t', str(len(T)), str(T[-1]), str(F[-1]))
+        if len(T) % PUBLISH_EVERY == 0:
+            publish(len(T), F[-1])
         tau_next = np.random.exponential(1 / (N * mu * L))
         xm = x.duplicate()
         xm.mutate()
@@ -51,6 +63,8 @@ def run_evolution_strong_selection(f, N: int, mu: float, x_init: Circuit, t_max:
             neutral += 1
         r = np.random.rand()
         if r < pfix:
+            if history is not None:
+                history.record_change(len(T), x.genome, xm.genome)
             x = xm.duplicate()
             if s == 0:
                 mutation_counter["Neutral"] += 1
@@ -60,10 +74,18 @@ def run_evolution_strong_selection(f, N: int, mu: float, x_init: Circuit, t_max:
             elif s < 0:
                 mutation_counter["Negative"] += 1
         # update
-        C.append(x.num_gates_computing())
-        F.append(x.evaluate_expression(f))
+        if rle:
+            F[-1] = x.evaluate_expression(f)
+            trajectory.record(len(T), round(F[-1] * rows), x.num_gates_computing())
+        else:
+            C.append(x.num_gates_computing())
+            F.append(x.evaluate_expression(f))
         #X.append(x)
         T.append(T[-1] + tau_next)
         if F[-1] == 1.0:
             break
-    return np.array(T), x, np.array(F), mutation_counter, np.array(C), hamming(x.genome, x_init.genome) * len(x.genome)
+    publish(len(T), F[-1], done=True)
+    if rle:
+        return (np.array(T), x, trajectory.finish(len(T)), mutation_counter, None,
+                genome_distance(x.genome, x_init.genome))
+    return np.array(T), x, np.array(F), mutation_counter, np.array(C), genome_distance(x.genome, x_init.genome)
@@ -0,0 +1,103 @@
+"""
+Shared-memory return path for trial trajectories.
+
+A trial's T, F and C arrays can be millions of entries long, and returned
+through the executor they are pickled in the worker, piped to the parent and
+unpickled again. With SweepPool(goals, trajectories=True) the parent instead
+reserves one slab per trajectory in a sparse file (under /dev/shm when it
+exists, so the pages live in shared memory), the worker copies its finished
+arrays into those slabs, and only (offset, length, dtype) references come
+back. The parent wraps them as read-only NumPy views of one mapping of the
+file.
+
+This removes the pickle, the pipe and the parent's unpickled copy; it does not
+lower a worker's peak memory, since the models still build each trajectory in
+full and it is copied once, after the trial ends.
+
+Slabs are sized for m_max + 1 entries of each of T, F and C whether a trial
+uses them or not, but the file is sparse: pages a trial never writes take no
+memory, only file size and address space.
+"""
+from collections import namedtuple
+import os
+import tempfile
+
+import numpy as np
+
+# positions of the trajectories in a model's result tuple: T, F, C
+FIELDS = (0, 2, 4)
+
+_ITEMSIZE = 8
+_ALIGN = 64
+
+SlabRef = namedtuple('SlabRef', ['offset', 'length', 'dtype'])
+
+
+class TrajectorySlabs:
+    """Parent side: reserves slabs in the backing file and turns SlabRefs back into arrays."""
+
+    def __init__(self, path=None):
+        """
+        :param path: backing file, kept after close(); None for a temporary file in /dev/shm (or the temp
+            directory) that is removed on close()
+        """
+        self.temporary = path is None
+        if self.temporary:
+            shm = '/dev/shm' if os.path.isdir('/dev/shm') else None
+            fd, path = tempfile.mkstemp(prefix='trajectories-', suffix='.bin', dir=shm)
+            os.close(fd)
+        else:
+            open(path, 'wb').close()
+        self.path = path
+        self.end = 0
+        self._map = None
+
+    def reserve(self, capacity: int):
+        """Reserve a slab of capacity entries for each trajectory of one trial; returns the spec for write()."""
+        nbytes = -(-capacity * _ITEMSIZE // _ALIGN) * _ALIGN
+        offsets = tuple(self.end + i * nbytes for i in range(len(FIELDS)))
+        self.end += nbytes * len(FIELDS)
+        os.truncate(self.path, self.end)
+        return self.path, offsets, capacity
+
+    def unpack(self, result):
+        """Replace the SlabRefs in a trial result with read-only views of the slabs."""
+        result = list(result)
+        for field in FIELDS:
+            ref = result[field]
+            if isinstance(ref, SlabRef):
+                dtype = np.dtype(ref.dtype)
+                end = ref.offset + ref.length * dtype.itemsize
+                if self._map is None or len(self._map) < end:
+                    # remap the grown file; views handed out earlier keep the old mapping alive
+                    self._map = np.memmap(self.path, dtype=np.uint8, mode='r')
+                result[field] = self._map[ref.offset:end].view(dtype)
+        return tuple(result)
+
+    def close(self):
+        """Drop the parent's mapping and remove a temporary file; arrays already unpacked stay readable."""
+        self._map = None
+        if self.temporary and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def write(slab, result):
+    """
+    Worker side: write the trajectories of result into the slabs reserved by TrajectorySlabs.reserve and
+    return result with SlabRefs in their place. Anything that doesn't fit (not an array, longer than the slab,
+    wider than 8 bytes per entry) is returned as it is.
+    """
+    path, offsets, capacity = slab
+    result = list(result)
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        for field, offset in zip(FIELDS, offsets):
+            values = result[field]
+            if (not isinstance(values, np.ndarray) or values.ndim != 1 or not 0 < len(values) <= capacity
+                    or values.dtype.hasobject or values.dtype.itemsize > _ITEMSIZE):
+                continue
+            os.pwrite(fd, memoryview(np.ascontiguousarray(values)).cast('B'), offset)
+            result[field] = SlabRef(offset, len(values), values.dtype.str)
+    finally:
+        os.close(fd)
+    return tuple(result)
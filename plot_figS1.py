@@ -55,7 +55,10 @@ ax.set_title('Linear scale', fontsize=12)
 ax.legend(fontsize=9)
 ax.grid(True, alpha=0.3)
 
-fig.suptitle('Fig S1 — Random walk to AND (500 trials per N)', fontsize=13, y=1.01)
+trial_counts = sorted({len(m) for m in load('all_mutations')})
+trials_label = (f'{trial_counts[0]} trials per N' if len(trial_counts) == 1
+                else f'{trial_counts[0]}–{trial_counts[-1]} trials per N')
+fig.suptitle(f'Fig S1 — Random walk to AND ({trials_label})', fontsize=13, y=1.01)
 fig.tight_layout()
 fig.savefig('figS1.png', dpi=150, bbox_inches='tight')
 print(f"Saved figS1.png  (N={sizes.tolist()})")
@@ -1,11 +1,11 @@
 import pickle
 from logic_gates import run_evolution_strong_selection, run_random_walk, Circuit, IsomorphismCounter, \
-    run_in_parallel_same_start, find_clusters_rw
+    SweepPool, find_clusters_rw
 import matplotlib.pyplot as plt
 import numpy as np
 from collections import defaultdict, Counter
 from tqdm.notebook import tqdm
-from goals import and_funct, or_funct, xnor_funct, xor_funct, nor_funct
+from goals import GOALS, goal_id, and_funct, or_funct, xnor_funct, xor_funct, nor_funct
 import concurrent.futures
 
 
@@ -17,6 +17,18 @@ def construct_genome(size: int) -> list:
     return genome
 
 
+def run_trials(pool, function, num_trials, size, isomorphism_counter, rel_precision, goal, params):
+    """
+    Fixed num_trials if rel_precision is None, otherwise adaptive with num_trials as the cap.
+    Returns the results of SweepPool.run_same_start plus the achieved precision (None when fixed).
+    """
+    genome = construct_genome(size)
+    if rel_precision is None:
+        return pool.run_same_start(function, num_trials, size, genome, goal, params, isomorphism_counter) + (None,)
+    return pool.run_until_precise(function, rel_precision, size, genome, goal, params, isomorphism_counter,
+                                  max_itter=num_trials)
+
+
 def dump_data(data, filename):
     with open('experiment_data/' + filename + '.pickle', 'wb') as f:
         pickle.dump(data, f)
@@ -58,20 +70,30 @@ class DataFromExperiment:
         self.cluster_gaps = {}
         self.cluster_sizes_hamming = {}
         self.cluster_gaps_hamming = {}
+        self.precision = {}
+        self.precision_random = {}
 
     def __repr__(self):
         return 'Title: ' + self.title + " for sizes " + self.sizes
 
 
-def run_experiment(title, logic_function, network_sizes, num_trials, find_clusters=False, random_walk=False):
+def run_experiment(title, logic_function, network_sizes, num_trials, find_clusters=False, random_walk=False,
+                   rel_precision=None, pool=None):
+    """pool: a SweepPool to run the trials on, shared between experiments; a new one is started if None."""
+    if pool is None:
+        with SweepPool(GOALS) as pool:
+            return run_experiment(title, logic_function, network_sizes, num_trials, find_clusters, random_walk,
+                                  rel_precision, pool)
     data = DataFromExperiment(title, logic_function, network_sizes, num_trials)
+    goal = goal_id(logic_function)
+    params = (1000, 0.001, 100000, 900000)
     for size in network_sizes:
         print(size)
-        initial_circuit = Circuit(2, construct_genome(size))
-        mutations, times, distance, mutation_types, fitness_trajs, num_computing_trajs = run_in_parallel_same_start(
-            run_evolution_strong_selection, num_trials, size,
-            data.isomorphism_counter, logic_function, 1000, 0.001, initial_circuit, 100000, 900000)
+        mutations, times, distance, mutation_types, fitness_trajs, num_computing_trajs, precision = run_trials(
+            pool, run_evolution_strong_selection, num_trials, size, data.isomorphism_counter, rel_precision, goal,
+            params)
         print(fitness_trajs[0][0])
+        data.precision[size] = precision
         data.mutation_types_list.append(mutation_types)
         data.fitness_traj[size] = fitness_trajs
         data.num_computing_traj[size] = num_computing_trajs
@@ -88,9 +110,10 @@ def run_experiment(title, logic_function, network_sizes, num_trials, find_cluste
         data.stds_mutations.append(mutations_array.std())
         data.medians_mutations.append(np.median(mutations_array))
         if random_walk:
-            mutations_random, times_random, distance_random, mutation_types_random, fitness_trajs_random, num_computing_trajs_random = run_in_parallel_same_start(
-                run_evolution_strong_selection, num_trials, size,
-                data.isomorphism_counter_random, logic_function, 1000, 0.001, initial_circuit, 100000, 900000)
+            mutations_random, times_random, distance_random, mutation_types_random, fitness_trajs_random, num_computing_trajs_random, precision_random = run_trials(
+                pool, run_evolution_strong_selection, num_trials, size, data.isomorphism_counter_random,
+                rel_precision, goal, params)
+            data.precision_random[size] = precision_random
             data.mutation_types_list_random.append(mutation_types_random)
             data.fitness_traj_random[size] = fitness_trajs_random
             data.num_computing_traj_random[size] = num_computing_trajs_random
@@ -144,13 +167,15 @@ if __name__ == "__main__":
                    [3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 20, 40, 60, 80, 100, 200, 300, 400, 500, 1000], 100,
                    find_clusters=False, random_walk=True)
     '''
-    # 0.25 starting fitness
-    run_experiment('xnor', xnor_funct,
-                   [5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 20, 40, 60, 80, 100, 200, 300], 20,
-                   find_clusters=False, random_walk=True)
-    # 0.75 starting fitness
-    run_experiment('xor', xor_funct,
-                   [4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 20, 40, 60, 80, 100, 200, 300], 20,
-                   find_clusters=False, random_walk=True)
+    # one warm pool for both experiments
+    with SweepPool(GOALS) as pool:
+        # 0.25 starting fitness
+        run_experiment('xnor', xnor_funct,
+                       [5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 20, 40, 60, 80, 100, 200, 300], 20,
+                       find_clusters=False, random_walk=True, pool=pool)
+        # 0.75 starting fitness
+        run_experiment('xor', xor_funct,
+                       [4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 20, 40, 60, 80, 100, 200, 300], 20,
+                       find_clusters=False, random_walk=True, pool=pool)
 
 
@@ -5,17 +5,25 @@ Starting from the simple initial network (fig 3A — each gate takes I1 and I2
 as inputs, output connected to gate 1), evolves to AND with no selection pressure.
 Every mutation is accepted regardless of fitness change.
 
+Trials are scheduled per size until the median number of mutations is known
+to within rel_precision (95% CI half-width), capped at max_trials, so cheap
+small sizes stop early and the budget goes to the sizes that need it. All
+sizes share one worker pool and the most expensive trials are started first.
+
 Results saved to figS1_data/. Already-computed sizes are skipped so runs can
 be extended incrementally.
 """
 import os
 import pickle
+from functools import partial
+
 import numpy as np
 
-from logic_gates import Circuit, run_in_parallel_same_start
+from logic_gates import SweepPool, GridJob
+from logic_gates.run_evoltution_in_parallel import fit_trial_cost
 from fast_circuit import run_random_walk_fast
-from fast_circuit.circuit import warmup
-from goals import and_funct
+from fast_circuit.circuit import warmup, init_worker
+from goals import GOALS, and_funct
 
 
 def construct_genome(size: int) -> list:
@@ -48,22 +56,22 @@ if __name__ == "__main__":
 
     all_sizes = [3, 5, 7, 10, 15, 20, 30, 40, 60, 80, 120, 160, 240, 320,
                  480, 640, 1000, 1500, 2000, 3000]
-    num_trials = 500
+    rel_precision = 0.03
+    min_trials = 50
+    max_trials = 500
     N_pop = 1000
     mu = 0.001
     t_max = 1e15
     m_max = 2_000_000
 
-    # Load existing results
-    existing_sizes  = load('sizes',            out_dir) or []
-    all_mutations   = load('all_mutations',    out_dir) or []
-    means           = load('means_mutations',  out_dir) or []
-    medians         = load('medians_mutations',out_dir) or []
-    stds            = load('stds_mutations',   out_dir) or []
-    pct5            = load('pct5_mutations',   out_dir) or []
-    pct95           = load('pct95_mutations',  out_dir) or []
+    # Load existing results, one list per column in size order
+    columns = {name: load(name, out_dir) or [] for name in (
+        'sizes', 'all_mutations', 'means_mutations', 'medians_mutations', 'stds_mutations',
+        'pct5_mutations', 'pct95_mutations')}
+    # sizes run before adaptive stopping used a fixed 500 trials
+    columns['precision'] = load('precision', out_dir) or [None] * len(columns['sizes'])
 
-    done = set(existing_sizes)
+    done = set(columns['sizes'])
     new_sizes = [s for s in all_sizes if s not in done]
     if not new_sizes:
         print("All sizes already computed.")
@@ -71,44 +79,36 @@ if __name__ == "__main__":
         print(f"Skipping already-done sizes: {sorted(done)}")
         print(f"Running new sizes: {new_sizes}\n")
 
-    for size in new_sizes:
-        print(f"\nNetwork size N={size}")
-        initial_circuit = Circuit(2, construct_genome(size))
-
-        mutations, times, distances, mutation_types, fitness_list, computing_list = \
-            run_in_parallel_same_start(
-                run_random_walk_fast, num_trials, size, None,
-                and_funct, N_pop, mu, initial_circuit, t_max, m_max,
-            )
-
+    def record(job, result):
+        """Add a finished size and save everything, so partial results are never lost."""
+        mutations, times, distances, mutation_types, fitness_list, computing_list, achieved = result
         arr = np.array(mutations)
-        existing_sizes.append(size)
-        all_mutations.append(arr.tolist())
-        means.append(float(arr.mean()))
-        medians.append(float(np.median(arr)))
-        stds.append(float(arr.std()))
-        pct5.append(float(np.percentile(arr, 5)))
-        pct95.append(float(np.percentile(arr, 95)))
-
-        print(f"  mean={means[-1]:.1f}  median={medians[-1]:.1f}  "
-              f"5th={pct5[-1]:.1f}  95th={pct95[-1]:.1f}")
-
-        # Save after each size so partial results are never lost
-        order = np.argsort(existing_sizes)
-        save([existing_sizes[i] for i in order],  'sizes',            out_dir)
-        save([all_mutations[i]  for i in order],  'all_mutations',    out_dir)
-        save([means[i]          for i in order],  'means_mutations',  out_dir)
-        save([medians[i]        for i in order],  'medians_mutations',out_dir)
-        save([stds[i]           for i in order],  'stds_mutations',   out_dir)
-        save([pct5[i]           for i in order],  'pct5_mutations',   out_dir)
-        save([pct95[i]          for i in order],  'pct95_mutations',  out_dir)
-        # Re-sort in-memory lists to stay consistent
-        existing_sizes = [existing_sizes[i] for i in order]
-        all_mutations  = [all_mutations[i]  for i in order]
-        means          = [means[i]          for i in order]
-        medians        = [medians[i]        for i in order]
-        stds           = [stds[i]           for i in order]
-        pct5           = [pct5[i]           for i in order]
-        pct95          = [pct95[i]          for i in order]
+        row = {'sizes': job.size, 'all_mutations': arr.tolist(), 'means_mutations': float(arr.mean()),
+               'medians_mutations': float(np.median(arr)), 'stds_mutations': float(arr.std()),
+               'pct5_mutations': float(np.percentile(arr, 5)), 'pct95_mutations': float(np.percentile(arr, 95)),
+               'precision': achieved}
+        for name, value in row.items():
+            columns[name].append(value)
+        print(f"  N={job.size}  mean={row['means_mutations']:.1f}  median={row['medians_mutations']:.1f}  "
+              f"5th={row['pct5_mutations']:.1f}  95th={row['pct95_mutations']:.1f}  trials={len(arr)}")
+
+        order = np.argsort(columns['sizes'])
+        for name, values in columns.items():
+            values[:] = [values[i] for i in order]
+            save(values, name, out_dir)
+
+    # Expected cost per trial ~ median mutations * size, fitted to the sizes already done
+    cost = None
+    if len(done) >= 2:
+        cost = fit_trial_cost(columns['sizes'],
+                              [m * s for m, s in zip(columns['medians_mutations'], columns['sizes'])])
+
+    # All sizes go into one grid on one pool: the largest sizes start first and
+    # small ones fill in around them, and each size is saved as soon as it finishes.
+    jobs = [GridJob(run_random_walk_fast, size, construct_genome(size), 'and', (N_pop, mu, t_max, m_max),
+                    rel_precision=rel_precision, min_itter=min_trials, max_itter=max_trials)
+            for size in new_sizes]
+    with SweepPool(GOALS, worker_init=partial(init_worker, goals=(and_funct,))) as pool:
+        pool.run_grid(jobs, cost=cost, on_complete=record)
 
     print(f"\nDone. Results saved to {out_dir}/")
@@ -8,6 +8,23 @@ Tests:
   4. SS distribution          — statistically equivalent mutation counts
   5. Convergence              — all trials reach fitness 1 for both models
   6. Speed benchmark          — wall-clock comparison (informational)
+  7. Canonical enumeration    — orbit sizes reproduce brute-force counts
+  8. Truth-table lookup       — memory-mapped table matches direct evaluation
+  9. Multilevel splitting     — splitting CDF agrees with brute-force walks
+ 10. Hot-path instrumentation — stats are consistent and don't perturb trials
+ 11. Post-hoc times           — counts-only runs + Gamma draws match timed runs
+ 12. Truth-table goals        — one cached truth table answers every goal form
+ 13. Multi-goal hitting times — one walk hits each goal when its own walk would
+ 14. Varying goals            — epochs match chained single-goal runs
+ 15. DFE of single mutations  — kernel counts match mutating every slot by hand
+ 16. Run-length trajectories  — change events expand to the per-step F and C
+ 17. Incremental observables  — computing size, depth, distance match recomputation
+ 18. Genome history           — replayed genomes match the run, from either keyframe
+ 19. Propose/commit/rollback  — in-place steps match duplicate + mutate, reuse buffers
+ 20. Incremental node tables  — cone-limited re-evaluation matches full evaluation
+ 21. Neutral leaping          — leaped runs match stepped ones, replay and observe exactly
+ 22. Reachability index       — descendant bitsets stay exact, draws match the retry loop
+ 23. Zobrist hashes           — incremental hashes match rehashing, visited sets count genotypes
 """
 import random
 import time
@@ -172,6 +189,624 @@ def benchmark(n_trials=30):
             print(f"    {label}: {elapsed:.2f}s  ({elapsed/n_trials*1000:.1f}ms/trial)")
 
 
+# ── test 7: canonical enumeration ────────────────────────────────────────────
+
+def test_canonical_enumeration(max_gates=3):
+    print(f"\n[7] Canonical enumeration vs brute force (N<={max_gates})")
+    import itertools
+    from collections import Counter
+    from goals import xor_funct
+    from fast_circuit.enumeration import (enumerate_canonical, count_acyclic_genomes,
+                                          fitness_distribution)
+
+    for n in range(1, max_gates + 1):
+        brute = Counter()
+        for inputs in itertools.product(range(n + 2), repeat=2 * n):
+            for output in range(2, n + 2):
+                fc = FastCircuit(list(inputs) + [output])
+                if not fc.has_cycle():
+                    brute[fc.fitness(xor_funct)] += 1
+        assert sum(brute.values()) == count_acyclic_genomes(n)
+        assert sum(o for _, o in enumerate_canonical(n)) == count_acyclic_genomes(n)
+        assert fitness_distribution(xor_funct, n) == brute, f"N={n}: distributions differ"
+    print(f"  PASSED — exact fitness distributions match for N=1..{max_gates}")
+
+
+# ── test 8: precomputed truth tables ─────────────────────────────────────────
+
+def test_truth_table_lookup(max_gates=3):
+    print(f"\n[8] Memory-mapped truth tables (N<={max_gates})")
+    import itertools
+    import os
+    import tempfile
+    from goals import and_funct, or_funct, xor_funct
+    from fast_circuit.fitness_table import (build_truth_table, register_truth_table,
+                                            unregister_truth_table, encode_genome, CYCLIC)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in range(1, max_gates + 1):
+            table = build_truth_table(n, os.path.join(tmp, f'size_{n}.npy'))
+            for inputs in itertools.product(range(n + 2), repeat=2 * n):
+                for output in range(2, n + 2):
+                    genome = list(inputs) + [output]
+                    direct = FastCircuit(genome)
+                    assert (table[encode_genome(genome)] == CYCLIC) == direct.has_cycle()
+                    register_truth_table(table)
+                    try:
+                        looked_up = FastCircuit(genome)
+                        for f in (and_funct, or_funct, xor_funct):
+                            assert looked_up.fitness(f) == direct.fitness(f), (
+                                f"{f.__name__}: genome={genome}")
+                    finally:
+                        unregister_truth_table(n)
+
+            def proposals(genome):
+                random.seed(n)
+                fc = FastCircuit(genome)
+                seen = []
+                for step in range(300):
+                    token = fc.propose()
+                    seen.append((fc.genome.tolist(), fc.truth_table(), fc.output_neutral))
+                    (fc.commit if step % 3 else fc.rollback)(token)
+                return seen
+
+            # the second start has its output wired to an input, which the table doesn't cover
+            starts = (construct_genome(n), [0, 0] * n + [0])
+            direct = [proposals(genome) for genome in starts]
+            register_truth_table(table)
+            try:
+                assert encode_genome(starts[1]) == -1 and FastCircuit(starts[1]).fitness(and_funct) == 0.75
+                assert [proposals(genome) for genome in starts] == direct, (
+                    f"propose() with the N={n} table diverged from evaluation")
+            finally:
+                unregister_truth_table(n)
+            del table
+    print(f"  PASSED — table lookups match evaluation for N=1..{max_gates}")
+
+
+# ── test 9: multilevel splitting ─────────────────────────────────────────────
+
+def test_splitting_cdf(size=10, n_trials=1500):
+    print(f"\n[9] Multilevel splitting vs brute force (N={size})")
+    from fast_circuit.splitting import first_passage_splitting, splitting_quantiles
+
+    counts = np.array(run_trials(run_random_walk_fast, make_fast_circuit, size, n_trials, seed=20_000))
+    horizon = int(np.median(counts))
+    random.seed(0); np.random.seed(0)
+    result = first_passage_splitting(and_funct, make_fast_circuit(size), horizon,
+                                     n_per_level=400, n_replicates=5)
+    for t in (np.percentile(counts, 5), np.percentile(counts, 25)):
+        i = np.searchsorted(result['t'], t, side='right') - 1
+        brute = np.mean(counts <= result['t'][i])
+        est, se = result['cdf'][i], np.sqrt(result['cdf_var'][i])
+        print(f"  P(tau<={result['t'][i]}): brute={brute:.4f}  splitting={est:.4f} ± {se:.4f}")
+        assert abs(est - brute) < 4 * se + 3 * np.sqrt(brute * (1 - brute) / n_trials)
+    assert np.isnan(splitting_quantiles(result, [0.99])[0])
+    print("  PASSED")
+
+
+# ── test 10: hot-path instrumentation ────────────────────────────────────────
+
+def test_instrumentation(size=30, n_trials=10):
+    print(f"\n[10] Hot-path instrumentation (N={size})")
+    from fast_circuit import circuit
+
+    for fn in (run_random_walk_fast, run_strong_selection_fast):
+        for i in range(n_trials):
+            np.random.seed(i); random.seed(i)
+            plain = fn(and_funct, 1000, 0.001, make_fast_circuit(size), 1e15, 500_000)
+            np.random.seed(i); random.seed(i)
+            *result, stats = fn(and_funct, 1000, 0.001, make_fast_circuit(size), 1e15, 500_000,
+                                instrument=True)
+            assert circuit._STATS is None
+            assert np.array_equal(plain[0], result[0]) and plain[3] == result[3]
+            steps = len(result[0]) - 1
+            assert stats['steps'] == steps
+            assert stats['proposals'] == steps + stats.get('cyclic_rejections', 0)
+            assert sum(v for k, v in stats.items() if k.startswith('steps_at_fitness_')) == steps
+            assert stats['accepted'] == sum(result[3].values())
+            assert 0 < stats['seconds_topo'] <= stats['seconds_mutate'] <= stats['seconds_total']
+
+    # every key the instrument module documents is reported, and measures something
+    from collections import Counter
+    from fast_circuit import instrument
+    from goals import xor_funct
+    documented = ['proposals', 'cyclic_rejections', 'duplicates', 'cache_hits', 'cache_misses', 'cone_evaluations',
+                  'cone_skips', 'steps', 'accepted', 'leaped_steps', 'seconds_topo', 'seconds_computing',
+                  'seconds_cone', 'seconds_mutate', 'seconds_duplicate', 'seconds_fitness', 'seconds_total',
+                  'seconds_python_loop']
+    assert all(key.split('_', 1)[1] in instrument.__doc__ for key in documented if key.startswith('seconds_'))
+    assert all(key.split('_')[0] in instrument.__doc__ for key in documented)
+    totals = Counter()
+    for leap in (False, True):
+        np.random.seed(0); random.seed(0)
+        *_, stats = run_strong_selection_fast(xor_funct, 1000, 0.001, make_fast_circuit(size), 1e15, 500_000,
+                                              instrument=True, leap=leap)
+        assert stats.get('cone_evaluations', 0) + stats.get('cone_skips', 0) == (
+            stats['proposals'] - stats.get('cyclic_rejections', 0) - stats.get('leaped_steps', 0))
+        assert any(key.startswith('steps_at_fitness_') for key in stats)
+        totals.update(stats)
+    for key in documented:   # leaped_steps only with leap, cone_skips only without
+        assert totals[key] > 0, f"{key} missing or zero"
+    print("  PASSED")
+
+
+# ── test 11: post-hoc time reconstruction ────────────────────────────────────
+
+def test_posthoc_times(size=10, n_trials=300, alpha=0.01):
+    print(f"\n[11] Post-hoc time reconstruction (N={size}, {n_trials} trials)")
+    from fast_circuit.timing import sample_elapsed_times, trajectory_times, rescale_times
+
+    L = 2 * size + 1
+    timed, counts = [], []
+    for i in range(n_trials):
+        np.random.seed(i); random.seed(i)
+        T, *_ = run_random_walk_fast(and_funct, 1000, 0.001, make_fast_circuit(size), 1e15, 500_000)
+        random.seed(i)
+        m, *_ = run_random_walk_fast(and_funct, 1000, 0.001, make_fast_circuit(size), 1e15, 500_000,
+                                     record_times=False)
+        assert m == len(T), "skipping the waiting times changed the walk"
+        timed.append(T[-1]); counts.append(m)
+
+    times = sample_elapsed_times(counts, L, [1000, 500], [0.001, 0.002], rng=0)
+    assert times.shape == (2, 2, n_trials)
+    _, p = ks_2samp(timed, times[0, 0])
+    assert p > alpha, f"reconstructed times differ from timed runs (p={p:.4f})"
+    assert np.allclose(times[1, 0], 2 * times[0, 0]) and np.allclose(times[0, 1], times[0, 0] / 2)
+    assert np.allclose(rescale_times(timed, 0.001, 0.002), np.array(timed) / 2)
+    try:
+        sample_elapsed_times(counts, L, [500], [0.001], selection_N=1000)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("strong-selection counts reused at another N")
+    T = trajectory_times(counts[0], L, 1000, 0.001, seed=5)
+    assert len(T) == counts[0] and T[0] == 0 and np.all(np.diff(T) > 0)
+    assert np.allclose(trajectory_times(counts[0], L, 1000, 0.002, seed=5), T / 2)
+    print(f"  PASSED (KS p={p:.3f})")
+
+
+# ── test 12: truth-table goals ───────────────────────────────────────────────
+
+def test_truth_table_goals(sizes=(3, 10, 40), n_genomes=30):
+    print(f"\n[12] Truth-table goals (sizes={sizes})")
+    from goals import GOALS
+    from fast_circuit.circuit import GOAL_MASKS, goal_mask, goal_name, register_goal
+    from fast_circuit.instrument import HotPathStats, collecting
+
+    assert all(goal_mask(f) == GOAL_MASKS[name] for name, f in GOALS.items())
+    random.seed(12)
+    for size in sizes:
+        fc = make_fast_circuit(size)
+        for _ in range(n_genomes):
+            for _ in range(5):
+                fc.mutate()
+            circuit = Circuit(2, fc.genome.tolist())
+            tt = sum(circuit.evaluate([bool(i & 2), bool(i & 1)]) << i for i in range(4))
+            assert fc.truth_table() == tt, f"genome={fc.genome.tolist()}"
+            for name, f in GOALS.items():
+                expected = Circuit(2, fc.genome.tolist()).evaluate_expression(f)
+                assert fc.fitness(f) == fc.fitness(name) == fc.fitness(GOAL_MASKS[name]) == expected
+
+    stats = HotPathStats()
+    fc.mutate()
+    with collecting(stats):
+        [fc.fitness(name) for name in GOALS]
+    assert stats.counts['cache_misses'] == 1 and stats.counts['cache_hits'] == len(GOALS) - 1
+
+    assert register_goal('nand', lambda x: not (x[0] and x[1])) == 0b0111 and goal_name(0b0111) == 'nand'
+    assert register_goal('nand', np.int64(0b0111)) == 0b0111 and type(GOAL_MASKS['nand']) is int
+    del GOAL_MASKS['nand']
+    goal_mask.cache_clear()
+    try:
+        goal_mask('nand')
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("unregistered goal name accepted")
+    assert goal_name(0b0101) == 'tt0101'
+    print("  PASSED")
+
+
+# ── test 13: multi-goal hitting times ────────────────────────────────────────
+
+def test_hitting_times(size=8, n_trials=20):
+    print(f"\n[13] Multi-goal hitting times (N={size}, {n_trials} trials)")
+    from goals import GOALS
+    from fast_circuit.models import run_random_walk_hitting_times, hitting_times_by_goal
+    from logic_gates import SweepPool
+
+    trials = []
+    for i in range(n_trials):
+        np.random.seed(i); random.seed(i)
+        hits, _ = run_random_walk_hitting_times(list(GOALS), 1000, 0.001, make_fast_circuit(size), 1e15, 500_000)
+        trials.append(hits)
+        for name, f in GOALS.items():
+            np.random.seed(i); random.seed(i)
+            T, *_ = run_random_walk_fast(f, 1000, 0.001, make_fast_circuit(size), 1e15, 500_000)
+            assert hits[name] == (len(T), T[-1]), f"trial {i} {name}: {hits[name]} vs {(len(T), T[-1])}"
+    by_goal = hitting_times_by_goal(trials)
+    assert set(by_goal) == set(GOALS) and all(len(m) == n_trials for m, _ in by_goal.values())
+
+    with SweepPool(GOALS, progress_interval=None) as pool:
+        all16 = pool.run_hitting_times(4, size, construct_genome(size), None, (1000, 0.001, 1e15, 500_000), seed=1)
+    assert len(all16) == 16 and len(all16['and'][0]) == 4
+    print("  PASSED — hits match single-goal walks")
+
+
+def test_varying_goals(size=10, n_trials=10):
+    print(f"\n[14] Varying goals (N={size}, {n_trials} trials)")
+    from fast_circuit.models import run_varying_goal_fast
+
+    for i in range(n_trials):
+        # epoch 1 draws exactly what a single-goal run does, so it must stop where that run does
+        np.random.seed(i); random.seed(i)
+        epochs, x, _ = run_varying_goal_fast(['xnor', 'xor'], 1000, 0.001, make_fast_circuit(size), 1e15, 500_000)
+        np.random.seed(i); random.seed(i)
+        T, *_ = run_strong_selection_fast('xnor', 1000, 0.001, make_fast_circuit(size), 1e15, 500_000)
+        assert [e['goal'] for e in epochs] == ['xnor', 'xor']
+        assert (epochs[0]['adapted'], epochs[0]['adapted_time']) == (len(T), T[-1])
+        assert epochs[1]['start'] == epochs[0]['end'] and x.fitness('xor') == 1.0
+        assert epochs[1]['adaptation_mutations'] == epochs[1]['end'] - epochs[1]['start'] > 0
+
+    np.random.seed(0); random.seed(0)
+    epochs, _, _ = run_varying_goal_fast(['and', 'or'], 1000, 0.001, make_fast_circuit(size), 1e15, 2001,
+                                         switch='every', k=500, record_times=False)
+    assert [(e['goal'], e['start'], e['end']) for e in epochs] == [
+        ('and', 1, 501), ('or', 501, 1001), ('and', 1001, 1501), ('or', 1501, 2001)]
+    print("  PASSED — epochs chain and match single-goal runs")
+
+
+def test_dfe(sizes=(1, 4, 15), n_snapshots=10, n_draws=20_000, alpha=0.01):
+    print(f"\n[15] DFE of single mutations (sizes {sizes}, {n_snapshots} snapshots each)")
+    from fast_circuit.circuit import _topo_order_numba, NUM_INPUTS
+    from fast_circuit.dfe import mutant_table_counts, dfe_histograms
+
+    random.seed(0)
+    for size in sizes:
+        x = make_fast_circuit(size)
+        snapshots = []
+        for _ in range(n_snapshots):
+            for _ in range(5):
+                x.mutate()
+            snapshots.append(x.duplicate())
+        counts, tables = mutant_table_counts(snapshots)
+        for fc, row, table in zip(snapshots, counts, tables):
+            expected = np.zeros(16, dtype=np.int64)
+            n_nodes = NUM_INPUTS + size
+            for idx in range(len(fc.genome)):
+                for v in range(NUM_INPUTS if idx == len(fc.genome) - 1 else 0, n_nodes):
+                    if v == fc.genome[idx]:
+                        continue
+                    mutant = fc.genome.copy()
+                    mutant[idx] = v
+                    if _topo_order_numba(mutant, NUM_INPUTS)[1] == n_nodes:
+                        expected[FastCircuit(mutant).truth_table()] += 1
+            assert table == fc.truth_table() and (row == expected).all(), f"{fc.genome}: {row} vs {expected}"
+        hist = dfe_histograms(snapshots, 'xor')
+        assert (hist.sum(axis=1) == counts.sum(axis=1)).all()
+        assert (dfe_histograms(snapshots, 'xor', samples=100, rng=0).sum(axis=1) == 100).all()
+
+    # sampled DFEs follow what mutate() actually draws: slot weights, no-ops and all
+    from scipy.stats import chi2_contingency, chisquare
+    from fast_circuit.dfe import DFE_EFFECTS, dfe_probabilities
+    fc = snapshots[-1]
+    base = fc.fitness('xor')
+    empirical = np.zeros(len(DFE_EFFECTS), dtype=np.int64)
+    for _ in range(n_draws):
+        mutant = fc.duplicate()
+        mutant.mutate()
+        empirical[round((mutant.fitness('xor') - base) * 4) + 4] += 1
+    expected = dfe_probabilities([fc], 'xor')[0] * n_draws
+    assert (empirical[expected == 0] == 0).all()
+    p = chisquare(empirical[expected > 0], expected[expected > 0]).pvalue
+    sampled = dfe_histograms([fc], 'xor', samples=n_draws, rng=0)[0]
+    keep = (empirical + sampled) > 0
+    p_sampled = chi2_contingency([empirical[keep], sampled[keep]])[1]
+    print(f"  mutate() DFE vs probabilities p={p:.4f}, vs samples p={p_sampled:.4f}")
+    assert p > alpha and p_sampled > alpha
+    print("  PASSED — counts match exhaustive mutation, samples match mutate()")
+
+
+def test_runlength_trajectories(size=8, n_trials=5):
+    print(f"\n[16] Run-length trajectories (N={size}, {n_trials} trials)")
+    from goals import xor_funct
+
+    for i in range(n_trials):
+        np.random.seed(i); random.seed(i)
+        T, _, F, _, C, _ = run_evolution_strong_selection(xor_funct, 1000, 0.001, make_circuit(size), 1e15, 500_000)
+        np.random.seed(i); random.seed(i)
+        T_rle, _, R, _, none, _ = run_evolution_strong_selection(xor_funct, 1000, 0.001, make_circuit(size), 1e15,
+                                                                 500_000, rle=True)
+        assert none is None and np.array_equal(T, T_rle) and len(R) == len(T)
+        assert np.array_equal(R.fitness(), F) and np.array_equal(R.computing_sizes()[1:], C)
+        assert R.dwell_steps().sum() == len(T) and np.isclose(R.dwell_times(T).sum(), T[-1])
+        assert sum(end - start for start, end, *_ in R.iter_runs()) == len(T)
+
+        np.random.seed(i); random.seed(i)
+        T, x, R, *_ = run_strong_selection_fast(xor_funct, 1000, 0.001, make_fast_circuit(size), 1e15, 500_000,
+                                                rle=True)
+        assert len(R) == len(T) and R.correct[-1] == 4
+        assert R.computing[-1] == Circuit(2, list(x.genome)).num_gates_computing()
+        assert R[-1] == 1.0 and np.array_equal(R[:], R.fitness())
+
+    # the parallel runners read the final fitness of each trial, which an rle trial keeps as events
+    from functools import partial
+    from goals import GOALS
+    from logic_gates import SweepPool, run_in_parallel_same_start
+    params = (1000, 0.001, 1e15, 500_000)
+    _, _, _, _, fitness, _ = run_in_parallel_same_start(partial(run_random_walk_fast, rle=True), n_trials, size, None,
+                                                        xor_funct, *params[:2], make_fast_circuit(size), *params[2:],
+                                                        progress_interval=None)
+    assert len(fitness) == n_trials and all(R[-1] == 1.0 for R in fitness)
+    with SweepPool(GOALS, max_workers=2, progress_interval=None, trajectories=True) as pool:
+        _, _, _, _, fitness, _ = pool.run_same_start(partial(run_strong_selection_fast, rle=True), n_trials, size,
+                                                     construct_genome(size), 'xor', params, seed=16)
+    assert len(fitness) == n_trials and all(R[-1] == 1.0 for R in fitness)
+    print("  PASSED — events expand to the full trajectories")
+
+
+def _depth(genome, node):
+    if node < 2:
+        return 0
+    g = node - 2
+    return 1 + max(_depth(genome, genome[2 * g]), _depth(genome, genome[2 * g + 1]))
+
+
+def test_observables(size=12, n_mutations=300):
+    print(f"\n[17] Incremental observables (N={size}, {n_mutations} mutations)")
+    random.seed(0)
+    x = make_fast_circuit(size)
+    origin = x.genome.copy()
+    for i in range(n_mutations):
+        x.mutate()
+        genome = [int(v) for v in x.genome]
+        assert x.num_gates_computing() == Circuit(2, genome).num_gates_computing()
+        assert x.distance_from_origin() == np.count_nonzero(x.genome != origin)
+        assert x.computing_depth() == _depth(genome, genome[-1])
+        if i % 3:
+            x = x.duplicate()   # copies carry the origin and distance along
+
+    np.random.seed(0); random.seed(0)
+    T, x, _, _, C, d, obs = run_strong_selection_fast(and_funct, 1000, 0.001, make_fast_circuit(size), 1e15,
+                                                      500_000, observe_every=50)
+    assert len(C) == len(T) - 1 and C[-1] == Circuit(2, [int(v) for v in x.genome]).num_gates_computing()
+    assert obs['step'][0] == 0 and obs['step'][-1] == len(T) - 1 and obs['distance'][-1] == d
+    assert np.all(obs['cone'] + 2 >= obs['computing'])
+    print("  PASSED — maintained values match recomputation")
+
+
+def test_genome_history(size=20, n_trials=3):
+    print(f"\n[18] Genome history (N={size}, {n_trials} trials)")
+    import os
+    import tempfile
+    from logic_gates.history import GenomeHistory, GenomeHistoryReader
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.bin')
+        for i in range(n_trials):
+            np.random.seed(i); random.seed(i)
+            with GenomeHistory(path, 2 * size + 1, keyframe_every=8) as history:
+                T, x, *_, obs = run_strong_selection_fast(and_funct, 1000, 0.001, make_fast_circuit(size), 1e15,
+                                                          500_000, observe_every=1, history=history)
+            reader = GenomeHistoryReader(path)
+            genomes = reader.genomes_at(np.arange(len(T)))
+            assert np.array_equal(genomes[0], construct_genome(size)) and np.array_equal(genomes[-1], x.genome)
+            assert np.array_equal((genomes != genomes[0]).sum(axis=1), obs['distance'])
+            for step in np.random.randint(0, len(T), 50):
+                assert np.array_equal(reader.genome_at(step), genomes[step])
+
+        np.random.seed(0); random.seed(0)
+        with GenomeHistory(path, 2 * size + 1) as history:
+            T, x, *_ = run_random_walk(and_funct, 1000, 0.001, make_circuit(size), 1e15, 500_000, history=history)
+        assert np.array_equal(GenomeHistoryReader(path).genome_at(len(T) - 1), x.genome)
+    print("  PASSED — replay reproduces every step")
+
+
+def test_propose_rollback(size=30, n_steps=2000):
+    print(f"\n[19] Propose/commit/rollback (N={size}, {n_steps} steps)")
+    x = make_fast_circuit(size)
+    reference = make_fast_circuit(size)
+    rng = np.random.default_rng(0)
+    orders = set()
+    for step in range(n_steps):
+        random.seed(step)
+        token = x.propose()
+        random.seed(step)
+        mutant = reference.duplicate()
+        mutant.mutate()
+        assert np.array_equal(x.genome, mutant.genome) and x.truth_table() == mutant.truth_table()
+        assert x.num_gates_computing() == mutant.num_gates_computing()
+        if rng.random() < 0.3:
+            x.commit(token)
+            reference = mutant
+        else:
+            x.rollback(token)
+        assert np.array_equal(x.genome, reference.genome) and x.truth_table() == reference.truth_table()
+        assert x.distance_from_origin() == reference.distance_from_origin()
+        if step >= 10:
+            orders.add(id(x._full_order))
+    assert len(orders) == 2   # steady state swaps two sets of order arrays
+
+    # a duplicate taken between propose and rollback keeps its arrays
+    token = x.propose()
+    copy = x.duplicate()
+    expected = copy._full_order.copy()
+    x.rollback(token)
+    x.commit(x.propose())
+    assert np.array_equal(copy._full_order, expected)
+    print("  PASSED — same mutants, no new order arrays")
+
+
+def test_incremental_tables(size=30, n_steps=3000):
+    print(f"\n[20] Incremental node tables (N={size}, {n_steps} steps)")
+    x = make_fast_circuit(size)
+    random.seed(1)
+    rng = np.random.default_rng(1)
+    neutral = 0
+    for step in range(n_steps):
+        before = x.truth_table()
+        token = x.propose()
+        full = FastCircuit(x.genome.copy())
+        assert x.truth_table() == full.truth_table()
+        assert x.output_neutral == (x.truth_table() == before)
+        neutral += x.output_neutral
+        # every computing node's table matches evaluating it on its own
+        for node in x._eval_order[:x._eval_len]:
+            if node >= 2:
+                sub = x.genome.copy()
+                sub[-1] = node
+                assert x._node_tables[node] == FastCircuit(sub).truth_table()
+        if rng.random() < 0.3:
+            x.commit(token)
+        else:
+            x.rollback(token)
+            assert x.truth_table() == before
+        if step % 500 == 0:
+            x = x.duplicate()   # the copy rebuilds its tables lazily
+    assert 0 < neutral < n_steps
+    print(f"  PASSED — {neutral} of {n_steps} proposals output-neutral")
+
+
+def test_neutral_leaping(size=20, n_trials=200, alpha=0.01):
+    print(f"\n[21] Neutral leaping (N={size}, {n_trials} trials each, α={alpha})")
+    import os
+    import tempfile
+    from logic_gates.history import GenomeHistory, GenomeHistoryReader
+
+    for fn in (run_random_walk_fast, run_strong_selection_fast):
+        stepped = run_trials(fn, make_fast_circuit, size, n_trials, seed=0)
+        leaped = run_trials(fn, make_fast_circuit, size, n_trials, seed=10_000, leap=True)
+        ks_stat, ks_p = ks_2samp(stepped, leaped)
+        print(f"  {fn.__name__}: stepped mean={np.mean(stepped):.1f}  leaped mean={np.mean(leaped):.1f}  "
+              f"KS p={ks_p:.4f}")
+        assert ks_p > alpha, f"KS test rejected equivalence: p={ks_p:.4f} < {alpha}"
+
+    # the leaped steps are logged like single ones
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.bin')
+        np.random.seed(0); random.seed(0)
+        with GenomeHistory(path, 4 * size + 1) as history:
+            T, x, F, mc, C, _, obs, stats = run_strong_selection_fast(
+                and_funct, 1000, 0.001, make_fast_circuit(2 * size), 1e15, 500_000, instrument=True,
+                observe_every=7, history=history, leap=True)
+        genomes = GenomeHistoryReader(path).genomes_at(obs['step'])
+    assert stats['leaped_steps'] > 0 and stats['steps'] == len(T) - 1 == len(C)
+    assert np.array_equal(genomes[-1], x.genome)
+    assert np.array_equal((genomes != genomes[0]).sum(axis=1), obs['distance'])
+    for genome, row in zip(genomes, obs):
+        replayed = FastCircuit(genome)
+        assert replayed.num_gates_computing() == row['computing'] and replayed.cone_size() == row['cone']
+    print(f"  PASSED — {stats['leaped_steps']} of {stats['steps']} steps leaped")
+
+
+def test_reachability_index(size=25, n_steps=2000, n_draws=50_000, alpha=0.01):
+    print(f"\n[22] Reachability index (N={size}, {n_steps} steps; {n_draws} draws)")
+    from collections import Counter
+    from scipy.stats import chi2_contingency
+
+    def descendants(genome):
+        children = [[] for _ in range(2 + size)]
+        for g in range(size):
+            for k in range(2):
+                children[genome[2 * g + k]].append(g + 2)
+        out = {}
+        for g in range(2, 2 + size):
+            seen, stack = set(), list(children[g])
+            while stack:
+                u = stack.pop()
+                if u not in seen:
+                    seen.add(u)
+                    stack += children[u]
+            out[g] = seen
+        return out
+
+    random.seed(0)
+    x = make_fast_circuit(size)
+    x.track_reachability()
+    for step in range(n_steps):
+        token = x.propose()
+        if random.random() < 0.5:
+            x.commit(token)
+        else:
+            x.rollback(token)
+        if step % 7 == 0:
+            x.mutate()
+        if step % 500 == 0:
+            x = x.duplicate()
+        index = x.reachability
+        for g, below in descendants(x.genome.tolist()).items():
+            assert [index.is_descendant(u, g) for u in range(2 + size)] == [u in below for u in range(2 + size)]
+            assert index.legal_sources(g) == size + 1 - len(below)
+        assert index.total == index.legal.sum()
+
+    # exact draws and the retry loop's accepted draws have one distribution
+    exact, retry = make_fast_circuit(4), make_fast_circuit(4)
+    exact.track_reachability()
+    drawn, accepted = Counter(), Counter()
+    for _ in range(n_draws):
+        drawn[exact._draw()] += 1
+        token = retry.propose()
+        accepted[retry.last_mutation[0], retry.last_mutation[2]] += 1
+        retry.rollback(token)
+    keys = sorted(set(drawn) | set(accepted))
+    p = chi2_contingency([[drawn[k] for k in keys], [accepted[k] for k in keys]])[1]
+    print(f"  {len(keys)} legal mutations, χ² p={p:.4f}")
+    assert p > alpha, f"exact draws differ from the retry loop: p={p:.4f}"
+    print("  PASSED")
+
+
+def test_zobrist_visited(size=20, n_steps=2000):
+    print(f"\n[23] Zobrist hashes and visited genotypes (N={size})")
+    import os
+    import tempfile
+    from fast_circuit.zobrist import GenotypeSet, genome_hash
+    from logic_gates.history import GenomeHistory, GenomeHistoryReader
+
+    random.seed(0); np.random.seed(0)
+    x = make_fast_circuit(size)
+    for step in range(n_steps):
+        token = x.propose()
+        if random.random() < 0.5:
+            x.commit(token)
+        else:
+            x.rollback(token)
+        if step % 7 == 0:
+            x.mutate()
+        if step % 11 == 0:
+            x.leap(20, 20, 0.5)
+        if step % 500 == 0:
+            x = x.duplicate()
+        assert x.genome_hash() == genome_hash(x.genome)
+
+    # the set agrees with a Python set through resizes, duplicates and a zero hash
+    rng = np.random.default_rng(0)
+    hashes = np.concatenate([rng.integers(0, 2 ** 63, 5000, dtype=np.uint64), [0, 0]])
+    hashes = np.concatenate([hashes, hashes[rng.integers(0, len(hashes), 2000)]])
+    visited, expected = GenotypeSet(capacity=8), set()
+    for h in hashes[:3000]:
+        assert visited.add(h) == (int(h) not in expected)
+        expected.add(int(h))
+    visited.update(hashes[3000:])
+    expected.update(int(h) for h in hashes[3000:])
+    assert len(visited) == len(expected) and all(h in visited for h in expected) and 12345 not in visited
+
+    # a trajectory's visited set counts the distinct genomes it passes through
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.bin')
+        for fn, leap in ((run_random_walk_fast, False), (run_random_walk_fast, True),
+                         (run_strong_selection_fast, True)):
+            np.random.seed(1); random.seed(1)
+            visited = GenotypeSet()
+            with GenomeHistory(path, 2 * size + 1) as history:
+                T, *_ = fn(and_funct, 1000, 0.001, make_fast_circuit(size), 1e15, 500_000, history=history, leap=leap,
+                           visited=visited)
+            genomes = GenomeHistoryReader(path).genomes_at(np.arange(len(T)))
+            assert len(visited) == len({g.tobytes() for g in genomes})
+            print(f"  {fn.__name__} (leap={leap}): {len(visited)} distinct genotypes in {len(T)} steps")
+    print("  PASSED")
+
+
 if __name__ == "__main__":
     print("Warming up Numba JIT...")
     warmup()
@@ -180,5 +815,22 @@ if __name__ == "__main__":
     test_rw_distribution()
     test_ss_distribution()
     test_convergence()
+    test_canonical_enumeration()
+    test_truth_table_lookup()
+    test_splitting_cdf()
+    test_instrumentation()
+    test_posthoc_times()
+    test_truth_table_goals()
+    test_hitting_times()
+    test_varying_goals()
+    test_dfe()
+    test_runlength_trajectories()
+    test_observables()
+    test_genome_history()
+    test_propose_rollback()
+    test_incremental_tables()
+    test_neutral_leaping()
+    test_reachability_index()
+    test_zobrist_visited()
     benchmark()
     print("\nAll tests passed.")
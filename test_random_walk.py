@@ -5,15 +5,24 @@ equivalent results to the original implementation.
 The original implementation is preserved inline here as `run_random_walk_orig`
 so it can always be compared against, even after the source file changes.
 """
+import contextlib
+import io
+import os
 import random
+import subprocess
+import sys
 import numpy as np
 from collections import Counter
 from scipy.spatial.distance import hamming
 from scipy.stats import ks_2samp, mannwhitneyu
 
-from logic_gates import Circuit, run_in_parallel_same_start
+from logic_gates import Circuit, GridJob, IsomorphismCounter, SweepPool, run_in_parallel_same_start, \
+    run_in_parallel_until_precise
+from logic_gates import progress
+from logic_gates.run_evoltution_in_parallel import relative_half_width
 from logic_gates.noselectionmodel import run_random_walk
-from goals import and_funct
+from logic_gates.strongselectionmodel import run_evolution_strong_selection
+from goals import GOALS, and_funct
 
 
 # ── original implementation, preserved verbatim ─────────────────────────────
@@ -132,8 +141,180 @@ def test_all_reach_fitness_one(sizes=(5, 20, 80), n_trials=50):
     print("  All convergence checks passed")
 
 
+def test_adaptive_trial_counts(size=5):
+    """The adaptive runner stops at min_itter for a loose target and runs to max_itter for an impossible one."""
+    print(f"\n[4] Adaptive trial counts (N={size})")
+    rng = np.random.default_rng(0)
+    samples = rng.lognormal(5, 1, 400)
+    assert relative_half_width(samples[:40]) > relative_half_width(samples)
+    assert relative_half_width(samples, 'log_mean') > 0
+    assert relative_half_width([3.0]) == float('inf')
+
+    circuit = Circuit(2, construct_genome(size))
+    args = (and_funct, 1000, 0.001, circuit, 1e15, 500_000)
+    loose = run_in_parallel_until_precise(run_random_walk, 100.0, size, None, *args,
+                                          min_itter=8, max_itter=40, num_in_flight=4)
+    assert 8 <= loose[-1]['num_trials'] < 40 and loose[-1]['met']
+    tight = run_in_parallel_until_precise(run_random_walk, 0.0, size, None, *args,
+                                          min_itter=8, max_itter=24, num_in_flight=4)
+    assert tight[-1]['num_trials'] == 24 and not tight[-1]['met']
+    assert len(tight[0]) == 24
+    print(f"  PASSED — loose target stopped after {loose[-1]['num_trials']} trials")
+
+
+def test_progress_telemetry(size=5, n_trials=12):
+    """Workers publish mutation counts to shared slots; the runner's totals match the trials it returns."""
+    print(f"\n[5] Progress telemetry (N={size})")
+    slots, next_slot = progress.make_shared(2)
+    progress.init_worker(slots, next_slot)
+    try:
+        progress.publish(1000, 0.5)
+        progress.publish(1500, 0.75, done=True)
+        progress.publish(1000, 0.25)
+        assert slots[0] == 2500 and slots[1] == 0.25
+    finally:
+        progress._slots = None
+
+    captured = io.StringIO()
+    circuit = Circuit(2, construct_genome(size))
+    with contextlib.redirect_stdout(captured):
+        mutations, *_ = run_in_parallel_same_start(run_random_walk, n_trials, size, None,
+                                                   and_funct, 1000, 0.001, circuit, 1e15, 500_000,
+                                                   progress_interval=0.001)
+    last = captured.getvalue().strip().splitlines()[-1]
+    assert f"trials {n_trials}/{n_trials}" in last and "mut/s" in last, last
+    print(f"  PASSED — {last.strip()}")
+
+
+def _mark_worker():
+    progress._worker_initialized = True
+
+
+def test_lightweight_import_and_worker_init(size=5, n_trials=4):
+    """logic_gates imports without plotting/stats libraries; worker_init runs in each pool worker."""
+    print(f"\n[6] Lightweight import and worker_init (N={size})")
+    code = ("import sys, logic_gates; "
+            "print(' '.join(m for m in ('matplotlib', 'networkx', 'scipy', 'tqdm') if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip()
+    assert loaded == '', f"import logic_gates loaded {loaded}"
+
+    slots, next_slot = progress.make_shared(1)
+    progress.init_worker(slots, next_slot, _mark_worker)
+    try:
+        assert progress._worker_initialized
+    finally:
+        progress._slots = None
+        del progress._worker_initialized
+
+    circuit = Circuit(2, construct_genome(size))
+    with contextlib.redirect_stdout(io.StringIO()):
+        mutations, *_ = run_in_parallel_same_start(run_random_walk, n_trials, size, None,
+                                                   and_funct, 1000, 0.001, circuit, 1e15, 500_000,
+                                                   progress_interval=None, worker_init=_mark_worker)
+    assert len(mutations) == n_trials
+    print(f"  PASSED — no heavy imports, {n_trials} trials with worker_init")
+
+
+def test_sweep_pool(sizes=(5, 8), n_trials=6):
+    """One SweepPool serves several sizes and goals; a fixed seed reproduces the same trials."""
+    print(f"\n[7] Sweep pool (sizes={sizes}, {n_trials} trials each)")
+    params = (1000, 0.001, 1e15, 500_000)
+    with SweepPool(GOALS, progress_interval=None) as pool:
+        runs = [pool.run_same_start(run_random_walk, n_trials, size, construct_genome(size), goal, params, seed=7)
+                for goal in ('and', 'xor') for size in sizes]
+        again = pool.run_same_start(run_random_walk, n_trials, sizes[0], construct_genome(sizes[0]), 'and', params,
+                                    seed=7)
+        counter = IsomorphismCounter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            adaptive = pool.run_until_precise(run_random_walk, 10.0, sizes[0], Circuit(2, construct_genome(sizes[0])),
+                                              'and', params, counter, min_itter=4, max_itter=8)
+    for mutations, times, distances, counts, fitness, computing in runs:
+        assert len(mutations) == n_trials and all(f[-1] == 1 for f in fitness)
+    assert sorted(again[0]) == sorted(runs[0][0]), "same seed gave different trials"
+    assert adaptive[-1]['num_trials'] >= 4
+    assert sum(c['total'] for c in counter.counter.values()) == adaptive[-1]['num_trials']
+    print(f"  PASSED — {len(runs) + 2} batches on one pool")
+
+
+def test_grid_scheduling(sizes=(3, 8, 5), n_trials=5):
+    """run_grid starts the most expensive job first and reports each job as soon as it finishes."""
+    print(f"\n[8] Cost-aware grid scheduling (sizes={sizes})")
+    params = (1000, 0.001, 1e15, 500_000)
+    jobs = [GridJob(run_random_walk, size, construct_genome(size), 'and', params, num_itter=n_trials, seed=size)
+            for size in sizes]
+    jobs.append(GridJob(run_random_walk, 4, construct_genome(4), 'xor', params, rel_precision=10.0, min_itter=3,
+                        max_itter=6, seed=4))
+    finished = []
+    # a single worker runs trials strictly in dispatch order, so jobs finish in cost order
+    with SweepPool(GOALS, max_workers=1, progress_interval=None) as pool, \
+            contextlib.redirect_stdout(io.StringIO()):
+        results = pool.run_grid(jobs, cost=lambda size, goal: size,
+                                on_complete=lambda job, result: finished.append(job.key))
+    assert finished == [('and', 8), ('and', 5), ('xor', 4), ('and', 3)], finished
+    for size in sizes:
+        assert len(results[('and', size)][0]) == n_trials
+    assert 3 <= results[('xor', 4)][-1]['num_trials'] <= 6
+    try:
+        GridJob(run_random_walk, 3, construct_genome(3), 'and', params, num_itter=0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a job with no trials would never be reported")
+    print(f"  PASSED — jobs finished in order {finished}")
+
+
+def test_shared_trajectories(size=5, n_trials=6):
+    """Trajectories written to shared slabs come back identical to the pickled ones."""
+    print(f"\n[9] Shared-memory trajectories (N={size}, {n_trials} trials)")
+    params = (1000, 0.001, 1e15, 50_000)
+    runs = []
+    for shared in (False, True):
+        with SweepPool(GOALS, max_workers=1, progress_interval=None, trajectories=shared) as pool:
+            runs.append(pool.run_same_start(run_evolution_strong_selection, n_trials, size, construct_genome(size),
+                                            'and', params, seed=3))
+            path = pool._slabs.path if shared else None
+    assert not os.path.exists(path), "temporary slab file left behind"
+    # trials finishing in the same wait() come back in arbitrary order, so line them up by end time
+    (_, times, _, _, fitness, computing), (_, shared_times, _, _, shared_fitness, shared_computing) = \
+        [[[field[i] for i in np.argsort(run[1])] if isinstance(field, list) else field for field in run]
+         for run in runs]
+    assert times == shared_times
+    for a, b in zip(fitness + computing, shared_fitness + shared_computing):
+        assert isinstance(b, np.memmap) and not b.flags.writeable
+        assert np.array_equal(a, b)
+    print(f"  PASSED — {sum(len(f) for f in shared_fitness)} fitness values read back from slabs")
+
+
+def test_compact_pickle(size=100, n_mutations=200):
+    print(f"\n[10] Compact Circuit pickles (N={size})")
+    import pickle
+    from goals import xor_funct
+
+    random.seed(0)
+    circuit = Circuit(2, construct_genome(size))
+    for _ in range(n_mutations):
+        circuit.mutate()
+    circuit.evaluate_expression(and_funct)
+    data = pickle.dumps(circuit)
+    loaded = pickle.loads(data)
+    assert len(data) < 10 * len(circuit.genome)
+    assert 'gates' not in loaded.__dict__   # rebuilt lazily
+    assert loaded.genome == circuit.genome and loaded.fitness == circuit.fitness
+    assert loaded.evaluate_expression(xor_funct) == Circuit(2, circuit.genome[:]).evaluate_expression(xor_funct)
+    assert loaded.num_gates_computing() == circuit.num_gates_computing()
+    assert not hasattr(loaded.gates[0], '__dict__')
+    print(f"  PASSED — {len(data)} bytes for {len(circuit.genome)} genome sites")
+
+
 if __name__ == "__main__":
     test_identical_with_fixed_seed()
     test_distribution_equivalent()
     test_all_reach_fitness_one()
+    test_adaptive_trial_counts()
+    test_progress_telemetry()
+    test_lightweight_import_and_worker_init()
+    test_sweep_pool()
+    test_grid_scheduling()
+    test_shared_trajectories()
+    test_compact_pickle()
     print("\nAll tests passed.")
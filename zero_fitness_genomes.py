@@ -1,23 +1,23 @@
 from logic_gates import run_evolution_strong_selection, run_random_walk, Circuit
+from fast_circuit import FastCircuit
+from fast_circuit.zobrist import GenotypeSet
 import pickle
 from multiprocessing import Pool
 
 
 def worker(size, fitness_function, function_name, num_itter):
-    genomes = set()
-    genome = [0, 0] * size + [0]
+    # FastCircuit keeps the genome's Zobrist hash up to date as it mutates; only the hashes go in the set,
+    # and a genome is copied out once, the first time it is seen (run_and_different_starts reads them back)
+    seen = GenotypeSet()
+    genomes = []
+    c = FastCircuit([0, 0] * size + [0])
     for i in range(num_itter):
-        c = Circuit(2, genome)
-        if c.evaluate_expression(fitness_function) == 0.0:
-            genomes.add(tuple(genome))
+        if c.fitness(fitness_function) == 0.0 and seen.add(c.genome_hash()):
+            genomes.append(c.genome.tolist())
             if len(genomes) % 100 == 0:
                 print(size, len(genomes))
         c.mutate()
-        genome = c.genome
-    list_genomes = []
-    for g in genomes:
-        list_genomes.append(list(g))
-    return list_genomes
+    return genomes
 
 def generate_zero_fit_genomes(sizes, fitness_function, function_name, num_itter=1000000):
 